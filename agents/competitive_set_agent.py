@@ -1,32 +1,27 @@
 import os
-import yaml
 from dotenv import load_dotenv
 
-from langchain_core.messages import SystemMessage
-from langchain_openai import AzureChatOpenAI
-
 load_dotenv(override=True)
 
+from utils.history import build_agent_messages
+from utils.llm import get_chat_model
+from utils.prompts import get_prompt_registry
 from utils.states import AgentState
-from tools.initial_asset_assessment_tools import *
-
-# Create model as brain
-model = AzureChatOpenAI(
-    azure_deployment=os.getenv("AZURE_OPENAI_MODEL"),
-    api_version=os.getenv("OPENAI_API_VERSION"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"))
-
-with open("prompts/initial_asset_assessment_prompt.yaml", 'r') as stream:
-    competitive_set_prompt = yaml.safe_load(stream)
-
-
-# Create system message for Agents
-sys_msg_competitive_set = SystemMessage(content=competitive_set_prompt['system_prompt'])
+from tools.competitive_set_tools import competitive_set_list
 
+AGENT_NAME = "competitive_set"
+# Channel of this agent's tool rounds, it runs concurrently with the detailed development analysis
+MESSAGES_KEY = "competitive_set_messages"
 
 
 def competitive_set_agent(state: AgentState):
-   messages = [model.invoke([sys_msg_competitive_set] + state["messages"])]
-   result = messages[-1]
-   return {"messages": messages ,"competitive_set_result": result}
\ No newline at end of file
+   # Only the user requests, the structured results and this agent's own (compacted) rounds are sent
+   model_with_tools = get_chat_model(AGENT_NAME).bind_tools(competitive_set_list)
+   result = model_with_tools.invoke(build_agent_messages(get_prompt_registry().system_message(AGENT_NAME), state, AGENT_NAME, MESSAGES_KEY))
+   result.name = AGENT_NAME
+   messages = [result]
+   update = {MESSAGES_KEY: messages ,"competitive_set_result": result}
+   if not result.tool_calls:
+      # The final answer is shared in `messages`
+      update["messages"] = messages
+   return update
\ No newline at end of file
@@ -1,33 +1,25 @@
 import os
-import yaml
 from dotenv import load_dotenv
 
-from langchain_core.messages import SystemMessage
-from langchain_openai import AzureChatOpenAI
-
 load_dotenv(override=True)
 
+from utils.history import build_agent_messages
+from utils.llm import get_chat_model
+from utils.prompts import get_prompt_registry
 from utils.states import AgentState
-from tools.initial_asset_assessment_tools import *
-
-# Create model as brain
-model = AzureChatOpenAI(
-    azure_deployment=os.getenv("AZURE_OPENAI_MODEL"),
-    api_version=os.getenv("OPENAI_API_VERSION"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"))
-
-with open("prompts/initial_asset_assessment_prompt.yaml", 'r') as stream:
-    detailed_development_analysis_prompt = yaml.safe_load(stream)
-
-
-# Create system message for Agents
-sys_msg_detailed_development_analysis = SystemMessage(content=detailed_development_analysis_prompt['system_prompt'])
-
 
+AGENT_NAME = "detailed_development_analysis"
+# Channel of this agent's tool rounds, it runs concurrently with the competitive set
+MESSAGES_KEY = "detailed_development_analysis_messages"
 
 
 def detailed_development_analysis_agent(state: AgentState):
-   messages = [model.invoke([sys_msg_detailed_development_analysis] + state["messages"])]
-   result = messages[-1]
-   return {"messages": messages ,"detailed_development_analysis_result": result}
\ No newline at end of file
+   # Only the user requests, the structured results and this agent's own (compacted) rounds are sent
+   result = get_chat_model(AGENT_NAME).invoke(build_agent_messages(get_prompt_registry().system_message(AGENT_NAME), state, AGENT_NAME, MESSAGES_KEY))
+   result.name = AGENT_NAME
+   messages = [result]
+   update = {MESSAGES_KEY: messages ,"detailed_development_analysis_result": result}
+   if not result.tool_calls:
+      # The final answer is shared in `messages`
+      update["messages"] = messages
+   return update
\ No newline at end of file
@@ -0,0 +1,121 @@
+from langgraph.graph import StateGraph, START, END
+
+from utils.states import AgentState
+
+from agents.initial_asset_assessment_agent import (
+    DIMENSIONS_MESSAGES_KEY,
+    LOCATION_MESSAGES_KEY,
+    dimensions_assessment_agent,
+    location_assessment_agent,
+)
+from tools.initial_asset_assessment_tools import dimensions_assessment_tools, location_assessment_tools
+
+from agents.competitive_set_agent import competitive_set_agent, MESSAGES_KEY as COMPETITIVE_SET_MESSAGES_KEY
+from tools.competitive_set_tools import competitive_set_tools
+
+from agents.detailed_development_analysis_agent import (
+    detailed_development_analysis_agent,
+    MESSAGES_KEY as DETAILED_DEVELOPMENT_ANALYSIS_MESSAGES_KEY,
+)
+from tools.detailed_development_analysis_tools import detailed_development_analysis_tools
+
+# Branch node -> (agent, tools, channel of its tool rounds)
+# The two sections of the initial assessment don't depend on each other
+ASSESSMENT_BRANCHES = {
+    "location_assessment": (location_assessment_agent, location_assessment_tools, LOCATION_MESSAGES_KEY),
+    "dimensions_assessment": (dimensions_assessment_agent, dimensions_assessment_tools, DIMENSIONS_MESSAGES_KEY),
+}
+# They only need the base assessment, so they start together once both sections are done
+DOWNSTREAM_BRANCHES = {
+    "competitive_set": (competitive_set_agent, competitive_set_tools, COMPETITIVE_SET_MESSAGES_KEY),
+    "detailed_development_analysis": (
+        detailed_development_analysis_agent,
+        detailed_development_analysis_tools,
+        DETAILED_DEVELOPMENT_ANALYSIS_MESSAGES_KEY,
+    ),
+}
+DOWNSTREAM_AGENTS = tuple(DOWNSTREAM_BRANCHES)
+
+
+# Define the function that determines whether to continue or not.
+# if not go to other agent
+def should_continue(state: AgentState, messages_key: str = "messages"):
+    messages = state[messages_key]
+    last_message = messages[-1]
+    # If the agent asked for tools we run them and go back to the agent
+    if last_message.tool_calls:
+        return "continue"
+    # Otherwise we move to the next agent
+    else:
+        return "next_agent"
+
+
+def branch_router(messages_key: str):
+    """`should_continue` on the message channel of a branch."""
+    def route(state: AgentState):
+        return should_continue(state, messages_key)
+    return route
+
+
+def branch_done(state: AgentState):
+    # Join point of a branch: the node runs once, when the branch has its final answer
+    return {}
+
+
+def add_branch(builder: StateGraph, node: str, agent, tools, messages_key: str, next_node: str):
+    """Adds an agent <-> tools loop that goes to `next_node` when the agent gives its final answer."""
+    builder.add_node(node, agent)
+    builder.add_node(f"tools_for_{node}", tools)
+    builder.add_conditional_edges(
+        node,
+        branch_router(messages_key),
+        {
+            "continue": f"tools_for_{node}",
+            "next_agent": next_node,
+        },
+    )
+    builder.add_edge(f"tools_for_{node}", node)
+
+
+def build_graph(checkpointer=None, downstream_agents=DOWNSTREAM_AGENTS):
+    """
+    Builds and compiles the multi-agent graph:
+
+        START -> location_assessment   -+-> competitive_set               -> END
+              -> dimensions_assessment -+-> detailed_development_analysis -> END
+
+    The location and the dimensions of the initial assessment run as concurrent branches, and
+    so do the downstream agents, which start together once both sections are done. Each branch
+    keeps its tool rounds in its own message channel and the reducers of AgentState merge the
+    updates, so a run takes as long as its longest branch instead of the sum of all of them.
+
+    Args:
+        checkpointer: Optional LangGraph checkpointer used to persist and resume runs.
+        downstream_agents (tuple[str]): Agents run after the initial assessment; with none the
+            graph ends after the base assessment.
+
+    Returns:
+        The compiled graph.
+    """
+    unknown = set(downstream_agents) - set(DOWNSTREAM_BRANCHES)
+    if unknown:
+        raise ValueError(f"Unknown downstream agents {sorted(unknown)}, expected some of {', '.join(DOWNSTREAM_BRANCHES)}")
+
+    builder = StateGraph(AgentState)
+
+    # Initial assessment: one branch per section, from START to its join point
+    for node, (agent, tools, messages_key) in ASSESSMENT_BRANCHES.items():
+        builder.add_edge(START, node)
+        add_branch(builder, node, agent, tools, messages_key, f"{node}_done")
+        builder.add_node(f"{node}_done", branch_done)
+
+    for node in downstream_agents:
+        agent, tools, messages_key = DOWNSTREAM_BRANCHES[node]
+        add_branch(builder, node, agent, tools, messages_key, END)
+
+    # Each downstream agent waits for both sections (a multi-source edge is a barrier)
+    sections_done = [f"{node}_done" for node in ASSESSMENT_BRANCHES]
+    for node in downstream_agents or [END]:
+        builder.add_edge(sections_done, node)
+
+    return builder.compile(checkpointer=checkpointer)
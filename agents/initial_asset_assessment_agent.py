@@ -1,20 +1,25 @@
 import os
-import yaml
 from pprint import pprint
 import logging
 import json
 import re
 from dotenv import load_dotenv
 
-from langchain_core.messages import SystemMessage
-from langchain_openai import AzureChatOpenAI
 from pydantic import ValidationError
 
 
-from utils.states import AgentState, PositionAnalysis
-from langchain_core.messages import AIMessage
+from utils.history import build_agent_messages
+from utils.llm import get_chat_model
+from utils.prompts import get_prompt_registry
+from utils.states import AgentState, PositionAnalysis, AssetDimensions
+from langchain_core.messages import AIMessage, HumanMessage
 from utils.common import extract_json_fallback
-from tools.initial_asset_assessment_tools import initial_asset_assessment_list
+from utils.json_stream import MalformedOutputError, StreamingJSONParser, extract_json, stream_json_answer
+from tools.initial_asset_assessment_tools import (
+    dimensions_assessment_list,
+    initial_asset_assessment_list,
+    location_assessment_list,
+)
 
 logging.basicConfig(
     filename='agent_log.txt',  # log su file (oppure usa filename=None per solo console)
@@ -24,57 +29,107 @@ logging.basicConfig(
 
 
 load_dotenv(override=True)
-# Create model as brain
-model = AzureChatOpenAI(
-    azure_deployment=os.getenv("AZURE_OPENAI_MODEL"),
-    api_version=os.getenv("OPENAI_API_VERSION"),
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"))
 
-with open("prompts/initial_asset_assessment_prompt.yaml", 'r') as stream:
-    initial_asset_prompt = yaml.safe_load(stream)
+AGENT_NAME = "initial_asset_assessment"
+# Channels of the tool rounds of the two sections, when they run as concurrent branches
+LOCATION_MESSAGES_KEY = "location_messages"
+DIMENSIONS_MESSAGES_KEY = "dimensions_messages"
 
+# Schemi delle sezioni del final output, validati mentre la risposta arriva
+OUTPUT_SCHEMAS = {"position_analysis": PositionAnalysis, "asset_dimensions": AssetDimensions}
+# How many times the model is asked again after a malformed final answer
+OUTPUT_MAX_RETRIES = int(os.getenv("OUTPUT_MAX_RETRIES", "1"))
 
-# Create system message for Agents
-sys_msg_initial_asset = SystemMessage(content=initial_asset_prompt['system_prompt'])
+REASK_MESSAGE = (
+    "Your final answer is not valid: {error}. "
+    "Output ONLY the JSON object with the keys {keys}, following the format in the instructions."
+)
 
 
+def run_assessment(state: AgentState, sections=None, tools=initial_asset_assessment_list, messages_key: str = "messages"):
+    """
+    One step of the initial assessment ReAct loop, for the given sections (all of them by default).
+
+    Args:
+        state (AgentState): Current graph state.
+        sections (list[str], optional): Sections of the prompt and keys of the final output.
+        tools (list): Tools bound to the model.
+        messages_key (str): Channel with the tool rounds of this loop. When it is not `messages`
+            the final answer is added to `messages` too, for the other agents.
+
+    Returns:
+        dict: The state update.
+    """
+    schemas = OUTPUT_SCHEMAS if sections is None else {key: OUTPUT_SCHEMAS[key] for key in sections}
+
+    # Costruisci la history dei messaggi: richieste, risultati strutturati e tool rounds compattati
+    system_message = get_prompt_registry().system_message(AGENT_NAME, sections)
+    messages = build_agent_messages(system_message, state, AGENT_NAME, messages_key)
+
+    model_with_tools = get_chat_model(AGENT_NAME).bind_tools(tools)
+    # Invoca il modello in streaming: il final output è validato man mano che arriva
+    parser = None
+    for attempt in range(OUTPUT_MAX_RETRIES + 1):
+        parser = StreamingJSONParser(schemas)
+        try:
+            result = stream_json_answer(model_with_tools, messages, parser, fail_fast=attempt < OUTPUT_MAX_RETRIES)
+            break
+        except MalformedOutputError as e:
+            result = e.message
+            logging.warning(f"⚠️ Malformed final output (attempt {attempt + 1}): {e}")
+            if attempt == OUTPUT_MAX_RETRIES:
+                parser = None
+                break
+            # Richiedi subito la risposta, senza aspettare la fine dello stream
+            messages = messages + [
+                AIMessage(content=e.partial),
+                HumanMessage(content=REASK_MESSAGE.format(error=e, keys=", ".join(schemas))),
+            ]
+    # The name marks where this agent's section ends for the downstream agents
+    result.name = AGENT_NAME
+
+    update = {messages_key: [result]}
+    if result.tool_calls:
+        return update
+    if messages_key != "messages":
+        update["messages"] = [result]
 
-def initial_asset_assessment_agent(state: AgentState):
+    # Logging del risultato grezzo
+    logging.info(f"AI RAW OUTPUT: {result.content}")
+
+    if parser is not None:
+        update.update(parser.validated)
+        logging.info("✅ JSON parsed successfully.")
+        return update
+
+    # Parsing robusto dopo l'ultimo tentativo: keep the sections that are still valid
+    output_json = extract_json_fallback(result.content)
+    if not isinstance(output_json, dict) or not output_json:
+        logging.error("❌ Failed to parse JSON output for asset assessment.")
+        return update
+    for key, model in schemas.items():
+        try:
+            update[key] = model.model_validate(output_json.get(key))
+        except ValidationError as e:
+            logging.error(f"❌ Invalid {key}: {e}")
 
-    # Costruisci la history dei messaggi
-    messages = [sys_msg_initial_asset] + state["messages"]
+    # Torna lo stato aggiornato
+    return update
 
-    model_with_tools = model.bind_tools(initial_asset_assessment_list)
-    # Invoca il modello
-    result = model_with_tools.invoke(messages)
-    messages.append(result)
 
-    #print(type(result.content))
-    #print(result.content)
- 
-    # Logging del risultato grezzo
-    #logging.info(f"AI RAW OUTPUT: {result.content}")
+def initial_asset_assessment_agent(state: AgentState):
+    """The whole initial assessment (location and dimensions) in a single ReAct loop."""
+    return run_assessment(state)
 
-    # Parsing robusto
-    #output_json = extract_json_fallback(result.content)
-    #f not output_json:
-    #   logging.error("❌ Failed to parse JSON output for asset assessment.")
-    #   logging.info(output_json)
-    #lse:
-    #   logging.info("✅ JSON parsed successfully.")
-        
 
+def location_assessment_agent(state: AgentState):
+    """Section 1 (position_analysis), run as a branch concurrent with the dimensions."""
+    return run_assessment(state, ["position_analysis"], location_assessment_list, LOCATION_MESSAGES_KEY)
 
-    #print(type(output_json))
-    #print(output_json)
 
-    # Torna lo stato aggiornato
-    return {**state,
-        "messages": messages
-        #,"position_analysis": output_json["position_analysis"]
-        #,"asset_dimensions": output_json["asset_dimensions"]
-    }
+def dimensions_assessment_agent(state: AgentState):
+    """Section 2 (asset_dimensions), run as a branch concurrent with the location."""
+    return run_assessment(state, ["asset_dimensions"], dimensions_assessment_list, DIMENSIONS_MESSAGES_KEY)
 
 def initial_asset_assessment_output(state: dict) -> dict:
     """Estrae e formatta il risultato strutturato dal messaggio AI finale"""
@@ -0,0 +1,199 @@
+"""
+Portfolio batch mode: runs the asset assessment graph over a list of hotels.
+
+Usage:
+    python batch_runner.py assets.csv -o results.jsonl --concurrency 8 --timeout 900
+
+The input is a CSV with an `asset_name` column (otherwise the first column is used)
+or a JSONL file with an `asset_name` (or `name`) field. One JSON line per asset is appended
+to the output as soon as it finishes, so an interrupted run can be restarted with the same
+command: assets already completed successfully are skipped, and the others resume
+from their last checkpointed node.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+from langchain_core.messages import AIMessage, HumanMessage
+
+from utils.common import extract_json_fallback
+from utils.llm import TokenUsageHandler
+
+load_dotenv(override=True)
+
+
+def read_assets(path: str) -> list:
+    """Reads asset names from a CSV or JSONL file, dropping blanks and duplicates."""
+    names = []
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    names.append(record.get("asset_name") or record.get("name"))
+        else:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames:
+                # Empty file
+                return []
+            column = "asset_name" if "asset_name" in reader.fieldnames else reader.fieldnames[0]
+            names.extend(row[column] for row in reader)
+    return list(dict.fromkeys(n.strip() for n in names if n and n.strip()))
+
+
+def read_completed(path: str) -> set:
+    """Returns the assets that already have a successful record in the output file."""
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from a crashed run
+                continue
+            if record.get("status") == "ok":
+                completed.add(record["asset_name"])
+    return completed
+
+
+def final_output(state: dict) -> tuple:
+    """
+    Merges the final answers of the agents, which run as concurrent branches and each
+    answer with their own sections.
+
+    Returns:
+        tuple: (result, raw_output), the merged JSON sections and the answers one after another.
+    """
+    answers = [
+        m.content for m in state.get("messages", [])
+        if isinstance(m, AIMessage) and m.name and not m.tool_calls and isinstance(m.content, str)
+    ]
+    result = {}
+    for answer in answers:
+        parsed = extract_json_fallback(answer)
+        if isinstance(parsed, dict):
+            result.update(parsed)
+    return result, "\n\n".join(answers)
+
+
+async def run_asset(graph, asset_name: str, timeout: float, interrupt_before, recursion_limit: int) -> dict:
+    """
+    Runs the graph for one asset and returns its output record.
+
+    When the graph has a checkpointer, each asset is its own thread: a run that crashed,
+    failed or timed out resumes from its last completed node instead of starting over.
+    """
+    started = time.perf_counter()
+    record = {"asset_name": asset_name}
+    usage = TokenUsageHandler()
+    config = {"configurable": {"thread_id": f"asset:{asset_name}"}, "recursion_limit": recursion_limit, "callbacks": [usage]}
+    inputs = {"messages": [HumanMessage(content=f"You need to analyze the hotel {asset_name}")]}
+    try:
+        state = None
+        if graph.checkpointer:
+            snapshot = await graph.aget_state(config)
+            if snapshot.values.get("messages"):
+                if snapshot.next and not set(snapshot.next) <= set(interrupt_before or ()):
+                    inputs = None
+                else:
+                    # Already finished (or stopped at the interrupt) in a previous run
+                    state = snapshot.values
+        if state is None:
+            state = await asyncio.wait_for(
+                graph.ainvoke(inputs, interrupt_before=interrupt_before, config=config),
+                timeout=timeout,
+            )
+        result, raw_output = final_output(state)
+        record.update(status="ok", result=result or None, raw_output=raw_output)
+    except asyncio.TimeoutError:
+        record.update(status="timeout", error=f"Timed out after {timeout}s")
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["token_usage"] = usage.totals
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+    return record
+
+
+async def run_batch(graph, assets: list, output_path: str, concurrency: int, timeout: float,
+                    interrupt_before=None, recursion_limit: int = 1000) -> dict:
+    """
+    Runs the graph over all the assets with bounded concurrency, streaming one JSON line per asset.
+
+    Returns:
+        dict: Counters per status.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    counters = {"ok": 0, "error": 0, "timeout": 0}
+    started = time.perf_counter()
+
+    async def worker(asset_name):
+        async with semaphore:
+            return await run_asset(graph, asset_name, timeout, interrupt_before, recursion_limit)
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        tasks = [asyncio.create_task(worker(name)) for name in assets]
+        for done, task in enumerate(asyncio.as_completed(tasks), start=1):
+            record = await task
+            out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            out.flush()
+            counters[record["status"]] += 1
+            elapsed = time.perf_counter() - started
+            eta = elapsed / done * (len(assets) - done)
+            print(
+                f"[{done}/{len(assets)}] {record['status']:<7} {record['asset_name']} "
+                f"({record['elapsed_seconds']}s) | ok={counters['ok']} failed={counters['error'] + counters['timeout']} "
+                f"| eta {eta / 60:.1f} min",
+                file=sys.stderr,
+                flush=True,
+            )
+    return counters
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the asset assessment graph over a portfolio of hotels.")
+    parser.add_argument("input", help="CSV (asset_name column) or JSONL file with the assets to analyze")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl", help="JSONL output file (appended, used to resume)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="Maximum number of assets analyzed at the same time")
+    parser.add_argument("-t", "--timeout", type=float, default=900, help="Timeout per asset in seconds")
+    parser.add_argument("--interrupt-before", default="competitive_set,detailed_development_analysis",
+                        help="Stop before these comma-separated nodes (default: the two downstream agents, which start together, "
+                             "i.e. only the initial assessment). Use 'none' for a full run")
+    parser.add_argument("--recursion-limit", type=int, default=1000)
+    parser.add_argument("--checkpoint-db", default=None,
+                        help="SQLite checkpoint file used to resume interrupted assets (default: CHECKPOINT_DB or .cache/checkpoints.sqlite)")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Do not persist intermediate graph state")
+    parser.add_argument("--llm-cache", choices=["off", "on", "replay"], default=None,
+                        help="LLM response cache: on to record and reuse answers, replay to fail on any uncached call (default: LLM_CACHE or off)")
+    args = parser.parse_args(argv)
+
+    assets = read_assets(args.input)
+    completed = read_completed(args.output)
+    pending = [name for name in assets if name not in completed]
+    print(f"{len(assets)} assets, {len(assets) - len(pending)} already completed, {len(pending)} to run", file=sys.stderr)
+    if not pending:
+        return
+
+    if args.llm_cache:
+        os.environ["LLM_CACHE"] = args.llm_cache
+
+    from agents.graph import build_graph
+    from utils.checkpoint import get_checkpointer
+
+    checkpointer = None if args.no_checkpoint else get_checkpointer(args.checkpoint_db)
+    interrupt_before = None if args.interrupt_before.lower() == "none" else [n.strip() for n in args.interrupt_before.split(",") if n.strip()]
+    counters = asyncio.run(run_batch(
+        build_graph(checkpointer=checkpointer), pending, args.output, args.concurrency, args.timeout,
+        interrupt_before=interrupt_before, recursion_limit=args.recursion_limit,
+    ))
+    print(f"Done: {counters}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
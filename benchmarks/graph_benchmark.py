@@ -0,0 +1,348 @@
+"""
+End-to-end benchmark of the graph orchestration, with a scripted chat model and stubbed tools.
+
+Usage:
+    python benchmarks/graph_benchmark.py
+    python benchmarks/graph_benchmark.py --assets 1 10 100 --checkpointers none compact --concurrency 16
+    python benchmarks/graph_benchmark.py --llm-latency-ms 50 --tool-latency-ms 20 --json results.json
+
+The real wiring is used: `agents.graph.build_graph` (should_continue, the ToolNodes and the concurrent
+agent branches, history compaction and prompts included). Only the chat model and the tools that call
+external APIs (Google Maps, SerpAPI) are replaced, so no key or network is needed.
+
+For each number of assets and each checkpointer it reports:
+- throughput, the end-to-end latency of an asset and the latency of each node (mean and p95);
+- the serialized state size after each step (mean and max, and the final state);
+- the checkpoint overhead, i.e. the wall time compared with the run without checkpointer;
+- the peak Python memory of the run (tracemalloc, measured in a separate pass).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+NEARBY_CITIES = ["Nice", "Monaco", "Cannes", "Menton"]
+SNIPPET = (
+    "The hotel offers {rooms} rooms and suites, a spa with indoor pool, two restaurants and a "
+    "panoramic terrace over the Mediterranean. The estate covers about {area} square meters. "
+)
+
+
+def _coordinates(name: str) -> dict:
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return {"lat": 43.0 + digest[0] / 255, "lng": 7.0 + digest[1] / 255}
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model that plays a fixed ReAct script per agent, based on how many tool rounds the
+    agent already has in its prompt. The location branch of the initial assessment geocodes the
+    hotel, looks up the nearby places and computes driving distances, the dimensions branch searches
+    the asset dimensions (the sections are told apart by the bound tools), and both return a valid
+    JSON answer; the downstream agents answer at once.
+    """
+
+    agent: str
+    latency_ms: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        # Tool lists may hold plain functions, which ToolNode and bind_tools also accept
+        return self.bind(tools=[getattr(tool, "name", getattr(tool, "__name__", None)) for tool in tools], **kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        rounds = sum(1 for m in messages if isinstance(m, AIMessage) and m.tool_calls)
+        asset = next((m.content for m in messages if isinstance(m, HumanMessage)), "hotel").rsplit(" ", 1)[-1]
+        message = self._script(asset, rounds, kwargs.get("tools") or [])
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _script(self, asset: str, rounds: int, tools: list) -> AIMessage:
+        if self.agent != "initial_asset_assessment":
+            return AIMessage(content=json.dumps({self.agent: {"summary": f"{self.agent} of {asset}"}}))
+
+        def call(name, args, i):
+            return {"name": name, "args": args, "id": f"call_{rounds}_{i}", "type": "tool_call"}
+
+        hotel = _coordinates(asset)
+        cities = [{"name": city, **_coordinates(city)} for city in NEARBY_CITIES]
+        location, dimensions = "get_coordinates" in tools, "search_asset_evidence" in tools
+        script = []
+        if location:
+            script += [
+                [call("get_coordinates", {"poi_name": asset}, 0)],
+                [call("get_nearby_places", {"latitude": hotel["lat"], "longitude": hotel["lng"]}, 0)],
+                [call("calculate_distance_to_city_centers", {"asset_coords": hotel, "city_coords_list": cities[:2]}, 0)],
+            ]
+        if dimensions:
+            script.append([call("search_asset_evidence", {"hotel_name": asset}, 0)])
+        if rounds < len(script):
+            return AIMessage(content="", tool_calls=script[rounds])
+        answer = {
+            "position_analysis": {
+                "hotel_coordinates": hotel,
+                "nearby_cities": [{"name": c["name"], "coordinates": {"lat": c["lat"], "lng": c["lng"]}, "distance_km": 10.0} for c in cities],
+                "context": "semi-urban",
+                "accessibility": "well-connected",
+                "summary": f"{asset} lies between Nice and Monaco.",
+            },
+            "asset_dimensions": {
+                "number_of_rooms": {"value": "87", "source_url": "https://example.com/rooms"},
+                "total_surface_area_sqm": {"value": "12000", "source_url": "https://example.com/area"},
+                "main_amenities": [{"amenity": "spa", "source_url": "https://example.com/spa"}],
+                "additional_information": None,
+            },
+        }
+        sections = [key for key, bound in (("position_analysis", location), ("asset_dimensions", dimensions)) if bound]
+        return AIMessage(content=json.dumps({key: answer[key] for key in sections}))
+
+
+def stub_tools(latency_ms: float):
+    """
+    Replaces the tools that call external APIs with local fakes of realistic output size.
+    `get_nearby_places` (offline), `web_search_batch` and `search_asset_evidence` run for real on top of the fake `web_search`,
+    sync and async alike, so no search goes through the cache or the network.
+    """
+    from tools.common_tools import web_search
+    import tools.initial_asset_assessment_tools as initial_tools
+
+    def pause():
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+
+    def get_coordinates(poi_name: str) -> dict:
+        pause()
+        return _coordinates(poi_name)
+
+    def calculate_distance_to_city_centers(asset_coords: dict, city_coords_list: list) -> list:
+        pause()
+        return [
+            {"index": i, "name": city.get("name"), "status": "OK", "distance_km": 12.5 + i, "duration_seconds": 900 + 60 * i}
+            for i, city in enumerate(city_coords_list)
+        ]
+
+    def get_distance_between_coordinates(point1: dict, point2: dict) -> dict:
+        pause()
+        return {"distance_km": 12.5, "duration_seconds": 900}
+
+    def search(query: str) -> list:
+        pause()
+        return [{"snippet": SNIPPET.format(rooms=80 + i, area=12000 + i), "link": f"https://example.com/{i}"} for i in range(10)]
+
+    for tool, fake in (
+        (initial_tools.get_coordinates, get_coordinates),
+        (initial_tools.calculate_distance_to_city_centers, calculate_distance_to_city_centers),
+        (initial_tools.get_distance_between_coordinates, get_distance_between_coordinates),
+        (web_search, search),
+    ):
+        tool.func = fake
+        tool.coroutine = None
+
+
+def install_fake_model(latency_ms: float):
+    """Points the agents to the scripted model instead of the Azure factory."""
+    import agents.competitive_set_agent
+    import agents.detailed_development_analysis_agent
+    import agents.initial_asset_assessment_agent
+
+    models = {}
+
+    def get_chat_model(agent=None, **overrides):
+        if agent not in models:
+            models[agent] = ScriptedChatModel(agent=agent, latency_ms=latency_ms)
+        return models[agent]
+
+    for module in (agents.initial_asset_assessment_agent, agents.competitive_set_agent, agents.detailed_development_analysis_agent):
+        module.get_chat_model = get_chat_model
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Collects the duration of every node run from the LangGraph callbacks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.durations = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+        node = (metadata or {}).get("langgraph_node")
+        if node and kwargs.get("name") == node:
+            with self._lock:
+                self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+            if started:
+                self.durations.setdefault(started[0], []).append(time.perf_counter() - started[1])
+
+    on_chain_error = on_chain_end
+
+
+def p95(values) -> float:
+    """95th percentile, nearest-rank (the maximum for fewer than 20 values)."""
+    ordered = sorted(values)
+    return ordered[math.ceil(0.95 * len(ordered)) - 1]
+
+
+def cache_files(root: str) -> list:
+    """Files written under a cache root."""
+    return [os.path.join(path, name) for path, _, names in os.walk(root) for name in names]
+
+
+def make_checkpointer(kind: str, directory: str):
+    if kind == "none":
+        return None
+    if kind == "memory":
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        return InMemorySaver()
+    if kind == "compact":
+        from utils.checkpoint import CompactSqliteSaver
+
+        return CompactSqliteSaver(os.path.join(directory, f"checkpoints-{time.time_ns()}.sqlite"))
+    raise ValueError(f"Unknown checkpointer {kind}")
+
+
+async def run_scenario(n_assets: int, checkpointer_kind: str, concurrency: int, directory: str, measure_memory: bool = False) -> dict:
+    from agents.graph import build_graph
+
+    checkpointer = make_checkpointer(checkpointer_kind, directory)
+    graph = build_graph(checkpointer=checkpointer)
+    serde = JsonPlusSerializer()
+    timer = NodeTimer()
+    state_sizes, final_sizes, steps, latencies = [], [], [], []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_asset(i):
+        config = {"configurable": {"thread_id": f"bench:{i}"}, "recursion_limit": 200, "callbacks": [timer]}
+        inputs = {"messages": [HumanMessage(content=f"You need to analyze the hotel Hotel{i}")]}
+        size, count = 0, 0
+        async with semaphore:
+            asset_started = time.perf_counter()
+            async for state in graph.astream(inputs, config=config, stream_mode="values"):
+                size = len(serde.dumps_typed(state)[1])
+                state_sizes.append(size)
+                count += 1
+            latencies.append(time.perf_counter() - asset_started)
+        final_sizes.append(size)
+        steps.append(count)
+
+    if measure_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(run_asset(i) for i in range(n_assets)))
+    elapsed = time.perf_counter() - started
+    peak = None
+    if measure_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    result = {
+        "assets": n_assets,
+        "checkpointer": checkpointer_kind,
+        "seconds": elapsed,
+        "assets_per_second": n_assets / elapsed,
+        "steps_per_asset": statistics.mean(steps),
+        "asset_latency_ms": {
+            "mean": statistics.mean(latencies) * 1000,
+            "p95": p95(latencies) * 1000,
+        },
+        "nodes": {
+            node: {
+                "runs": len(values),
+                "mean_ms": statistics.mean(values) * 1000,
+                "p95_ms": p95(values) * 1000,
+            }
+            for node, values in sorted(timer.durations.items())
+        },
+        "state_bytes": {"mean": statistics.mean(state_sizes), "max": max(state_sizes), "final_mean": statistics.mean(final_sizes)},
+        "peak_memory_mb": peak / 1024 / 1024 if peak is not None else None,
+    }
+    if hasattr(checkpointer, "storage_stats"):
+        result["storage"] = checkpointer.storage_stats()
+    return result
+
+
+def print_result(result: dict, baseline: dict = None):
+    overhead = ""
+    if baseline and result["checkpointer"] != "none":
+        overhead = f" | checkpoint overhead {result['seconds'] / baseline['seconds'] - 1:+.0%}"
+    memory = f" | peak {result['peak_memory_mb']:.1f} MB" if result.get("peak_memory_mb") is not None else ""
+    print(
+        f"\n{result['assets']} assets, checkpointer={result['checkpointer']}: {result['seconds']:.2f} s "
+        f"({result['assets_per_second']:.1f} assets/s, {result['steps_per_asset']:.0f} steps/asset){overhead}{memory}"
+    )
+    latency = result["asset_latency_ms"]
+    print(f"  asset latency: mean {latency['mean']:.1f} ms, p95 {latency['p95']:.1f} ms")
+    state = result["state_bytes"]
+    print(f"  state size: mean {state['mean'] / 1024:.1f} KB, max {state['max'] / 1024:.1f} KB, final {state['final_mean'] / 1024:.1f} KB")
+    if "storage" in result:
+        print(f"  storage: {result['storage']}")
+    for node, stats in result["nodes"].items():
+        print(f"  {node:<42} {stats['runs']:>6} runs  mean {stats['mean_ms']:7.2f} ms  p95 {stats['p95_ms']:7.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the graph orchestration with a scripted model and stubbed tools.")
+    parser.add_argument("--assets", type=int, nargs="+", default=[1, 10, 100, 1000], help="Number of assets of each scenario")
+    parser.add_argument("--checkpointers", nargs="+", default=["none", "memory", "compact"], choices=["none", "memory", "compact"])
+    parser.add_argument("--concurrency", type=int, default=8, help="Assets run at the same time")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated latency of each model call")
+    parser.add_argument("--tool-latency-ms", type=float, default=0.0, help="Simulated latency of each external tool call")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass (peak memory)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("LLM_CACHE", "off")
+    stub_tools(args.tool_latency_ms)
+    install_fake_model(args.llm_latency_ms)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        # The stubs must not reach the on-disk caches: they would change the timings between runs
+        cache_root = os.path.join(directory, "cache")
+        os.environ["ASSET_AGENT_CACHE_DIR"] = cache_root
+        # Warm-up: imports, prompt loading and first compilation are not part of the measures
+        asyncio.run(run_scenario(1, "none", 1, directory))
+        for n_assets in args.assets:
+            baseline = None
+            for kind in args.checkpointers:
+                result = asyncio.run(run_scenario(n_assets, kind, args.concurrency, directory))
+                if not args.no_memory:
+                    memory = asyncio.run(run_scenario(n_assets, kind, args.concurrency, directory, measure_memory=True))
+                    result["peak_memory_mb"] = memory["peak_memory_mb"]
+                if kind == "none":
+                    baseline = result
+                print_result(result, baseline)
+                results.append(result)
+        written = cache_files(cache_root)
+        assert not written, f"The benchmark wrote to the caches: {written}"
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
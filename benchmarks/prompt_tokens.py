@@ -0,0 +1,83 @@
+"""
+Prompt token benchmark: input tokens spent on system prompts in one run, before and after the prompt registry.
+
+Usage:
+    python benchmarks/prompt_tokens.py
+    python benchmarks/prompt_tokens.py --steps location_assessment=6 dimensions_assessment=4 competitive_set=1
+
+Before the registry every agent sent the whole initial assessment prompt (all sections) on each
+model call: a frozen copy of that prompt, as the agents loaded it, is in benchmarks/baseline_prompts.
+Now each agent sends the shared static prefix plus its own instructions and sections; the two
+branches of the initial assessment only send their own section.
+The number of model calls per agent (ReAct steps) is an input, since it depends on the run.
+No provider-side prompt caching is assumed: every system prompt is under the 1024 tokens from
+which Azure OpenAI caches a prefix.
+
+For the token usage of a real run, pass `utils.llm.TokenUsageHandler` as a callback of the graph
+(the batch runner stores it in each record).
+"""
+import argparse
+import os
+import sys
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.history import count_tokens  # noqa: E402
+from utils.prompts import get_prompt_registry  # noqa: E402
+
+BASELINE_PROMPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline_prompts", "initial_asset_assessment_prompt.yaml")
+
+# Graph node -> (prompt, sections sent)
+NODES = {
+    "location_assessment": ("initial_asset_assessment", ["position_analysis"]),
+    "dimensions_assessment": ("initial_asset_assessment", ["asset_dimensions"]),
+    "competitive_set": ("competitive_set", None),
+    "detailed_development_analysis": ("detailed_development_analysis", None),
+}
+DEFAULT_STEPS = {"location_assessment": 6, "dimensions_assessment": 4, "competitive_set": 1, "detailed_development_analysis": 1}
+
+
+def parse_steps(values) -> dict:
+    steps = dict(DEFAULT_STEPS)
+    for value in values or ():
+        agent, _, count = value.partition("=")
+        if agent not in steps:
+            raise SystemExit(f"Unknown node {agent}, expected one of {', '.join(NODES)}")
+        steps[agent] = int(count)
+    return steps
+
+
+def baseline_tokens(path: str = BASELINE_PROMPT) -> int:
+    """Tokens of the system prompt that every agent sent before the registry."""
+    with open(path, "r", encoding="utf-8") as stream:
+        return count_tokens(yaml.safe_load(stream)["system_prompt"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the system prompt tokens sent in one run.")
+    parser.add_argument("--steps", nargs="*", help="Model calls per graph node, as node=count")
+    args = parser.parse_args(argv)
+    steps = parse_steps(args.steps)
+
+    registry = get_prompt_registry()
+    # The old prompt was the initial assessment prompt with every section, for all the agents
+    legacy_tokens = baseline_tokens()
+
+    print(f"{'node':<32}{'calls':>6}{'before':>10}{'after':>10}{'prompt':>10}")
+    total_before = total_after = 0
+    for agent, (prompt_name, sections) in NODES.items():
+        tokens = registry.get(prompt_name).token_count(sections)
+        before, after = legacy_tokens * steps[agent], tokens * steps[agent]
+        total_before, total_after = total_before + before, total_after + after
+        print(f"{agent:<32}{steps[agent]:>6}{before:>10}{after:>10}{tokens:>10}")
+
+    reduction = 1 - total_after / total_before if total_before else 0
+    print(f"{'total':<32}{sum(steps.values()):>6}{total_before:>10}{total_after:>10}")
+    print(f"System prompt tokens per run: {total_before} -> {total_after} ({-reduction:+.0%})")
+    print(f"Shared static prefix: {registry.get('initial_asset_assessment').tokens['static_prefix']} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Startup time benchmark: measures the cold import time of the entry points with `python -X importtime`.
+
+Usage:
+    python benchmarks/startup_time.py                 # report and check the budgets
+    python benchmarks/startup_time.py --runs 5 --top 15
+    python benchmarks/startup_time.py --record        # also append the results to benchmarks/startup_history.jsonl
+
+Every run is a fresh interpreter, so the numbers include the whole import chain. The exit code
+is 1 when the median import time of an entry point exceeds its budget or when one of the
+heavy libraries (openai, numpy, PIL, torch, segment_anything, googlemaps) is imported at startup:
+they are expected to be imported only when a tool or a model is actually used.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HISTORY_PATH = os.path.join(ROOT, "benchmarks", "startup_history.jsonl")
+
+# Budgets in milliseconds for the median cumulative import time of each entry point
+BUDGETS_MS = {
+    "agents.graph": 2500,
+    "agents.initial_asset_assessment_agent": 2000,
+    "tools.initial_asset_assessment_tools": 1500,
+    "tools.competitive_set_tools": 1500,
+    "tools.detailed_development_analysis_tools": 1500,
+    "batch_runner": 1000,
+}
+
+# Libraries that must not be imported by the entry points
+DEFERRED_MODULES = ("openai", "langchain_openai", "numpy", "PIL", "torch", "segment_anything", "googlemaps")
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)\s*$")
+
+
+def measure(module: str) -> dict:
+    """
+    Imports a module in a new interpreter with `-X importtime`.
+
+    Returns:
+        dict: total_ms (cumulative import time of the module), wall_ms (interpreter start included)
+            and deferred (heavy libraries that were imported anyway).
+    """
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    loaded = set()
+    total_ms = None
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if not match:
+            continue
+        cumulative_us, name = int(match.group(2)), match.group(3)
+        loaded.add(name.split(".")[0])
+        if name == module:
+            total_ms = cumulative_us / 1000
+    return {
+        "total_ms": total_ms if total_ms is not None else wall_ms,
+        "wall_ms": wall_ms,
+        "deferred": sorted(m for m in DEFERRED_MODULES if m in loaded),
+    }
+
+
+def heaviest_imports(module: str, top: int) -> list:
+    """Returns the `top` packages with the highest self time when importing `module`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    self_time = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            package = match.group(3).split(".")[0]
+            self_time[package] = self_time.get(package, 0) + int(match.group(1)) / 1000
+    return sorted(self_time.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the entry points.")
+    parser.add_argument("modules", nargs="*", help="Modules to measure (default: all the entry points with a budget)")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per module, the median is reported")
+    parser.add_argument("--top", type=int, default=10, help="Number of heaviest packages listed per module")
+    parser.add_argument("--record", action="store_true", help=f"Append the results to {os.path.relpath(HISTORY_PATH, ROOT)}")
+    args = parser.parse_args(argv)
+
+    modules = args.modules or list(BUDGETS_MS)
+    results, failed = {}, False
+    for module in modules:
+        runs = [measure(module) for _ in range(args.runs)]
+        median_ms = statistics.median(r["total_ms"] for r in runs)
+        budget = BUDGETS_MS.get(module)
+        deferred = runs[0]["deferred"]
+        over_budget = budget is not None and median_ms > budget
+        failed = failed or over_budget or bool(deferred)
+        results[module] = {"median_ms": round(median_ms, 1), "budget_ms": budget, "deferred_imported": deferred}
+
+        verdict = "OVER BUDGET" if over_budget else "ok"
+        print(f"{module}: {median_ms:.0f} ms (budget {budget or '-'} ms) {verdict}")
+        if deferred:
+            print(f"  heavy modules imported at startup: {', '.join(deferred)}")
+        for package, ms in heaviest_imports(module, args.top):
+            print(f"  {ms:8.1f} ms  {package}")
+
+    if args.record:
+        with open(HISTORY_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": sys.version.split()[0],
+                "results": results,
+            }) + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
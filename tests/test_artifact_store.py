@@ -0,0 +1,72 @@
+import os
+
+import numpy as np
+import pytest
+
+from utils.artifact_store import ArtifactStore, is_artifact_handle
+
+MASK = {"size": [4, 5], "counts": "04"}
+
+
+def test_handles_are_content_addressed(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    image = np.arange(12, dtype=np.uint8).reshape(2, 2, 3)
+    handle = store.put(image, "image")
+    assert is_artifact_handle(handle) and handle.startswith("artifact://image/")
+    assert store.put(image.copy(), "image") == handle
+    assert store.put(MASK, "mask") != handle
+    assert np.array_equal(store.get(handle), image)
+
+
+def test_handles_outlive_the_process(tmp_path):
+    # A resumed run restores the handles from its checkpoint in a new process, with an empty memory
+    store = ArtifactStore(str(tmp_path))
+    image = np.random.default_rng(0).integers(0, 255, (8, 8, 3), dtype=np.uint8)
+    image_ref, mask_ref = store.put(image, "image"), store.put(MASK, "mask")
+
+    restarted = ArtifactStore(str(tmp_path))
+    assert np.array_equal(restarted.get(image_ref), image)
+    assert restarted.get(mask_ref) == MASK
+
+
+def test_memory_mapped_tiles_are_stored_as_a_reference(tmp_path):
+    tile_path = str(tmp_path / "tile.npy")
+    np.save(tile_path, np.ones((16, 16, 3), dtype=np.uint8))
+    tile = np.load(tile_path, mmap_mode="r")
+    store = ArtifactStore(str(tmp_path / "artifacts"))
+    handle = store.put(tile, "image")
+    [stored] = os.listdir(tmp_path / "artifacts" / "image")
+    assert stored.endswith(".ref")
+
+    assert ArtifactStore(str(tmp_path / "artifacts")).get(handle).shape == (16, 16, 3)
+    # The tile left its cache: the handle can't be resolved anymore
+    os.remove(tile_path)
+    with pytest.raises(KeyError, match="call the tool"):
+        ArtifactStore(str(tmp_path / "artifacts")).get(handle)
+
+
+def test_memory_budget_keeps_evicted_payloads_on_disk(tmp_path):
+    store = ArtifactStore(str(tmp_path), memory_budget=1000)
+    arrays = [np.full(400, i, dtype=np.uint8) for i in range(5)]
+    handles = [store.put(array, "image") for array in arrays]
+    assert store._memory_bytes <= 1000
+    for handle, array in zip(handles, arrays):
+        assert np.array_equal(store.get(handle), array)
+
+
+def test_disk_budget_removes_the_least_recently_used(tmp_path):
+    store = ArtifactStore(str(tmp_path), memory_budget=0, disk_budget=2500)
+    handles = []
+    for i in range(4):
+        handles.append(store.put(np.full(1000, i, dtype=np.uint8), "image"))
+        os.utime(store._path(handles[-1], ".npy"), (i, i))
+    restarted = ArtifactStore(str(tmp_path))
+    with pytest.raises(KeyError):
+        restarted.get(handles[0])
+    assert restarted.get(handles[-1])[0] == 3
+
+
+@pytest.mark.parametrize("handle", ["artifact://image/../../etc", "artifact://Image/abc", "https://example.com/x.png"])
+def test_malformed_handles(tmp_path, handle):
+    with pytest.raises(KeyError):
+        ArtifactStore(str(tmp_path)).get(handle)
@@ -0,0 +1,104 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from batch_runner import final_output, read_assets, read_completed, run_asset
+
+INTERRUPT_BEFORE = ["competitive_set", "detailed_development_analysis"]
+
+
+@pytest.mark.parametrize("filename, content", [
+    ("assets.csv", "asset_name,city\nHotel Negresco,Nice\n Hotel de Paris ,Monaco\n,\nHotel Negresco,Nice\n"),
+    ("assets.csv", "name\nHotel Negresco\nHotel de Paris\n"),
+    ("assets.jsonl", '{"asset_name": "Hotel Negresco"}\n\n{"name": "Hotel de Paris"}\n{"name": ""}\n'),
+])
+def test_read_assets(tmp_path, filename, content):
+    path = tmp_path / filename
+    path.write_text(content, encoding="utf-8")
+    assert read_assets(str(path)) == ["Hotel Negresco", "Hotel de Paris"]
+
+
+def test_read_assets_from_an_empty_csv(tmp_path):
+    path = tmp_path / "assets.csv"
+    path.write_text("", encoding="utf-8")
+    assert read_assets(str(path)) == []
+
+
+def test_read_completed(tmp_path):
+    path = tmp_path / "results.jsonl"
+    assert read_completed(str(path)) == set()
+    path.write_text(
+        json.dumps({"asset_name": "Hotel Negresco", "status": "ok"}) + "\n"
+        + json.dumps({"asset_name": "Hotel de Paris", "status": "timeout"}) + "\n"
+        + '{"asset_name": "Hotel du Cap", "sta',
+        encoding="utf-8",
+    )
+    assert read_completed(str(path)) == {"Hotel Negresco"}
+
+
+def test_final_output_merges_the_branch_answers():
+    state = {"messages": [
+        HumanMessage("You need to analyze the hotel Hotel Negresco"),
+        AIMessage("", name="location_assessment", tool_calls=[{"name": "get_coordinates", "args": {}, "id": "1"}]),
+        AIMessage('{"position_analysis": {"context": "urban"}}', name="location_assessment"),
+        AIMessage('Here it is: {"asset_dimensions": {"number_of_rooms": 96}}', name="dimensions_assessment"),
+        AIMessage("not json", name="competitive_set"),
+    ]}
+    result, raw_output = final_output(state)
+    assert result == {"position_analysis": {"context": "urban"}, "asset_dimensions": {"number_of_rooms": 96}}
+    assert raw_output.count("\n\n") == 2
+
+
+FINAL_STATE = {"messages": [AIMessage('{"position_analysis": {"context": "urban"}}', name="location_assessment")]}
+
+
+class FakeGraph:
+    """Graph with a checkpointer whose saved snapshot is `snapshot`."""
+
+    def __init__(self, snapshot=None, delay=0.0):
+        self.checkpointer = object()
+        self.snapshot = snapshot or SimpleNamespace(values={}, next=())
+        self.delay = delay
+        self.calls = []
+
+    async def aget_state(self, config):
+        return self.snapshot
+
+    async def ainvoke(self, inputs, interrupt_before=None, config=None):
+        self.calls.append(inputs)
+        await asyncio.sleep(self.delay)
+        return FINAL_STATE
+
+
+def run(graph, timeout=5):
+    return asyncio.run(run_asset(graph, "Hotel Negresco", timeout, INTERRUPT_BEFORE, 100))
+
+
+def test_new_asset_starts_from_the_prompt():
+    graph = FakeGraph()
+    record = run(graph)
+    [inputs] = graph.calls
+    assert inputs["messages"][0].content.endswith("Hotel Negresco")
+    assert record["status"] == "ok" and record["result"] == {"position_analysis": {"context": "urban"}}
+
+
+def test_interrupted_asset_resumes_from_its_checkpoint():
+    graph = FakeGraph(SimpleNamespace(values=FINAL_STATE, next=("tools_for_location_assessment",)))
+    assert run(graph)["status"] == "ok"
+    assert graph.calls == [None]
+
+
+@pytest.mark.parametrize("next_nodes", [(), tuple(INTERRUPT_BEFORE)])
+def test_finished_asset_is_not_run_again(next_nodes):
+    graph = FakeGraph(SimpleNamespace(values=FINAL_STATE, next=next_nodes))
+    record = run(graph)
+    assert graph.calls == []
+    assert record["result"] == {"position_analysis": {"context": "urban"}}
+
+
+def test_timeout():
+    record = run(FakeGraph(delay=1.0), timeout=0.05)
+    assert record["status"] == "timeout"
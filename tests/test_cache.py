@@ -0,0 +1,119 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import utils.cache
+import utils.geocode_cache as geocode_cache
+from utils.cache import SQLITE_MAX_VARIABLES, PersistentCache
+from utils.geocode_cache import acached_geocode, cached_geocode, normalize_query
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Fake time of the cache, moved forward by the tests."""
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(utils.cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+    assert cache.lookup("nice") == (False, None)
+    cache.set("nice", [{"lat": 43.7, "lng": 7.26}])
+    cache.set("none", None)
+    assert cache.lookup("nice") == (True, [{"lat": 43.7, "lng": 7.26}])
+    # A cached None is a hit
+    assert cache.lookup("none") == (True, None)
+    assert cache.stats() == {"hits": 2, "misses": 1, "hit_rate": 2 / 3, "entries": 2}
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    cache.set("old", 1)
+    clock.now += 30
+    cache.set_many([("recent", 2), ("other", 3)])
+    clock.now += 45
+    assert cache.lookup("old") == (False, None)
+    assert cache.lookup_many(["old", "recent", "other"]) == {"recent": 2, "other": 3}
+    clock.now += 30
+    assert cache.lookup_many(["recent", "other"]) == {}
+    cache.set("new", 4)
+    clock.now += 90
+    assert cache.purge_expired() == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"), max_entries=2)
+    cache.set("a", 1)
+    clock.now += 1
+    cache.set("b", 2)
+    clock.now += 1
+    cache.lookup("a")
+    clock.now += 1
+    cache.set("c", 3)
+    assert cache.lookup_many(["a", "b", "c"]) == {"a": 1, "c": 3}
+    clock.now += 1
+    cache.set_many([("d", 4), ("e", 5)])
+    assert cache.stats()["entries"] == 2
+    assert cache.lookup_many(["a", "c", "d", "e"]) == {"d": 4, "e": 5}
+
+
+def test_lookup_many_over_the_sqlite_variable_limit(tmp_path):
+    cache = PersistentCache(str(tmp_path / "cache.sqlite"))
+    n = 2 * SQLITE_MAX_VARIABLES + 10
+    cache.set_many([(f"k{i}", i) for i in range(0, n, 2)])
+    found = cache.lookup_many([f"k{i}" for i in range(n)] + ["k0"])
+    assert found == {f"k{i}": i for i in range(0, n, 2)}
+    assert (cache.hits, cache.misses) == (n // 2, n // 2)
+
+
+def test_the_cache_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    PersistentCache(path).set("nice", 1)
+    assert PersistentCache(path).lookup("nice") == (True, 1)
+
+
+@pytest.mark.parametrize("query", ["Les Terrasses d’Eze", "  les terrasses  D'EZE ,", "LES TERRASSES D`EZE."])
+def test_normalize_query(query):
+    assert normalize_query(query) == "les terrasses d'eze"
+
+
+class GeocodeClient:
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def geocode(self, query):
+        self.calls.append(query)
+        return self.results
+
+
+class AsyncGeocodeClient(GeocodeClient):
+    async def geocode(self, query):
+        return GeocodeClient.geocode(self, query)
+
+
+@pytest.fixture
+def geocode_store(tmp_path, monkeypatch):
+    cache = PersistentCache(str(tmp_path / "geocode.sqlite"))
+    monkeypatch.setattr(geocode_cache, "get_geocode_cache", lambda: cache)
+    return cache
+
+
+def test_geocode_results_are_cached(geocode_store):
+    client = GeocodeClient([{"geometry": {"location": {"lat": 43.73, "lng": 7.36}}}])
+    first = cached_geocode(client, "Les Terrasses d’Eze")
+    assert cached_geocode(client, "les terrasses d'eze") == first
+    assert asyncio.run(acached_geocode(AsyncGeocodeClient([]), "LES TERRASSES D'EZE")) == first
+    assert client.calls == ["Les Terrasses d’Eze"]
+
+
+def test_empty_geocode_results_are_not_cached(geocode_store):
+    client = GeocodeClient([])
+    assert cached_geocode(client, "Hotel Nowhere") == []
+    assert asyncio.run(acached_geocode(AsyncGeocodeClient([]), "Hotel Nowhere")) == []
+    cached_geocode(client, "Hotel Nowhere")
+    assert client.calls == ["Hotel Nowhere", "Hotel Nowhere"]
+    assert geocode_store.stats()["entries"] == 0
@@ -0,0 +1,72 @@
+import pytest
+
+from utils.comp_scoring import DEFAULT_WEIGHTS, score_candidates, subject_from_state
+
+SUBJECT = subject_from_state(
+    {"hotel_coordinates": {"latitude": 43.7283, "longitude": 7.3617}, "context": "isolated", "accessibility": "coastal, sea view"},
+    {
+        "number_of_rooms": {"value": "87"},
+        "total_surface_area_sqm": {"value": "12,000"},
+        "main_amenities": [{"amenity": "spa"}, {"amenity": "pool"}, {"amenity": "restaurant"}],
+    },
+)
+TWIN = {
+    "name": "Twin", "distance_km": 3, "stars": 5, "number_of_rooms": 90, "total_surface_area_sqm": 11000,
+    "amenities": ["spa", "pool", "restaurant"], "context": "secluded coastal",
+}
+CITY_HOTEL = {
+    "name": "City hotel", "distance_km": 20, "stars": 4, "number_of_rooms": 300, "total_surface_area_sqm": 40000,
+    "amenities": ["restaurant", "meeting rooms"], "context": "downtown",
+}
+MID = {**CITY_HOTEL, "name": "Mid", "number_of_rooms": 120, "stars": 5}
+
+
+def names(ranked):
+    return [hotel["name"] for hotel in ranked]
+
+
+def test_ranking():
+    ranked = score_candidates(SUBJECT, [CITY_HOTEL, MID, TWIN])
+    assert names(ranked) == ["Twin", "Mid", "City hotel"]
+    twin = ranked[0]
+    assert twin["score"] > 85 and twin["coverage"] == 1.0
+    assert sum(twin["contributions"].values()) == pytest.approx(twin["score"], abs=0.5)
+    assert names(score_candidates(SUBJECT, [CITY_HOTEL, MID, TWIN], top_k=1)) == ["Twin"]
+
+
+def test_weight_overrides():
+    near = {**CITY_HOTEL, "name": "Near", "distance_km": 0.5}
+    far_twin = {**TWIN, "name": "Far twin", "distance_km": 150}
+    assert names(score_candidates(SUBJECT, [near, far_twin])) == ["Far twin", "Near"]
+    only_distance = {feature: 0.0 for feature in DEFAULT_WEIGHTS} | {"distance": 1.0}
+    ranked = score_candidates(SUBJECT, [near, far_twin], weights=only_distance)
+    assert names(ranked) == ["Near", "Far twin"]
+    assert ranked[0]["score"] == pytest.approx(98.0, abs=0.5)
+
+
+def test_invalid_weights():
+    with pytest.raises(ValueError, match="Unknown features"):
+        score_candidates(SUBJECT, [TWIN], weights={"price": 1.0})
+    with pytest.raises(ValueError):
+        score_candidates(SUBJECT, [TWIN], weights={feature: 0.0 for feature in DEFAULT_WEIGHTS})
+
+
+def test_sparse_records_do_not_outrank_known_matches():
+    sparse = {"name": "Sparse", "distance_km": 0.5}
+    near_perfect = {**TWIN, "name": "Near perfect", "stars": None}
+    ranked = score_candidates(SUBJECT, [sparse, near_perfect])
+    assert names(ranked) == ["Near perfect", "Sparse"]
+    sparse_result = ranked[1]
+    assert sparse_result["coverage"] == 0.2
+    assert list(sparse_result["contributions"]) == ["distance"]
+    assert 50 < sparse_result["score"] < 70
+
+
+def test_distance_from_coordinates():
+    hotel = {"name": "Nice", "latitude": 43.7102, "longitude": 7.2620}
+    [ranked] = score_candidates(SUBJECT, [hotel])
+    assert "distance" in ranked["contributions"]
+
+
+def test_no_candidates():
+    assert score_candidates(SUBJECT, []) == []
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+
+import utils.distance_matrix as distance_matrix
+from utils.cache import PersistentCache
+from utils.distance_matrix import (
+    MAX_ELEMENTS_PER_REQUEST,
+    MAX_LOCATIONS_PER_SIDE,
+    abatched_distance_matrix,
+    batched_distance_matrix,
+    plan_chunks,
+    to_latlng,
+)
+from utils.route_cache import RouteCache
+
+
+def points(n, offset=0.0):
+    # About 1 km apart, so every point has its own geohash cell
+    return [(43.0 + offset + i * 0.01, 7.0) for i in range(n)]
+
+
+def distance(origin, destination):
+    return round(abs(origin[0] - destination[0]) * 111_000 + 1000)
+
+
+def response(origins, destinations, status="OK"):
+    return {
+        "status": "OK",
+        "rows": [
+            {"elements": [
+                {"status": status, "distance": {"value": distance(o, d)}, "duration": {"value": 60}} for d in destinations
+            ]}
+            for o in origins
+        ],
+    }
+
+
+class FakeClient:
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    def distance_matrix(self, origins, destinations, mode):
+        self.calls.append((len(origins), len(destinations)))
+        if self.fail:
+            raise TimeoutError("no answer")
+        return response(origins, destinations)
+
+
+class AsyncFakeClient(FakeClient):
+    async def distance_matrix(self, origins, destinations, mode):
+        return FakeClient.distance_matrix(self, origins, destinations, mode)
+
+
+@pytest.fixture
+def route_cache(tmp_path, monkeypatch):
+    cache = RouteCache(PersistentCache(str(tmp_path / "routes.sqlite")))
+    monkeypatch.setattr(distance_matrix, "get_route_cache", lambda: cache)
+    return cache
+
+
+def check_grid(grid, origins, destinations):
+    assert len(grid) == len(origins) and all(len(row) == len(destinations) for row in grid)
+    for origin, row in zip(origins, grid):
+        for destination, element in zip(destinations, row):
+            assert element["status"] == "OK"
+            assert element["distance_meters"] == distance(origin, destination)
+
+
+def test_to_latlng():
+    assert to_latlng({"latitude": 1, "longitude": 2}) == to_latlng({"lat": 1, "lng": 2}) == to_latlng([1, 2]) == (1.0, 2.0)
+    with pytest.raises(ValueError):
+        to_latlng({"x": 1})
+
+
+@pytest.mark.parametrize("n_origins, n_destinations", [(1, 1), (4, 25), (25, 25), (30, 7), (3, 60), (0, 5)])
+def test_plan_chunks_respects_the_limits_and_covers_the_matrix(n_origins, n_destinations):
+    chunks = plan_chunks(n_origins, n_destinations)
+    covered = set()
+    for o_start, o_end, d_start, d_end in chunks:
+        assert o_end - o_start <= MAX_LOCATIONS_PER_SIDE and d_end - d_start <= MAX_LOCATIONS_PER_SIDE
+        assert (o_end - o_start) * (d_end - d_start) <= MAX_ELEMENTS_PER_REQUEST
+        cells = {(i, j) for i in range(o_start, o_end) for j in range(d_start, d_end)}
+        assert not cells & covered
+        covered |= cells
+    assert len(covered) == n_origins * n_destinations
+
+
+def test_25_by_25_matrix(route_cache):
+    client = FakeClient()
+    origins, destinations = points(25), points(25, offset=1.0)
+    grid = batched_distance_matrix(client, origins, destinations)
+    check_grid(grid, origins, destinations)
+    # 100 elements per request: 4 origins x 25 destinations
+    assert len(client.calls) == 7
+    assert all(o * d <= MAX_ELEMENTS_PER_REQUEST for o, d in client.calls)
+
+
+def test_cached_cells_are_not_requested_again(route_cache):
+    origins, destinations = points(3), points(4, offset=1.0)
+    batched_distance_matrix(FakeClient(), origins, destinations[1:])
+
+    # Only the new destination (first column) is requested, and merged back in place
+    client = FakeClient()
+    grid = batched_distance_matrix(client, origins, destinations)
+    check_grid(grid, origins, destinations)
+    assert client.calls == [(3, 1)]
+
+    # Same in the async version with a new origin (last row)
+    client = AsyncFakeClient()
+    grid = asyncio.run(abatched_distance_matrix(client, points(4), destinations))
+    check_grid(grid, points(4), destinations)
+    assert client.calls == [(1, 4)]
+
+
+def test_failed_requests_keep_the_grid_aligned(route_cache):
+    grid = batched_distance_matrix(FakeClient(fail=True), points(2), points(3, offset=1.0))
+    assert [len(row) for row in grid] == [3, 3]
+    assert all(element["status"] == "REQUEST_FAILED" and "TimeoutError" in element["error"] for row in grid for element in row)
+    # Failures are not cached
+    assert route_cache.lookup_many([(o, d) for o in points(2) for d in points(3, offset=1.0)], "driving") == {}
+
+
+def test_async_matches_sync(route_cache):
+    origins, destinations = points(6), points(30, offset=1.0)
+    client = AsyncFakeClient()
+    grid = asyncio.run(abatched_distance_matrix(client, origins, destinations, use_cache=False))
+    check_grid(grid, origins, destinations)
+    assert sum(o * d for o, d in client.calls) == 6 * 30
@@ -0,0 +1,75 @@
+import pytest
+
+from utils.evidence import bm25_scores, extract_candidates, extract_evidence
+
+SNIPPETS = [
+    {
+        "link": "https://www.chateaueza.com/en/hotel",
+        "snippet": "Perched above the Mediterranean, the hotel has 87 rooms and suites, a spa with indoor pool "
+                   "and a panoramic terrace. In 2019 rooms were fully renovated.",
+    },
+    {
+        "link": "https://www.booking.com/hotel/fr/eze.html",
+        "snippet": "Double rooms from 350 per room per night. Prices: 250 euro per room with breakfast. "
+                   "87 rooms, free WiFi, bar and fitness center.",
+    },
+    {
+        "link": "https://en.wikipedia.org/wiki/Eze_hotel",
+        "snippet": "Built in 1890, the 120-room hotel was extended since 1995; the estate covers 12,000 square meters "
+                   "of gardens.",
+    },
+    {
+        "link": "https://www.tripadvisor.com/eze",
+        "snippet": "Guests praise the view over the bay and the Michelin-starred restaurant.",
+    },
+]
+
+
+@pytest.mark.parametrize("text", [
+    "In 2019 rooms were fully renovated",
+    "Prices: 250 euro per room",
+    "Double rooms from 350 per room per night",
+    "Rates start at € 300 rooms included",
+    "Suites at 900 a room",
+    "dal 1995 camere rinnovate",
+])
+def test_rooms_drop_prices_rates_and_years(text):
+    assert extract_candidates("number_of_rooms", text) == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("The hotel has 87 rooms and suites", 87),
+    ("the 120-room hotel", 120),
+    ("L'hotel dispone di 45 camere", 45),
+    ("1,200 guest rooms", 1200),
+])
+def test_rooms_counts(text, expected):
+    assert [c["value"] for c in extract_candidates("number_of_rooms", text)] == [expected]
+
+
+def test_surface_units():
+    assert [c["value"] for c in extract_candidates("total_surface_area_sqm", "the estate covers 12,000 square meters")] == [12000]
+    assert [c["value"] for c in extract_candidates("total_surface_area_sqm", "a 3 hectares park")] == [30000]
+    assert extract_candidates("total_surface_area_sqm", "from 500 euro m2") == []
+
+
+def test_bm25_ranks_the_relevant_snippet_first():
+    scores = bm25_scores("rooms suites", [s["snippet"] for s in SNIPPETS])
+    assert scores[0] == max(scores)
+    assert scores[3] == 0
+
+
+def test_extract_evidence_counts_agreeing_sources():
+    evidence = extract_evidence(SNIPPETS)
+    rooms = evidence["number_of_rooms"]
+    assert rooms[0]["value"] == 87
+    assert rooms[0]["sources"] == 2
+    assert {c["value"] for c in rooms} == {87, 120}
+    assert evidence["total_surface_area_sqm"][0]["value"] == 12000
+    assert evidence["total_surface_area_sqm"][0]["source_url"] == "https://en.wikipedia.org/wiki/Eze_hotel"
+    amenities = {c["value"] for c in evidence["main_amenities"]}
+    assert {"spa", "pool", "restaurant", "terrace"} <= amenities
+
+
+def test_extract_evidence_without_results():
+    assert extract_evidence([], fields=["number_of_rooms"]) == {"number_of_rooms": []}
@@ -0,0 +1,38 @@
+import pytest
+
+from utils.gazetteer import BUNDLED_GAZETTEER, Gazetteer
+
+MACHU_PICCHU = (-13.16, -72.54)
+EZE = (43.7283, 7.3617)
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer.from_csv(BUNDLED_GAZETTEER)
+
+
+def test_nearest_places_in_europe(gazetteer):
+    cities = gazetteer.nearest(*EZE, "city", 2, min_population=20000)
+    assert [city["name"] for city in cities] == ["Monaco", "Nice"]
+    assert all(city["reliable"] for city in cities)
+    [airport] = gazetteer.nearest(*EZE, "airport", 1)
+    assert airport["iata"] == "NCE" and airport["reliable"]
+    assert gazetteer.coverage_warning(*EZE, min_population=20000) is None
+
+
+def test_places_outside_the_coverage_are_flagged(gazetteer):
+    [city] = gazetteer.nearest(*MACHU_PICCHU, "city", 1)
+    assert city["distance_km"] > 400
+    assert not city["reliable"]
+    warning = gazetteer.coverage_warning(*MACHU_PICCHU)
+    assert "Lima" in warning and "get_coordinates" in warning
+
+
+def test_max_distance(gazetteer):
+    assert gazetteer.nearest(*MACHU_PICCHU, "city", 5, max_distance_km=100) == []
+    assert all(city["distance_km"] <= 30 for city in gazetteer.nearest(*EZE, "city", 5, max_distance_km=30))
+
+
+def test_unknown_kind(gazetteer):
+    with pytest.raises(ValueError):
+        gazetteer.nearest(*EZE, "station")
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from utils.geodesy import great_circle_matrix, haversine_matrix, points_to_array, vincenty_matrix
+
+PARIS = (48.8566, 2.3522)
+LONDON = (51.5074, -0.1278)
+NEW_YORK = (40.7128, -74.0060)
+# Vincenty's own test line (Flinders Peak -> Buninyong), 54 972.271 m on the ellipsoid
+FLINDERS_PEAK = (-(37 + 57 / 60 + 3.72030 / 3600), 144 + 25 / 60 + 29.52440 / 3600)
+BUNINYONG = (-(37 + 39 / 60 + 10.15610 / 3600), 143 + 55 / 60 + 35.38390 / 3600)
+
+
+def test_points_to_array():
+    expected = np.array([[43.7, 7.3], [43.8, 7.4]])
+    for points in (
+        [{"latitude": 43.7, "longitude": 7.3}, {"lat": 43.8, "lng": 7.4}],
+        [(43.7, 7.3), (43.8, 7.4)],
+        expected,
+    ):
+        assert np.array_equal(points_to_array(points), expected)
+
+
+def test_haversine_known_distances():
+    distances = haversine_matrix([PARIS, LONDON], [LONDON, NEW_YORK])
+    assert distances.shape == (2, 2)
+    assert distances[0, 0] == pytest.approx(343.6, abs=0.5)
+    assert distances[1, 1] == pytest.approx(5570, rel=0.002)
+    assert haversine_matrix([PARIS], [PARIS])[0, 0] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_vincenty_known_distances():
+    assert vincenty_matrix([FLINDERS_PEAK], [BUNINYONG])[0, 0] == pytest.approx(54.972271, abs=1e-6)
+    # One degree of longitude on the equator
+    assert vincenty_matrix([(0, 0)], [(0, 1)])[0, 0] == pytest.approx(111.319491, abs=1e-6)
+    # Haversine is within about 0.5% of the ellipsoidal distance
+    assert vincenty_matrix([PARIS], [NEW_YORK])[0, 0] == pytest.approx(haversine_matrix([PARIS], [NEW_YORK])[0, 0], rel=0.005)
+
+
+def test_vincenty_falls_back_to_haversine_for_antipodal_points():
+    origins, destinations = [(0.0, 0.0), PARIS], [(0.5, 179.7), LONDON]
+    vincenty, haversine = vincenty_matrix(origins, destinations), haversine_matrix(origins, destinations)
+    assert np.all(np.isfinite(vincenty))
+    assert vincenty[0, 0] == haversine[0, 0]
+    # The other pairs still converge
+    assert vincenty[1, 1] != haversine[1, 1]
+    assert vincenty[1, 1] == pytest.approx(haversine[1, 1], rel=0.005)
+
+
+def test_great_circle_matrix():
+    assert np.array_equal(great_circle_matrix([PARIS], [LONDON]), haversine_matrix([PARIS], [LONDON]))
+    assert np.array_equal(great_circle_matrix([PARIS], [LONDON], "vincenty"), vincenty_matrix([PARIS], [LONDON]))
+    with pytest.raises(ValueError):
+        great_circle_matrix([PARIS], [LONDON], "flat")
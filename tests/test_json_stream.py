@@ -0,0 +1,98 @@
+import pytest
+from pydantic import BaseModel
+
+from utils.json_stream import MalformedOutputError, StreamingJSONParser, extract_json
+
+
+class Dimensions(BaseModel):
+    rooms: int
+    note: str = ""
+
+
+def feed_all(text, chunk_size=None, **kwargs):
+    """Feeds the text at once or in chunks of `chunk_size` characters and closes the parser."""
+    parser = StreamingJSONParser(**kwargs)
+    step = chunk_size or len(text) or 1
+    for start in range(0, len(text), step):
+        parser.feed(text[start:start + step])
+    return parser.close()
+
+
+CHUNK_SIZES = [None, 1, 3]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_prose_before_and_after(chunk_size):
+    text = 'Here is the analysis {for you}:\n{"a": {"b": [1, 2]}, "c": "x"}\nLet me know if you need more.'
+    assert feed_all(text, chunk_size) == {"a": {"b": [1, 2]}, "c": "x"}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_code_fence(chunk_size):
+    text = '```json\n{\n  "position_analysis": {"context": "urban"}\n}\n```'
+    assert feed_all(text, chunk_size) == {"position_analysis": {"context": "urban"}}
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+@pytest.mark.parametrize("text, expected", [
+    ('{"rooms": 87}', {"rooms": 87}),
+    ('{"a": "x", "rooms": 12.5}', {"a": "x", "rooms": 12.5}),
+    ('{"ok": true, "missing": null}', {"ok": True, "missing": None}),
+    ('{"rooms": -3\n}', {"rooms": -3}),
+])
+def test_scalars_at_the_end_of_the_object(text, expected, chunk_size):
+    assert feed_all(text, chunk_size) == expected
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_strings_with_braces_and_escapes(chunk_size):
+    text = '{"summary": "Between {Nice} and [Monaco] \\"}\\" ok", "nested": {"s": "}]{["}}'
+    assert feed_all(text, chunk_size) == {"summary": 'Between {Nice} and [Monaco] "}" ok', "nested": {"s": "}]{["}}
+
+
+def test_keys_are_reported_as_soon_as_they_are_complete():
+    parser = StreamingJSONParser({"dims": Dimensions})
+    assert parser.feed('{"dims": {"rooms": 87') == []
+    assert parser.feed('}, "other"') == ["dims"]
+    assert parser.validated["dims"].rooms == 87
+    assert parser.feed(": 1}") == ["other"]
+    assert parser.done
+
+
+@pytest.mark.parametrize("text", [
+    '{"a": {"b": [1, 2',
+    '{"a": 1, "b": "unfinished',
+    '{"a": 1',
+    '{"a": 1,',
+])
+def test_truncated_stream_raises(text):
+    parser = StreamingJSONParser()
+    parser.feed(text)
+    with pytest.raises(MalformedOutputError, match="truncated"):
+        parser.close()
+
+
+def test_no_object_raises():
+    with pytest.raises(MalformedOutputError, match="no JSON object"):
+        extract_json("I could not find the hotel.")
+
+
+def test_invalid_value_fails_while_streaming():
+    parser = StreamingJSONParser({"dims": Dimensions})
+    with pytest.raises(MalformedOutputError) as error:
+        parser.feed('{"dims": {"rooms": "many"}, "rest": ')
+    assert error.value.key == "dims"
+    assert error.value.partial.endswith('"many"}')
+
+
+def test_structural_errors_fail_early():
+    parser = StreamingJSONParser()
+    with pytest.raises(MalformedOutputError, match="expected ':'"):
+        parser.feed('{"a" 1}')
+    with pytest.raises(MalformedOutputError, match="unexpected"):
+        StreamingJSONParser().feed('{"a": [1, 2}')
+
+
+def test_missing_required_key():
+    with pytest.raises(MalformedOutputError, match="missing keys: dims"):
+        extract_json('{"other": 1}', {"dims": Dimensions})
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration
+
+from utils.llm_cache import LLMCacheMiss, SQLiteLLMCache, cache_key
+
+
+def llm_string(temperature=0.0, endpoint="https://a.example", tools=("get_coordinates",)):
+    config = json.dumps({"kwargs": {"deployment_name": "gpt-4o", "temperature": temperature, "azure_endpoint": endpoint}})
+    return config + "---" + str(sorted({"tools": list(tools), "stop": None}.items()))
+
+
+def prompt(*messages, message_id=None):
+    return dumps([SystemMessage("You assess hotels."), *[HumanMessage(m, id=message_id) for m in messages]])
+
+
+def answer(text="87 rooms"):
+    return [ChatGeneration(message=AIMessage(text))]
+
+
+def test_key_ignores_message_ids_and_endpoint():
+    assert cache_key(prompt("Hotel Negresco", message_id="a"), llm_string()) == cache_key(
+        prompt("Hotel Negresco", message_id="b"), llm_string(endpoint="https://b.example")
+    )
+
+
+@pytest.mark.parametrize("other", [
+    (prompt("Hotel de Paris"), llm_string()),
+    (prompt("Hotel Negresco"), llm_string(temperature=0.7)),
+    (prompt("Hotel Negresco"), llm_string(tools=("get_coordinates", "web_search"))),
+])
+def test_key_changes_with_the_conversation_and_the_settings(other):
+    assert cache_key(prompt("Hotel Negresco"), llm_string()) != cache_key(*other)
+
+
+def test_round_trip_and_stats(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"))
+    assert cache.lookup(prompt("Hotel Negresco"), llm_string()) is None
+    cache.update(prompt("Hotel Negresco"), llm_string(), answer())
+    [generation] = cache.lookup(prompt("Hotel Negresco"), llm_string())
+    assert generation.message.content == "87 rooms"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+
+def test_replay_mode_raises_on_a_miss_and_never_writes(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    SQLiteLLMCache(path).update(prompt("Hotel Negresco"), llm_string(), answer())
+    replay = SQLiteLLMCache(path, strict=True)
+    assert replay.lookup(prompt("Hotel Negresco"), llm_string())[0].message.content == "87 rooms"
+    replay.update(prompt("Hotel de Paris"), llm_string(), answer())
+    with pytest.raises(LLMCacheMiss):
+        replay.lookup(prompt("Hotel de Paris"), llm_string())
+
+
+def test_least_recently_used_answers_are_evicted(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"))
+    cache.update(prompt("a"), llm_string(), answer("x" * 1000))
+    cache.max_bytes = int(2.5 * cache.stats()["bytes"])
+    cache.update(prompt("b"), llm_string(), answer("x" * 1000))
+    assert cache.stats()["entries"] == 2
+    cache.lookup(prompt("a"), llm_string())
+    cache.update(prompt("c"), llm_string(), answer("x" * 1000))
+    assert cache.lookup(prompt("b"), llm_string()) is None
+    assert cache.lookup(prompt("a"), llm_string()) is not None
+    assert cache.lookup(prompt("c"), llm_string()) is not None
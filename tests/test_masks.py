@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from utils.masks import decode_rle, encode_rle, rle_area, rle_bbox, rle_counts
+
+
+def random_mask(seed, shape=(37, 53)):
+    rng = np.random.default_rng(seed)
+    mask = np.zeros(shape, dtype=bool)
+    for _ in range(4):
+        y, x = rng.integers(0, shape[0]), rng.integers(0, shape[1])
+        mask[y:y + rng.integers(1, 15), x:x + rng.integers(1, 20)] = True
+    return mask
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_round_trip(seed):
+    mask = random_mask(seed)
+    rle = encode_rle(mask)
+    assert rle["size"] == list(mask.shape)
+    assert np.array_equal(decode_rle(rle), mask)
+    assert rle_area(rle) == mask.sum()
+
+
+@pytest.mark.parametrize("mask", [
+    np.zeros((4, 5), dtype=bool),
+    np.ones((4, 5), dtype=bool),
+    np.eye(6, dtype=bool),
+])
+def test_edge_masks(mask):
+    rle = encode_rle(mask)
+    assert np.array_equal(decode_rle(rle), mask)
+    # Runs always start with a run of zeros, empty when the first pixel is set
+    assert (rle_counts(rle)[0] == 0) == bool(mask[0, 0])
+    assert sum(rle_counts(rle)) == mask.size
+
+
+def test_counts_are_column_major():
+    mask = np.array([[0, 1], [0, 1]], dtype=bool)
+    assert rle_counts(encode_rle(mask)) == [2, 2]
+    assert rle_counts({"size": [2, 2], "counts": [2, 2]}) == [2, 2]
+
+
+def test_large_counts_survive_the_string_encoding():
+    mask = np.zeros((300, 400), dtype=bool)
+    mask[10:290, 5:395] = True
+    rle = encode_rle(mask)
+    assert isinstance(rle["counts"], str)
+    assert np.array_equal(decode_rle(rle), mask)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_bbox_matches_the_decoded_mask(seed):
+    mask = random_mask(seed)
+    rows, cols = np.nonzero(mask)
+    expected = [cols.min(), rows.min(), cols.max(), rows.max()]
+    assert rle_bbox(encode_rle(mask)) == expected
+
+
+def test_bbox_of_a_run_wrapping_columns():
+    mask = np.zeros((5, 3), dtype=bool)
+    mask[3:, 0] = True
+    mask[:2, 1] = True
+    assert rle_bbox(encode_rle(mask)) == [0, 0, 1, 4]
+
+
+def test_bbox_of_an_empty_mask():
+    assert rle_bbox(encode_rle(np.zeros((3, 3), dtype=bool))) is None
@@ -0,0 +1,57 @@
+import pytest
+
+from utils.cache import PersistentCache
+from utils.route_cache import RouteCache, geohash
+
+NICE = (43.7102, 7.2620)
+MONACO = (43.7384, 7.4246)
+AIRPORT = (43.6584, 7.2159)
+OK = {"status": "OK", "distance": {"value": 21000}, "duration": {"value": 1800}}
+
+
+@pytest.mark.parametrize("latitude, longitude, precision, expected", [
+    (43.7283, 7.3617, 7, "spv0z82"),
+    (57.64911, 10.40744, 11, "u4pruydqqvj"),
+    (-25.382708, -49.265506, 5, "6gkzw"),
+])
+def test_geohash(latitude, longitude, precision, expected):
+    assert geohash(latitude, longitude, precision) == expected
+
+
+def test_geohash_prefixes_nest():
+    assert geohash(*NICE, 9).startswith(geohash(*NICE, 5))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return PersistentCache(str(tmp_path / "routes.sqlite"))
+
+
+def test_nearby_points_share_a_route(store):
+    cache = RouteCache(store, precision=7)
+    cache.set(NICE, MONACO, "driving", OK)
+    # A few metres away, in the same 150 m cell
+    assert cache.lookup((43.71025, 7.26205), MONACO, "driving") == (True, OK)
+    assert cache.lookup(NICE, MONACO, "walking") == (False, None)
+
+
+def test_failed_elements_are_not_stored(store):
+    cache = RouteCache(store)
+    cache.set(NICE, MONACO, "driving", {"status": "ZERO_RESULTS"})
+    cache.set_many([(NICE, AIRPORT, {"status": "NOT_FOUND"}), (MONACO, AIRPORT, None)], "driving")
+    assert cache.lookup(NICE, MONACO, "driving")[0] is False
+    assert cache.lookup_many([(NICE, MONACO), (NICE, AIRPORT)], "driving") == {}
+
+
+def test_lookup_many(store):
+    cache = RouteCache(store)
+    cache.set_many([(NICE, MONACO, OK), (NICE, AIRPORT, OK)], "driving")
+    pairs = [(NICE, MONACO), (MONACO, NICE), (NICE, AIRPORT)]
+    assert cache.lookup_many(pairs, "driving") == {(NICE, MONACO): OK, (NICE, AIRPORT): OK}
+
+
+def test_symmetric_cache_uses_the_reverse_route(store):
+    cache = RouteCache(store, symmetric=True)
+    cache.set(NICE, MONACO, "driving", OK)
+    assert cache.lookup(MONACO, NICE, "driving") == (True, OK)
+    assert cache.lookup_many([(MONACO, NICE)], "driving") == {(MONACO, NICE): OK}
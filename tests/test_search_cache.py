@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+import utils.search_cache as search_cache
+from utils.cache import PersistentCache
+from utils.search_cache import acached_search, cached_search, normalize_search_query
+
+RESULTS = [{"snippet": "Les Terrasses d'Eze offers 87 rooms", "link": "https://example.com"}]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    cache = PersistentCache(str(tmp_path / "search.sqlite"))
+    monkeypatch.setattr(search_cache, "get_search_cache", lambda: cache)
+    return cache
+
+
+class Fetch:
+    def __init__(self, results):
+        self.results = results
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        return self.results
+
+    async def coroutine(self, query):
+        return self(query)
+
+
+def test_normalize_search_query():
+    assert normalize_search_query('  "Les Terrasses d’Eze"   Number of rooms? ') == "les terrasses d'eze number of rooms"
+
+
+def test_results_are_cached_per_namespace(store):
+    fetch = Fetch(RESULTS)
+    assert cached_search("Les Terrasses d’Eze rooms", fetch, namespace="google|en") == RESULTS
+    assert cached_search('"les terrasses d\'eze" rooms?', fetch, namespace="google|en") == RESULTS
+    assert asyncio.run(acached_search("Les Terrasses d'Eze rooms", Fetch([]).coroutine, namespace="google|en")) == RESULTS
+    assert len(fetch.queries) == 1
+    cached_search("Les Terrasses d’Eze rooms", fetch, namespace="google|fr")
+    assert len(fetch.queries) == 2
+
+
+def test_empty_and_failed_searches_are_not_cached(store):
+    fetch = Fetch([])
+    assert cached_search("Hotel Nowhere rooms", fetch) == []
+    assert asyncio.run(acached_search("Hotel Nowhere rooms", fetch.coroutine)) == []
+    assert len(fetch.queries) == 2
+
+    def fail(query):
+        raise RuntimeError("SerpAPI error: Invalid API key")
+
+    with pytest.raises(RuntimeError):
+        cached_search("Hotel Nowhere spa", fail)
+    assert store.stats()["entries"] == 0
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from utils.geodesy import haversine_matrix
+from utils.spatial_index import GridIndex
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(0)
+    latitude = np.degrees(np.arcsin(rng.uniform(-1, 1, 3000)))
+    longitude = rng.uniform(-180, 180, 3000)
+    return latitude, longitude
+
+
+def brute_force(points, latitude, longitude):
+    return haversine_matrix(np.array([[latitude, longitude]]), np.column_stack(points))[0]
+
+
+QUERIES = [(43.7, 7.3), (-13.16, -72.54), (0.0, 179.9), (65.0, -179.95), (89.5, 20.0), (-89.9, -100.0)]
+
+
+@pytest.mark.parametrize("latitude, longitude", QUERIES)
+def test_nearest_matches_brute_force(points, latitude, longitude):
+    index = GridIndex(*points, cell_deg=1.0)
+    positions, distances = index.query(latitude, longitude, top_k=10)
+    expected = np.sort(brute_force(points, latitude, longitude))[:10]
+    assert np.allclose(distances, expected)
+    assert np.allclose(brute_force(points, latitude, longitude)[index.order[positions]], distances)
+
+
+@pytest.mark.parametrize("latitude, longitude", QUERIES)
+def test_radius_matches_brute_force(points, latitude, longitude):
+    index = GridIndex(*points, cell_deg=0.5)
+    positions, distances = index.query(latitude, longitude, radius_km=800)
+    expected = brute_force(points, latitude, longitude)
+    assert sorted(index.order[positions]) == sorted(np.flatnonzero(expected <= 800))
+    assert np.all(np.diff(distances) >= 0)
+
+
+def test_radius_and_top_k(points):
+    index = GridIndex(*points)
+    positions, distances = index.query(43.7, 7.3, radius_km=300, top_k=1000)
+    assert len(positions) == np.count_nonzero(brute_force(points, 43.7, 7.3) <= 300)
+    assert distances.max() <= 300
+
+
+def test_mask(points):
+    index = GridIndex(*points)
+    even = index.order % 2 == 0
+    positions, _ = index.query(43.7, 7.3, top_k=5, mask=lambda candidates: even[candidates])
+    assert len(positions) == 5
+    assert np.all(index.order[positions] % 2 == 0)
+
+
+def test_longitudes_are_wrapped():
+    index = GridIndex([10.0], [190.0])
+    positions, distances = index.query(10.0, -170.0, top_k=1)
+    assert distances[0] == pytest.approx(0.0, abs=1e-6)
+
+
+def test_query_needs_a_radius_or_top_k(points):
+    with pytest.raises(ValueError):
+        GridIndex(*points).query(0.0, 0.0)
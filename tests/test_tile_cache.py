@@ -0,0 +1,51 @@
+import asyncio
+import os
+import threading
+
+import numpy as np
+
+import utils.tile_cache as tile_cache
+from utils.tile_cache import TileCache
+
+TILE = np.arange(4 * 4 * 3, dtype=np.uint8).reshape(4, 4, 3)
+
+
+def test_round_trip(tmp_path):
+    cache = TileCache(str(tmp_path))
+    key = cache.key(7.3617, 43.7283, 18, 512)
+    assert key == cache.key(7.36170001, 43.72830001, 18, 512)
+    assert cache.get(key) is None
+    stored = cache.put(key, TILE)
+    assert isinstance(stored, np.memmap)
+    assert np.array_equal(cache.get(key), TILE)
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_tiles_are_evicted(tmp_path):
+    size = TILE.nbytes + 128
+    cache = TileCache(str(tmp_path), max_bytes=int(2.5 * size))
+    keys = [cache.key(i, 0, 18, 512) for i in range(3)]
+    for i, key in enumerate(keys[:2]):
+        cache.put(key, TILE)
+        os.utime(cache._path(key), (i, i))
+    cache.get(keys[0])
+    cache.put(keys[2], TILE)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_async_cache_access_runs_off_the_event_loop(tmp_path, monkeypatch):
+    cache = TileCache(str(tmp_path))
+    cache.put(cache.key(7.3617, 43.7283, 18, 512), TILE)
+    monkeypatch.setattr(tile_cache, "_tile_cache", cache)
+    threads = []
+    original_get = TileCache.get
+
+    def get(self, key):
+        threads.append(threading.current_thread())
+        return original_get(self, key)
+
+    monkeypatch.setattr(TileCache, "get", get)
+    tile = asyncio.run(tile_cache.aget_satellite_tile(43.7283, 7.3617, 18, 512))
+    assert np.array_equal(tile, TILE)
+    assert threads and threads[0] is not threading.main_thread()
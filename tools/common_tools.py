@@ -1,13 +1,23 @@
-import requests
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 from langchain_core.tools import tool
 
+from utils.http_pool import get_session, get_async_client, HTTP_TIMEOUT
+from utils.search_cache import cached_search, acached_search, normalize_search_query
+from utils.evidence import extract_evidence
+
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
 
 SERP_API_KEY = os.getenv("SERP_API_KEY")
+SERPAPI_URL = "https://serpapi.com/search.json"
+SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "4"))
+# Default queries of search_asset_evidence, appended to the hotel name
+EVIDENCE_QUERY_SUFFIXES = ["number of rooms", "total surface area sqm", "amenities spa pool restaurant"]
 
 
 @tool
@@ -29,18 +39,180 @@ def web_search(query: str) -> str:
         You need to set your SerpAPI key in the SERPAPI_KEY variable.
         Get a free key at https://serpapi.com/.
     """
-    SERPAPI_KEY = SERP_API_KEY 
-    url = "https://serpapi.com/search.json"
-    params = {
+    return cached_search(query, _fetch_search, namespace=_search_namespace())
+
+
+async def aweb_search(query: str) -> list:
+    """Async version of `web_search`, using the shared httpx connection pool."""
+    return await acached_search(query, _afetch_search, namespace=_search_namespace())
+
+web_search.coroutine = aweb_search
+
+
+@tool
+def web_search_batch(queries: list[str]) -> dict:
+    """
+    Runs several Google web searches at once (e.g. rooms, surface area and amenities of the same hotel)
+    and returns their results merged, one entry per URL.
+
+    Args:
+        queries (list[str]): The search queries, e.g. ["Les Terrasses d’Eze number of rooms", "Les Terrasses d’Eze spa pool"].
+
+    Returns:
+        dict: A dictionary containing:
+            - results (list[dict]): One entry per URL with 'link', 'snippet' (distinct snippets joined with " ... ")
+              and 'queries' (the queries that returned it). The top results of every query come first.
+            - failed_queries (dict): Query -> error message, for the searches that failed.
+
+    Usage Example:
+        web_search_batch(["Hotel du Cap-Eden-Roc number of rooms", "Hotel du Cap-Eden-Roc surface sqm"])
+    """
+    queries = _unique_queries(queries)
+    with ThreadPoolExecutor(max_workers=min(SEARCH_MAX_WORKERS, len(queries) or 1)) as executor:
+        futures = [executor.submit(web_search.func, query) for query in queries]
+        outcomes = []
+        for query, future in zip(queries, futures):
+            try:
+                outcomes.append((query, future.result()))
+            except Exception as e:
+                outcomes.append((query, e))
+    return _merge_results(outcomes)
+
+
+async def aweb_search_batch(queries: list[str]) -> dict:
+    """Async version of `web_search_batch`."""
+    queries = _unique_queries(queries)
+    results = await asyncio.gather(*(_asearch(query) for query in queries), return_exceptions=True)
+    return _merge_results(list(zip(queries, results)))
+
+
+async def _asearch(query: str) -> list:
+    # Through the `web_search` tool, like the sync batch, so replacing its implementation covers both
+    if web_search.coroutine is not None:
+        return await web_search.coroutine(query)
+    return await asyncio.to_thread(web_search.func, query)
+
+web_search_batch.coroutine = aweb_search_batch
+
+
+@tool
+def search_asset_evidence(hotel_name: str, queries: Optional[list[str]] = None, top_k: int = 3) -> dict:
+    """
+    Searches the web for the number of rooms, the total surface area and the amenities of a hotel and
+    returns only the best evidence for each of them, instead of every snippet.
+
+    Snippets are ranked against each field and the values found in them (room counts, m²/sqm, amenities)
+    are returned with the number of sources that agree and the source url.
+
+    Args:
+        hotel_name (str): Name of the hotel, e.g. "Les Terrasses d’Eze".
+        queries (list[str], optional): Custom search queries. By default: "<hotel_name> number of rooms",
+            "<hotel_name> total surface area sqm" and "<hotel_name> amenities spa pool restaurant".
+        top_k (int): Maximum number of candidate values per field.
+
+    Returns:
+        dict: A dictionary containing:
+            - evidence (dict): For "number_of_rooms", "total_surface_area_sqm" and "main_amenities", a list of
+              {"value", "unit", "sources", "source_url", "text", "score"}, best first.
+            - results_searched (int): Number of distinct results that were analyzed.
+            - failed_queries (dict): Query -> error message, for the searches that failed.
+
+    Usage Example:
+        search_asset_evidence("Hotel du Cap-Eden-Roc")
+    """
+    merged = web_search_batch.func(queries or _evidence_queries(hotel_name))
+    return _evidence(merged, top_k)
+
+
+async def asearch_asset_evidence(hotel_name: str, queries: Optional[list[str]] = None, top_k: int = 3) -> dict:
+    """Async version of `search_asset_evidence`."""
+    merged = await aweb_search_batch(queries or _evidence_queries(hotel_name))
+    return _evidence(merged, top_k)
+
+search_asset_evidence.coroutine = asearch_asset_evidence
+
+
+def _evidence_queries(hotel_name: str) -> list:
+    return [f"{hotel_name} {suffix}" for suffix in EVIDENCE_QUERY_SUFFIXES]
+
+
+def _evidence(merged: dict, top_k: int) -> dict:
+    return {
+        "evidence": extract_evidence(merged["results"], top_k=top_k),
+        "results_searched": len(merged["results"]),
+        "failed_queries": merged["failed_queries"],
+    }
+
+
+def _fetch_search(query: str) -> list:
+    response = get_session().get(SERPAPI_URL, params=_serpapi_params(query), timeout=HTTP_TIMEOUT)
+    response.raise_for_status()
+    return _organic_snippets(response.json())
+
+
+async def _afetch_search(query: str) -> list:
+    response = await get_async_client().get(SERPAPI_URL, params=_serpapi_params(query))
+    response.raise_for_status()
+    return _organic_snippets(response.json())
+
+
+def _search_namespace() -> str:
+    params = _serpapi_params("")
+    return f"{params['engine']}:{params['hl']}:{params['num']}"
+
+
+def _unique_queries(queries: list) -> list:
+    # Queries that only differ in case, spacing or quotes are searched once
+    unique = {}
+    for query in queries:
+        unique.setdefault(normalize_search_query(query), query)
+    return list(unique.values())
+
+
+def _merge_results(outcomes: list) -> dict:
+    """Merges the results of several queries by URL, interleaving the queries rank by rank."""
+    merged, failed = {}, {}
+    ranked = []
+    for query, results in outcomes:
+        if isinstance(results, Exception):
+            failed[query] = f"{type(results).__name__}: {results}"
+        else:
+            ranked.append((query, results))
+    depth = max((len(results) for _, results in ranked), default=0)
+    for rank in range(depth):
+        for query, results in ranked:
+            if rank >= len(results):
+                continue
+            result = results[rank]
+            key = result.get("link") or result["snippet"]
+            entry = merged.setdefault(key, {"link": result.get("link"), "snippets": [], "queries": []})
+            if result["snippet"] not in entry["snippets"]:
+                entry["snippets"].append(result["snippet"])
+            if query not in entry["queries"]:
+                entry["queries"].append(query)
+    return {
+        "results": [
+            {"link": entry["link"], "snippet": " ... ".join(entry["snippets"]), "queries": entry["queries"]}
+            for entry in merged.values()
+        ],
+        "failed_queries": failed,
+    }
+
+
+def _serpapi_params(query: str) -> dict:
+    return {
         "q": query,
         "engine": "google",
-        "api_key": SERPAPI_KEY,
+        "api_key": SERP_API_KEY,
         "num": 10,
         "hl": "it"
     }
-    response = requests.get(url, params=params)
-    response.raise_for_status()
-    data = response.json()
+
+
+def _organic_snippets(data: dict) -> list:
+    # SerpAPI reports errors (quota, invalid key...) in an HTTP 200 body
+    if data.get("error"):
+        raise RuntimeError(f"SerpAPI error: {data['error']}")
     results = []
     for res in data.get("organic_results", []):
         if "snippet" in res:
@@ -49,4 +221,3 @@ def web_search(query: str) -> str:
                 "link": res.get("link")
             })
     return results
-
@@ -1,18 +1,16 @@
 from langchain_core.tools import tool
+import asyncio
 import os
-import requests
-from PIL import Image
-from io import BytesIO
 import math
-import numpy as np
-from langchain.agents import Tool
 from langgraph.prebuilt import ToolNode
-import base64
-from segment_anything import sam_model_registry, SamPredictor
-
-import googlemaps
-API_KEY = os.getenv("GOOGLE_API_KEY")
-gmaps = googlemaps.Client(key=API_KEY)
+from typing import Annotated, Optional, Union
+from langgraph.prebuilt import InjectedState
+
+# NumPy, PIL, torch and segment_anything are imported by the tools that need them,
+# so importing this module stays cheap
+from utils.geocode_cache import cached_geocode, acached_geocode
+from utils.distance_matrix import batched_distance_matrix, abatched_distance_matrix
+from utils.maps_client import get_maps_client, get_async_maps_client
 MAPBOX_TOKEN = os.getenv("MAPBOX_TOKEN")
 
 
@@ -34,28 +32,51 @@ def get_coordinates(poi_name:str) -> dict:
     """
 
     search_query = f"{poi_name}"
-    geocode_result = gmaps.geocode(search_query)
+    geocode_result = cached_geocode(get_maps_client(), search_query)
+    if geocode_result:
+        location = geocode_result[0]['geometry']['location']
+        return {'latitude': location['lat'], 'longitude': location['lng']}
+    return None
+
+
+async def aget_coordinates(poi_name: str) -> dict:
+    """Async version of `get_coordinates`, sharing the geocode cache and the HTTP connection pool."""
+    geocode_result = await acached_geocode(get_async_maps_client(), poi_name)
     if geocode_result:
         location = geocode_result[0]['geometry']['location']
         return {'latitude': location['lat'], 'longitude': location['lng']}
     return None
 
+get_coordinates.coroutine = aget_coordinates
+
 @tool
-def calculate_distance_to_city_centers(asset_coords:dict, city_coords_list:list):
-    """Calculate distances from asset coordinates to a list of city center coordinates.
+def calculate_distance_to_city_centers(asset_coords:dict, city_coords_list:list) -> list[dict]:
+    """Calculate driving distances from asset coordinates to a list of city center coordinates with a single batched request.
         
     Args:
         asset_coords: A dictionary containing latitude and longitude of the hotel.
-        city_coords_list: A list of dictionaries, each containing latitude and longitude of a city center.
-    
+        city_coords_list: A list of dictionaries, each containing latitude and longitude of a city center (and optionally its "name").
+
+    Returns:
+        A list aligned with city_coords_list. Each item contains index, name, status ("OK" or the Google Maps error),
+        distance_km and duration_seconds (null when the status is not "OK").
     """
-    distances = []
-    for city_coords in city_coords_list:
-        distance_result = gmaps.distance_matrix(asset_coords, city_coords)
-        if distance_result['rows'][0]['elements'][0]['status'] == 'OK':
-            distance = distance_result['rows'][0]['elements'][0]['distance']['value'] / 1000  # Convert to km
-            distances.append(distance)
-    return distances
+    row = batched_distance_matrix(get_maps_client(), [asset_coords], city_coords_list)[0] if city_coords_list else []
+    return [
+        {"index": i, "name": city_coords.get("name") if isinstance(city_coords, dict) else None, **element}
+        for i, (city_coords, element) in enumerate(zip(city_coords_list, row))
+    ]
+
+
+async def acalculate_distance_to_city_centers(asset_coords: dict, city_coords_list: list) -> list[dict]:
+    """Async version of `calculate_distance_to_city_centers`."""
+    row = (await abatched_distance_matrix(get_async_maps_client(), [asset_coords], city_coords_list))[0] if city_coords_list else []
+    return [
+        {"index": i, "name": city_coords.get("name") if isinstance(city_coords, dict) else None, **element}
+        for i, (city_coords, element) in enumerate(zip(city_coords_list, row))
+    ]
+
+calculate_distance_to_city_centers.coroutine = acalculate_distance_to_city_centers
 
 @tool
 def get_distance_between_coordinates(point1: dict, point2: dict) -> dict:
@@ -72,25 +93,31 @@ def get_distance_between_coordinates(point1: dict, point2: dict) -> dict:
             - duration_seconds (float): Estimated travel time in seconds.
     """
 
-    origins = (point1["latitude"], point1["longitude"])
-    destinations = (point2["latitude"], point2["longitude"])
+    element = batched_distance_matrix(get_maps_client(), [point1], [point2], mode="driving")[0][0]
+    if element["status"] != "OK":
+        raise RuntimeError(f"Failed to retrieve distance information from Google Maps: {element['status']}")
 
-    result = gmaps.distance_matrix(origins=[origins], destinations=[destinations], mode="driving")
+    return {
+        "distance_meters": element["distance_meters"],
+        "duration_seconds": element["duration_seconds"]
+    }
 
-    try:
-        element = result["rows"][0]["elements"][0]
-        distance_meters = element["distance"]["value"]
-        duration_seconds = element["duration"]["value"]
-    except (KeyError, IndexError):
-        raise RuntimeError("Failed to retrieve distance information from Google Maps.")
+
+async def aget_distance_between_coordinates(point1: dict, point2: dict) -> dict:
+    """Async version of `get_distance_between_coordinates`."""
+    element = (await abatched_distance_matrix(get_async_maps_client(), [point1], [point2], mode="driving"))[0][0]
+    if element["status"] != "OK":
+        raise RuntimeError(f"Failed to retrieve distance information from Google Maps: {element['status']}")
 
     return {
-        "distance_meters": distance_meters,
-        "duration_seconds": duration_seconds
+        "distance_meters": element["distance_meters"],
+        "duration_seconds": element["duration_seconds"]
     }
 
+get_distance_between_coordinates.coroutine = aget_distance_between_coordinates
+
 @tool
-def download_satellite_image(latitude: float, longitude: float, zoom: int = 18, image_size: int = 512) -> Image.Image:
+def download_satellite_image(latitude: float, longitude: float, zoom: int = 18, image_size: int = 512) -> dict:
     """
     Downloads a satellite image centered at the given coordinates.
 
@@ -101,13 +128,35 @@ def download_satellite_image(latitude: float, longitude: float, zoom: int = 18,
         image_size (int): Size of the image in pixels (default: 512x512).
 
     Returns:
-        PIL.Image.Image: A satellite image centered at the specified location.
+        dict: A dictionary containing:
+            - image_ref (str): Handle of the satellite image centered at the specified location. Pass it to `segment_building`.
+            - width (int), height (int): Size of the image in pixels.
+            Tiles are cached on disk, so the same location is only downloaded once.
     """
-    url = f"https://api.mapbox.com/styles/v1/mapbox/satellite-v9/static/{longitude},{latitude},{zoom}/{image_size}x{image_size}?access_token={MAPBOX_TOKEN}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise RuntimeError(f"Failed to download image: {response.status_code} - {response.text}")
-    return Image.open(BytesIO(response.content))
+    from utils.tile_cache import get_satellite_tile
+
+    return _register_tile(get_satellite_tile(latitude, longitude, zoom, image_size))
+
+
+async def adownload_satellite_image(latitude: float, longitude: float, zoom: int = 18, image_size: int = 512) -> dict:
+    """Async version of `download_satellite_image`."""
+    from utils.tile_cache import aget_satellite_tile
+
+    tile = await aget_satellite_tile(latitude, longitude, zoom, image_size)
+    # The artifact store writes to disk
+    return await asyncio.to_thread(_register_tile, tile)
+
+download_satellite_image.coroutine = adownload_satellite_image
+
+
+def _register_tile(tile) -> dict:
+    from utils.artifact_store import get_artifact_store
+
+    return {
+        "image_ref": get_artifact_store().put(tile, "image"),
+        "width": int(tile.shape[1]),
+        "height": int(tile.shape[0])
+    }
 
 @tool
 def estimate_scale(latitude: float, zoom: int) -> dict:
@@ -134,20 +183,29 @@ def estimate_scale(latitude: float, zoom: int) -> dict:
     }
 
 @tool
-def calculate_area(binary_mask: list[list[int]], meters_per_pixel: float) -> dict:
+def calculate_area(binary_mask: Union[str, dict, list[list[int]]], meters_per_pixel: float) -> dict:
     """
     Calculates the area in square meters of a building using a binary mask and scale.
 
     Args:
-        binary_mask (list[list[int]]): A 2D binary mask where 1 indicates the building area.
+        binary_mask (str | dict | list[list[int]]): The building mask: the `mask_ref` handle returned by `segment_building`,
+            a run-length encoded mask ({"size": [h, w], "counts": "..."}) or a 2D binary mask where 1 indicates the building area.
         meters_per_pixel (float): The scale of the image in meters per pixel.
 
     Returns:
         dict: A dictionary containing:
             - area_m2 (float): The estimated area of the building in square meters.
     """
-    mask_array = np.array(binary_mask)
-    pixel_count = np.sum(mask_array == 1)
+    import numpy as np
+    from utils.artifact_store import get_artifact_store, is_artifact_handle
+    from utils.masks import rle_area
+
+    if is_artifact_handle(binary_mask):
+        binary_mask = get_artifact_store().get(binary_mask)
+    if isinstance(binary_mask, dict):
+        pixel_count = rle_area(binary_mask)
+    else:
+        pixel_count = int(np.sum(np.array(binary_mask) == 1))
     area_m2 = pixel_count * (meters_per_pixel ** 2)
     return {
         "area_m2": area_m2
@@ -177,37 +235,166 @@ def calculate_scale(point1: dict, point2: dict, distance_meters: float) -> dict:
     }
 
 @tool
-def segment_building_base64(image_base64: str, predictor: SamPredictor) -> list[list[int]]:
+def segment_building(image_ref: str, points: Optional[list[list[int]]] = None, box: Optional[list[int]] = None) -> dict:
     """
-    Segments a building in a satellite image using SAM from a base64-encoded image.
+    Segments a building in a satellite image using SAM.
+    The SAM model is loaded once per process and the image embedding is cached, so calling this tool
+    again on the same image with other points or a box is fast.
 
     Args:
-        image_base64 (str): Base64-encoded PNG or JPEG image.
-        predictor (SamPredictor): Initialized SAM predictor.
+        image_ref (str): The image to segment: the `image_ref` handle returned by `download_satellite_image`,
+            a local file path, an URL or a base64-encoded PNG/JPEG.
+        points (list[list[int]], optional): Foreground points as [[x, y], ...] in pixels (default: the image center).
+        box (list[int], optional): A box around the building as [x0, y0, x1, y1] in pixels.
 
     Returns:
-        list[list[int]]: A binary mask as nested lists where 1 indicates the segmented building.
+        dict: A dictionary containing:
+            - mask_ref (str): Handle of the building mask (run-length encoded). Pass it to `calculate_area`.
+            - area_pixels (int): Number of pixels of the building.
+            - bbox (list[int]): Bounding box of the building as [x0, y0, x1, y1] in pixels.
+            - score (float): SAM confidence score of the mask.
     """
-    # Decode base64 to image
-    image_data = base64.b64decode(image_base64)
-    image = Image.open(BytesIO(image_data)).convert("RGB")
-    image_np = np.array(image)
+    import numpy as np
+    from utils.artifact_store import get_artifact_store
+    from utils.images import load_image_array
+    from utils.masks import encode_rle, rle_area, rle_bbox
+    from utils.sam_service import get_sam_service
 
-    predictor.set_image(image_np)
+    image_np = load_image_array(image_ref)
 
     h, w, _ = image_np.shape
-    input_point = np.array([[w // 2, h // 2]])
-    input_label = np.array([1])
+    input_point = np.array(points if points else [[w // 2, h // 2]])
+    input_label = np.ones(len(input_point), dtype=int)
 
-    masks, scores, _ = predictor.predict(
+    masks, scores = get_sam_service().predict(
+        image_np,
         point_coords=input_point,
         point_labels=input_label,
+        box=np.array(box) if box else None,
         multimask_output=True
     )
 
-    best_mask = masks[np.argmax(scores)]
-    Image.fromarray((best_mask.astype(np.uint8) * 255).astype(np.uint8)).save("mask.png")
-    return best_mask.astype(int).tolist()
+    best = int(np.argmax(scores))
+    best_mask = masks[best]
+    rle = encode_rle(best_mask)
+    return {
+        "mask_ref": get_artifact_store().put(rle, "mask"),
+        "area_pixels": rle_area(rle),
+        "bbox": rle_bbox(rle),
+        "score": float(scores[best])
+    }
+
+
+@tool
+def find_nearby_hotels(
+    latitude: float,
+    longitude: float,
+    radius_km: Optional[float] = None,
+    top_k: Optional[int] = 20,
+    segment: Optional[str] = None,
+    min_stars: Optional[float] = None,
+    min_rooms: Optional[int] = None,
+    max_rooms: Optional[int] = None,
+    exclude_name: Optional[str] = None,
+) -> dict:
+    """
+    Finds competitive set candidates in the local hotel registry, nearest first, with one local query
+    (no web search or geocoding needed).
+
+    Args:
+        latitude (float): Latitude of the subject asset.
+        longitude (float): Longitude of the subject asset.
+        radius_km (float, optional): Maximum straight-line distance from the asset in kilometers.
+        top_k (int, optional): Maximum number of hotels (default 20). With no radius, the nearest hotels anywhere.
+        segment (str, optional): Category filter, e.g. "luxury" (also matches "ultra-luxury").
+        min_stars (float, optional): Minimum star rating.
+        min_rooms (int, optional): Minimum number of rooms.
+        max_rooms (int, optional): Maximum number of rooms.
+        exclude_name (str, optional): Name of the subject asset, to leave it out of the results.
+
+    Returns:
+        dict: A dictionary containing:
+            - hotels (list[dict]): name, latitude, longitude, distance_km and, when known, stars, category,
+              number_of_rooms, total_surface_area_sqm, amenities, brand, city, country and website.
+            - registry_size (int): Number of hotels in the registry.
+        or {"error": ...} if no registry has been imported.
+
+    Usage Example:
+        find_nearby_hotels(43.71, 7.33, radius_km=30, segment="luxury", exclude_name="Hotel du Cap-Eden-Roc")
+    """
+    from utils.hotel_registry import get_hotel_registry
+
+    registry = get_hotel_registry()
+    if registry is None:
+        return {"error": "No local hotel registry: import one with `python -m utils.hotel_registry hotels.csv`."}
+    hotels = registry.query(
+        latitude,
+        longitude,
+        radius_km=radius_km,
+        top_k=top_k,
+        segment=segment,
+        min_stars=min_stars,
+        min_rooms=min_rooms,
+        max_rooms=max_rooms,
+        exclude_name=exclude_name,
+    )
+    return {"hotels": hotels, "registry_size": len(registry)}
+
+
+@tool
+def rank_competitive_set(
+    state: Annotated[dict, InjectedState],
+    candidates: Optional[list[dict]] = None,
+    radius_km: float = 50,
+    segment: Optional[str] = None,
+    weights: Optional[dict] = None,
+    top_k: int = 10,
+) -> dict:
+    """
+    Ranks competitive set candidates by similarity to the subject asset, using the position analysis and
+    asset dimensions of the initial assessment (no need to pass them).
+
+    Similarity combines number of rooms, total surface, amenities, distance, stars and location context.
+    Without `candidates`, every hotel of the local registry within `radius_km` is ranked.
+
+    Args:
+        candidates (list[dict], optional): Hotels to rank, with name and any of latitude, longitude, distance_km,
+            stars, number_of_rooms, total_surface_area_sqm, amenities (list) and context (e.g. "coastal, isolated").
+        radius_km (float): Search radius in the local registry when no candidates are given.
+        segment (str, optional): Category filter for the registry, e.g. "luxury".
+        weights (dict, optional): Feature weights overriding the defaults, e.g. {"number_of_rooms": 0.5}.
+            Features: number_of_rooms, total_surface_area_sqm, amenities, distance, stars, context.
+        top_k (int): Number of hotels returned.
+
+    Returns:
+        dict: A dictionary containing:
+            - ranked (list[dict]): The best candidates with score (0-100), contributions (points per known feature;
+              unknown features count as half a match) and coverage (share of the weights backed by known data).
+            - candidates_scored (int): Number of candidates compared.
+        or {"error": ...} if there is nothing to rank.
+
+    Usage Example:
+        rank_competitive_set(radius_km=40, segment="luxury", top_k=8)
+    """
+    from utils.comp_scoring import score_candidates, subject_from_state
+
+    subject = subject_from_state(state.get("position_analysis"), state.get("asset_dimensions"))
+    if candidates is None:
+        from utils.hotel_registry import get_hotel_registry
+
+        registry = get_hotel_registry()
+        if registry is None:
+            return {"error": "No local hotel registry: pass the candidates explicitly."}
+        if subject["latitude"] is None or subject["longitude"] is None:
+            return {"error": "The position analysis has no hotel coordinates: pass the candidates explicitly."}
+        candidates = registry.query(subject["latitude"], subject["longitude"], radius_km=radius_km, segment=segment)
+        # The subject itself may be in the registry
+        candidates = [hotel for hotel in candidates if hotel["distance_km"] > 0.05]
+    try:
+        ranked = score_candidates(subject, candidates, weights=weights, top_k=top_k)
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"ranked": ranked, "candidates_scored": len(candidates)}
 
 
 competitive_set_list = [get_coordinates,
@@ -217,6 +404,8 @@ competitive_set_list = [get_coordinates,
                                  estimate_scale,
                                  calculate_area,
                                  calculate_scale,
-                                 segment_building_base64]
+                                 segment_building,
+                                 find_nearby_hotels,
+                                 rank_competitive_set]
 
-competitive_set_tools = ToolNode(competitive_set_list)
\ No newline at end of file
+competitive_set_tools = ToolNode(competitive_set_list, messages_key="competitive_set_messages")
\ No newline at end of file
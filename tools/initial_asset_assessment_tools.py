@@ -3,17 +3,16 @@ import os
 
 from langgraph.prebuilt import ToolNode
 
-
-import googlemaps
 from dotenv import load_dotenv
 load_dotenv(override=True)
 
-API_KEY = os.getenv("GOOGLE_API_KEY")
-gmaps = googlemaps.Client(API_KEY)
 MAPBOX_TOKEN = os.getenv("MAPBOX_TOKEN")
 SERP_API_KEY = os.getenv("SERP_API_KEY")
 
-from tools.common_tools import web_search
+from tools.common_tools import web_search, web_search_batch, search_asset_evidence
+from utils.geocode_cache import cached_geocode, acached_geocode
+from utils.distance_matrix import batched_distance_matrix, abatched_distance_matrix
+from utils.maps_client import get_maps_client, get_async_maps_client
 
 
 
@@ -33,28 +32,51 @@ def get_coordinates(poi_name:str) -> dict:
     """
 
     search_query = f"{poi_name}"
-    geocode_result = gmaps.geocode(search_query)
+    geocode_result = cached_geocode(get_maps_client(), search_query)
+    if geocode_result:
+        location = geocode_result[0]['geometry']['location']
+        return {'latitude': location['lat'], 'longitude': location['lng']}
+    return None
+
+
+async def aget_coordinates(poi_name: str) -> dict:
+    """Async version of `get_coordinates`, sharing the geocode cache and the HTTP connection pool."""
+    geocode_result = await acached_geocode(get_async_maps_client(), poi_name)
     if geocode_result:
         location = geocode_result[0]['geometry']['location']
         return {'latitude': location['lat'], 'longitude': location['lng']}
     return None
 
+get_coordinates.coroutine = aget_coordinates
+
 @tool
-def calculate_distance_to_city_centers(asset_coords:dict, city_coords_list:list):
-    """Calculate distances from asset coordinates to a list of city center coordinates.
+def calculate_distance_to_city_centers(asset_coords:dict, city_coords_list:list) -> list[dict]:
+    """Calculate driving distances from asset coordinates to a list of city center coordinates with a single batched request.
         
     Args:
         asset_coords: A dictionary containing latitude and longitude of the hotel.
-        city_coords_list: A list of dictionaries, each containing latitude and longitude of a city center.
-    
+        city_coords_list: A list of dictionaries, each containing latitude and longitude of a city center (and optionally its "name").
+
+    Returns:
+        A list aligned with city_coords_list. Each item contains index, name, status ("OK" or the Google Maps error),
+        distance_km and duration_seconds (null when the status is not "OK").
     """
-    distances = []
-    for city_coords in city_coords_list:
-        distance_result = gmaps.distance_matrix(asset_coords, city_coords)
-        if distance_result['rows'][0]['elements'][0]['status'] == 'OK':
-            distance = distance_result['rows'][0]['elements'][0]['distance']['value'] / 1000  # Convert to km
-            distances.append(distance)
-    return distances
+    row = batched_distance_matrix(get_maps_client(), [asset_coords], city_coords_list)[0] if city_coords_list else []
+    return [
+        {"index": i, "name": city_coords.get("name") if isinstance(city_coords, dict) else None, **element}
+        for i, (city_coords, element) in enumerate(zip(city_coords_list, row))
+    ]
+
+
+async def acalculate_distance_to_city_centers(asset_coords: dict, city_coords_list: list) -> list[dict]:
+    """Async version of `calculate_distance_to_city_centers`."""
+    row = (await abatched_distance_matrix(get_async_maps_client(), [asset_coords], city_coords_list))[0] if city_coords_list else []
+    return [
+        {"index": i, "name": city_coords.get("name") if isinstance(city_coords, dict) else None, **element}
+        for i, (city_coords, element) in enumerate(zip(city_coords_list, row))
+    ]
+
+calculate_distance_to_city_centers.coroutine = acalculate_distance_to_city_centers
 
 @tool
 def get_distance_between_coordinates(point1: dict, point2: dict) -> dict:
@@ -77,36 +99,133 @@ def get_distance_between_coordinates(point1: dict, point2: dict) -> dict:
         )
     """
 
-    origins = (point1["latitude"], point1["longitude"])
-    destinations = (point2["latitude"], point2["longitude"])
+    element = batched_distance_matrix(get_maps_client(), [point1], [point2], mode="driving")[0][0]
+    if element["status"] != "OK":
+        raise RuntimeError(f"Failed to retrieve distance information from Google Maps: {element['status']}")
+
+    return {
+        "distance_meters": element["distance_meters"],
+        "duration_seconds": element["duration_seconds"]
+    }
+
+
+async def aget_distance_between_coordinates(point1: dict, point2: dict) -> dict:
+    """Async version of `get_distance_between_coordinates`."""
+    element = (await abatched_distance_matrix(get_async_maps_client(), [point1], [point2], mode="driving"))[0][0]
+    if element["status"] != "OK":
+        raise RuntimeError(f"Failed to retrieve distance information from Google Maps: {element['status']}")
+
+    return {
+        "distance_meters": element["distance_meters"],
+        "duration_seconds": element["duration_seconds"]
+    }
+
+get_distance_between_coordinates.coroutine = aget_distance_between_coordinates
+
+@tool
+def calculate_great_circle_distances(origins: list[dict], destinations: list[dict], method: str = "haversine") -> dict:
+    """
+    Computes straight-line (great-circle) distances in kilometers between every origin and every destination.
+    It runs offline and instantly, so use it as a first pass to screen the location (urban, semi-urban, isolated)
+    and only call the driving-distance tools for the few pairs where the road distance really matters.
+
+    Args:
+        origins (list[dict]): Points with "latitude" and "longitude" (and optionally "name").
+        destinations (list[dict]): Points with "latitude" and "longitude" (and optionally "name").
+        method (str): "haversine" (default, spherical Earth) or "vincenty" (WGS-84 ellipsoid, more precise).
 
-    result = gmaps.distance_matrix(origins=[origins], destinations=[destinations], mode="driving")
+    Returns:
+        dict: A dictionary containing:
+            - method (str): The method used.
+            - distances_km (list[list[float]]): Matrix with one row per origin and one column per destination.
+            - origin_names / destination_names (list): The "name" of each point, if provided.
 
-    try:
-        element = result["rows"][0]["elements"][0]
-        distance_meters = element["distance"]["value"]
-        duration_seconds = element["duration"]["value"]
-    except (KeyError, IndexError):
-        raise RuntimeError("Failed to retrieve distance information from Google Maps.")
+    Usage Example:
+        calculate_great_circle_distances(
+            origins=[{"name": "Les Terrasses d'Eze", "latitude": 43.728, "longitude": 7.362}],
+            destinations=[{"name": "Nice", "latitude": 43.710, "longitude": 7.262},
+                          {"name": "Monaco", "latitude": 43.738, "longitude": 7.425}]
+        )
+    """
+    from utils.geodesy import great_circle_matrix
 
+    matrix = great_circle_matrix(origins, destinations, method=method)
     return {
-        "distance_meters": distance_meters,
-        "duration_seconds": duration_seconds
+        "method": method,
+        "distances_km": matrix.round(3).tolist(),
+        "origin_names": [p.get("name") if isinstance(p, dict) else None for p in origins],
+        "destination_names": [p.get("name") if isinstance(p, dict) else None for p in destinations],
+    }
+
+@tool
+def get_nearby_places(latitude: float, longitude: float, n_cities: int = 5, n_airports: int = 2, n_ports: int = 1,
+                      min_population: int = 20000, max_distance_km: float = None) -> dict:
+    """
+    Finds the nearest cities, airports and ports to a location in the offline gazetteer, with great-circle
+    distances, in a single call (no geocoding needed).
+
+    The bundled gazetteer is detailed for Europe only, with a few major cities and airports elsewhere.
+    Places farther than the reliable distance (100 km for cities, 250 km for airports, 150 km for ports)
+    have reliable=False, as closer ones may be missing; when there is a coverage_warning, find the nearby
+    cities and airports with get_coordinates and calculate_great_circle_distances instead.
+
+    Args:
+        latitude (float): Latitude of the hotel.
+        longitude (float): Longitude of the hotel.
+        n_cities (int): Number of cities.
+        n_airports (int): Number of airports.
+        n_ports (int): Number of ports and marinas.
+        min_population (int): Minimum population of the cities (lower it for remote areas).
+        max_distance_km (float, optional): Maximum distance from the hotel.
+
+    Returns:
+        dict: A dictionary containing:
+            - nearby_cities (list[dict]): name, coordinates, distance_km (ready for PositionAnalysis.nearby_cities),
+              country, population, has_airport, has_port and reliable.
+            - airports (list[dict]): name, iata, country, coordinates, distance_km and reliable.
+            - ports (list[dict]): name, country, coordinates, distance_km and reliable.
+            - coverage_warning (str): Only when the location is outside the detailed coverage of the gazetteer.
+
+    Usage Example:
+        get_nearby_places(43.7283, 7.3617, n_cities=4)
+    """
+    from utils.gazetteer import get_gazetteer
+
+    gazetteer = get_gazetteer()
+    places = {
+        "nearby_cities": gazetteer.nearest(latitude, longitude, "city", n_cities, min_population, max_distance_km),
+        "airports": gazetteer.nearest(latitude, longitude, "airport", n_airports, max_distance_km=max_distance_km),
+        "ports": gazetteer.nearest(latitude, longitude, "port", n_ports, max_distance_km=max_distance_km),
     }
+    warning = gazetteer.coverage_warning(latitude, longitude, min_population)
+    if warning:
+        places["coverage_warning"] = warning
+    return places
 
 # Tools for Section 2 - Asset Dimensions
 # facciamo solo ricerche online
 
 # Tools for Section 3 - Asset Dimensions
 
+# Tools of each section, bound to the agent of its branch when the sections run concurrently
+location_assessment_list = [get_coordinates
+                            , get_nearby_places
+                            , calculate_great_circle_distances
+                            , calculate_distance_to_city_centers
+                            , get_distance_between_coordinates
+                            ]
+dimensions_assessment_list = [web_search
+                              , web_search_batch
+                              , search_asset_evidence
+                              ]
+
 # List of tools for initial asset assessment
 # These tools will be used by the initial asset assessment agent to gather information about assets and their locations.
-initial_asset_assessment_list = [get_coordinates
-                                 , calculate_distance_to_city_centers
-                                 , get_distance_between_coordinates
-                                 , web_search
-                                 ]
+initial_asset_assessment_list = location_assessment_list + dimensions_assessment_list
 
 # Create a ToolNode for the initial asset assessment tools
 # This allows the tools to be used in a structured way within the LangGraph framework.
-initial_asset_assessment_tools = ToolNode(initial_asset_assessment_list)
\ No newline at end of file
+initial_asset_assessment_tools = ToolNode(initial_asset_assessment_list)
+# The branches read the tool calls from, and write the results to, their own message channel
+location_assessment_tools = ToolNode(location_assessment_list, messages_key="location_messages")
+dimensions_assessment_tools = ToolNode(dimensions_assessment_list, messages_key="dimensions_messages")
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.common import get_cache_dir
+
+HANDLE_PREFIX = "artifact://"
+ARTIFACT_MEMORY_BYTES = int(os.getenv("ARTIFACT_MEMORY_BYTES", str(256 * 1024 ** 2)))
+# Spilled artifacts on disk are capped too, the least recently used are deleted first
+ARTIFACT_DISK_MAX_BYTES = int(os.getenv("ARTIFACT_DISK_MAX_BYTES", str(1024 ** 3)))
+
+
+class ArtifactStore:
+    """
+    Store for large tool outputs (images, masks, raw search results).
+
+    Tools register a payload and return only its handle (e.g. "artifact://image/3fa2..."),
+    so messages, prompts and checkpoints stay small. Handles are content-addressed, so the
+    same payload always gets the same handle.
+    Payloads are kept in memory (LRU, bounded by `memory_budget`) and written through to disk when
+    they are registered: the handles end up in checkpointed messages, so a run resumed in another
+    process must still resolve them. Arrays memory-mapped from a file (e.g. cached satellite tiles)
+    are written as a reference to that file, not copied. The directory is capped at `disk_budget`
+    bytes (least recently used first); a handle whose file has been cleaned up, or whose tile has
+    left the tile cache, raises KeyError and the tool that produced it has to be called again.
+    Arrays are read back from disk memory-mapped.
+    """
+
+    def __init__(self, directory, memory_budget=ARTIFACT_MEMORY_BYTES, disk_budget=ARTIFACT_DISK_MAX_BYTES):
+        self.directory = directory
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = None
+        self._lock = threading.Lock()
+
+    def put(self, obj, kind: str) -> str:
+        """
+        Registers a payload and returns its handle.
+
+        Args:
+            obj: A NumPy array (or PIL image, stored as an array) or a JSON-serializable value.
+            kind (str): Short label used in the handle, e.g. "image", "mask", "search".
+
+        Returns:
+            str: The artifact handle.
+        """
+        if hasattr(obj, "mode") and hasattr(obj, "size") and not isinstance(obj, np.ndarray):
+            obj = np.asarray(obj)
+        if isinstance(obj, np.ndarray):
+            array = obj if obj.flags.c_contiguous else np.ascontiguousarray(obj)
+            digest = hashlib.sha256(f"{array.shape}{array.dtype}".encode())
+            digest.update(array.data)
+            handle = f"{HANDLE_PREFIX}{kind}/{digest.hexdigest()[:32]}"
+            obj, size = array, array.nbytes
+        else:
+            payload = json.dumps(obj, sort_keys=True).encode()
+            handle = f"{HANDLE_PREFIX}{kind}/{hashlib.sha256(payload).hexdigest()[:32]}"
+            size = len(payload)
+        self._persist(handle, obj)
+        self._remember(handle, obj, size)
+        return handle
+
+    def get(self, handle: str):
+        """
+        Resolves a handle without copying the payload.
+
+        Raises:
+            KeyError: If the handle is unknown (or its file has been cleaned up).
+        """
+        with self._lock:
+            if handle in self._memory:
+                self._memory.move_to_end(handle)
+                return self._memory[handle][0]
+        obj, size = self._load(handle)
+        self._remember(handle, obj, size)
+        return obj
+
+    def __contains__(self, handle: str) -> bool:
+        return handle in self._memory or any(os.path.exists(self._path(handle, suffix)) for suffix in SPILL_SUFFIXES)
+
+    def _remember(self, handle, obj, size):
+        evicted = []
+        with self._lock:
+            if handle in self._memory:
+                self._memory.move_to_end(handle)
+                return
+            self._memory[handle] = (obj, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+                evicted_handle, (evicted_obj, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+                evicted.append((evicted_handle, evicted_obj))
+        for evicted_handle, evicted_obj in evicted:
+            # Already on disk unless the disk cap has removed it since
+            self._persist(evicted_handle, evicted_obj)
+
+    # ---- disk ----
+
+    def _persist(self, handle, obj):
+        """Writes a payload to disk if it isn't there yet (a file reference for file-backed arrays)."""
+        source = _backing_file(obj)
+        if source is not None:
+            path = self._path(handle, ".ref")
+            data = os.path.abspath(source).encode()
+            writer = lambda f: f.write(data)
+        elif isinstance(obj, np.ndarray):
+            path = self._path(handle, ".npy")
+            writer = lambda f: np.save(f, obj)
+        else:
+            path = self._path(handle, ".json")
+            data = json.dumps(obj, sort_keys=True).encode()
+            writer = lambda f: f.write(data)
+        if os.path.exists(path):
+            return
+        self._write(path, writer)
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, _, size in self._entries())
+            else:
+                self._disk_bytes += os.path.getsize(path)
+            if self._disk_bytes > self.disk_budget:
+                self._evict_disk()
+
+    def _load(self, handle):
+        for suffix in SPILL_SUFFIXES:
+            path = self._path(handle, suffix)
+            try:
+                if suffix == ".ref":
+                    with open(path, encoding="utf-8") as f:
+                        obj = np.load(f.read(), mmap_mode="r")
+                    size = obj.nbytes
+                elif suffix == ".npy":
+                    obj = np.load(path, mmap_mode="r")
+                    size = obj.nbytes
+                else:
+                    with open(path, "rb") as f:
+                        payload = f.read()
+                    obj, size = json.loads(payload), len(payload)
+            except FileNotFoundError:
+                # Not stored with this suffix, or the referenced tile has been evicted from its cache
+                continue
+            os.utime(path)
+            return obj, size
+        raise KeyError(f"Unknown artifact: {handle} (it has been cleaned up, call the tool that produced it again)")
+
+    def _evict_disk(self):
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.disk_budget:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._disk_bytes = total
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(SPILL_SUFFIXES):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_mtime, stat.st_size
+
+    def _path(self, handle: str, suffix: str) -> str:
+        if not is_artifact_handle(handle):
+            raise KeyError(f"Not an artifact handle: {handle}")
+        kind, _, digest = handle[len(HANDLE_PREFIX):].partition("/")
+        if not re.fullmatch(r"[a-z_]+", kind) or not re.fullmatch(r"[0-9a-f]+", digest):
+            raise KeyError(f"Malformed artifact handle: {handle}")
+        return os.path.join(self.directory, kind, f"{digest}{suffix}")
+
+    @staticmethod
+    def _write(path, writer):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            writer(f)
+        os.replace(tmp_path, path)
+
+
+SPILL_SUFFIXES = (".ref", ".npy", ".json")
+
+
+def _backing_file(obj):
+    """The .npy file a whole memory-mapped array was loaded from, or None."""
+    if not isinstance(obj, np.memmap) or not getattr(obj, "filename", None):
+        return None
+    try:
+        source = np.load(obj.filename, mmap_mode="r")
+    except (OSError, ValueError):
+        return None
+    if source.shape == obj.shape and source.dtype == obj.dtype and source.offset == obj.offset:
+        return obj.filename
+    return None
+
+
+def is_artifact_handle(value) -> bool:
+    return isinstance(value, str) and value.startswith(HANDLE_PREFIX)
+
+
+_artifact_store = None
+_artifact_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Returns the process-wide artifact store."""
+    global _artifact_store
+    with _artifact_store_lock:
+        if _artifact_store is None:
+            _artifact_store = ArtifactStore(get_cache_dir("artifacts"))
+    return _artifact_store
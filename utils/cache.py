@@ -0,0 +1,189 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Keys per query of `lookup_many`, below the default limit of SQLite bound parameters
+SQLITE_MAX_VARIABLES = 500
+
+
+class PersistentCache:
+    """
+    Small on-disk key/value cache backed by SQLite.
+
+    Entries expire after `ttl_seconds` and, when `max_entries` is reached, the least
+    recently used entries are evicted. Values are stored as JSON, so only JSON-friendly
+    results (dicts, lists, numbers, strings, None) should be cached.
+    The cache is safe to share between threads and, thanks to WAL mode, between processes.
+    """
+
+    def __init__(self, path, ttl_seconds=None, max_entries=None):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_last_access ON cache(last_access)")
+        self._conn.commit()
+
+    def lookup(self, key):
+        """
+        Looks up a key in the cache.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            tuple: (hit, value). `hit` is False when the key is missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or self._is_expired(row[1], now):
+                if row is not None:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return False, None
+            self._conn.execute("UPDATE cache SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return True, json.loads(row[0])
+
+    def lookup_many(self, keys) -> dict:
+        """
+        Looks up several keys with one query per SQLITE_MAX_VARIABLES keys.
+
+        Args:
+            keys (list[str]): The cache keys.
+
+        Returns:
+            dict: key -> value of the keys that hit (missing and expired keys are left out).
+        """
+        keys = list(dict.fromkeys(keys))
+        now = time.time()
+        found, expired = {}, []
+        with self._lock:
+            for start in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[start:start + SQLITE_MAX_VARIABLES]
+                rows = self._conn.execute(
+                    f"SELECT key, value, created_at FROM cache WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if self._is_expired(created_at, now):
+                        expired.append((key,))
+                    else:
+                        found[key] = value
+            if expired:
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", expired)
+            if found:
+                self._conn.executemany("UPDATE cache SET last_access = ? WHERE key = ?", [(now, key) for key in found])
+            if expired or found:
+                self._conn.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return {key: json.loads(value) for key, value in found.items()}
+
+    def set(self, key, value):
+        """
+        Stores a value in the cache, evicting the least recently used entries if needed.
+
+        Args:
+            key (str): The cache key.
+            value: A JSON-serializable value.
+        """
+        now = time.time()
+        payload = json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    """DELETE FROM cache WHERE key IN (
+                           SELECT key FROM cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def set_many(self, items):
+        """
+        Stores several (key, value) pairs in one transaction.
+
+        Args:
+            items (list[tuple]): (key, JSON-serializable value) pairs.
+        """
+        now = time.time()
+        rows = [(key, json.dumps(value), now, now) for key, value in items]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            if self.max_entries is not None:
+                self._conn.execute(
+                    """DELETE FROM cache WHERE key IN (
+                           SELECT key FROM cache ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                       )""",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def purge_expired(self):
+        """Deletes all expired entries. Returns the number of deleted rows."""
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        """Removes every entry and resets the hit/miss counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """
+        Returns cache statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate and the number of stored entries.
+        """
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": size,
+        }
+
+    def _is_expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
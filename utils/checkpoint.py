@@ -0,0 +1,322 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+
+from langchain_core.messages import BaseMessage
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+
+from utils.common import get_cache_dir
+
+# Type tag of a channel value stored as a list of references to deduplicated message blobs
+MESSAGE_REFS = "msgrefs"
+
+
+class CompactSqliteSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer backed by a single SQLite file.
+
+    Checkpoints are keyed by thread id, so a crashed or interrupted run resumes from its last
+    completed node. Storage stays compact even for long ReAct loops:
+      - channel values are stored once per channel version, so each step only writes the
+        channels it changed (the delta), not the whole state;
+      - message lists (the `messages` channel, node writes) are stored as lists of references
+        to content-addressed message blobs, so each message is written once per thread
+        however many steps carry it.
+    """
+
+    def __init__(self, path, serde=None):
+        super().__init__(serde=serde)
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                type TEXT,
+                checkpoint BLOB,
+                metadata_type TEXT,
+                metadata BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS channel_values (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                channel TEXT NOT NULL,
+                version TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL DEFAULT '',
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                type TEXT,
+                value BLOB,
+                task_path TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS message_blobs (
+                thread_id TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                type TEXT NOT NULL,
+                value BLOB,
+                PRIMARY KEY (thread_id, hash)
+            );
+            """
+        )
+        self.conn.commit()
+
+    # Sync API
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self.conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            return self._to_tuple(thread_id, checkpoint_ns, *row)
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        for thread_id, checkpoint_ns, *row in rows:
+            if limit is not None and limit <= 0:
+                break
+            with self._lock:
+                checkpoint_tuple = self._to_tuple(thread_id, checkpoint_ns, *row)
+            if filter and not all(checkpoint_tuple.metadata.get(k) == v for k, v in filter.items()):
+                continue
+            yield checkpoint_tuple
+            if limit is not None:
+                limit -= 1
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values = c.pop("channel_values")
+        type_, serialized = self.serde.dumps_typed(c)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(metadata)
+        with self._lock:
+            # Only the channels updated at this step are written
+            for channel, version in new_versions.items():
+                if channel in values:
+                    value_type, value = self._dump_value(thread_id, values[channel])
+                else:
+                    value_type, value = "empty", None
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO channel_values VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), value_type, value),
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    type_,
+                    serialized,
+                    metadata_type,
+                    serialized_metadata,
+                ),
+            )
+            self.conn.commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts...) replace the previous ones, regular writes are kept once
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                value_type, serialized = self._dump_value(thread_id, value)
+                self.conn.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        thread_id,
+                        checkpoint_ns,
+                        checkpoint_id,
+                        task_id,
+                        WRITES_IDX_MAP.get(channel, idx),
+                        channel,
+                        value_type,
+                        serialized,
+                        task_path,
+                    ),
+                )
+            self.conn.commit()
+
+    def delete_thread(self, thread_id):
+        with self._lock:
+            for table in ("checkpoints", "channel_values", "writes", "message_blobs"):
+                self.conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self.conn.commit()
+
+    def get_next_version(self, current, channel):
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    def storage_stats(self) -> dict:
+        """Returns the number of rows and stored bytes per table."""
+        stats = {}
+        with self._lock:
+            for table, column in (("checkpoints", "checkpoint"), ("channel_values", "value"),
+                                  ("writes", "value"), ("message_blobs", "value")):
+                rows, size = self.conn.execute(f"SELECT COUNT(*), COALESCE(SUM(LENGTH({column})), 0) FROM {table}").fetchone()
+                stats[table] = {"rows": rows, "bytes": size}
+        return stats
+
+    # Async API (SQLite calls are short, they run in the default executor)
+
+    async def aget_tuple(self, config):
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        tuples = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put_writes, config, writes, task_id, task_path
+        )
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.get_running_loop().run_in_executor(None, self.delete_thread, thread_id)
+
+    # Helpers (called with the lock held)
+
+    def _to_tuple(self, thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata):
+        checkpoint_ = self.serde.loads_typed((type_, checkpoint))
+        channel_values = {}
+        for channel, version in checkpoint_["channel_versions"].items():
+            row = self.conn.execute(
+                "SELECT type, value FROM channel_values WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                channel_values[channel] = self._load_value(thread_id, *row)
+        writes = self.conn.execute(
+            "SELECT task_id, channel, type, value FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={**checkpoint_, "channel_values": channel_values},
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=[(task_id, channel, self._load_value(thread_id, t, v)) for task_id, channel, t, v in writes],
+        )
+
+    def _dump_value(self, thread_id, value):
+        if isinstance(value, list) and value and all(isinstance(m, BaseMessage) for m in value):
+            hashes = []
+            for message in value:
+                type_, data = self.serde.dumps_typed(message)
+                digest = hashlib.sha256(type_.encode() + b"\0" + data).hexdigest()[:32]
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO message_blobs VALUES (?, ?, ?, ?)", (thread_id, digest, type_, data)
+                )
+                hashes.append(digest)
+            return MESSAGE_REFS, json.dumps(hashes).encode()
+        return self.serde.dumps_typed(value)
+
+    def _load_value(self, thread_id, type_, value):
+        if type_ != MESSAGE_REFS:
+            return self.serde.loads_typed((type_, value))
+        hashes = json.loads(value)
+        blobs = {}
+        unique = list(set(hashes))
+        # Stay below SQLite's host parameter limit
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT hash, type, value FROM message_blobs WHERE thread_id = ? AND hash IN ({','.join('?' * len(chunk))})",
+                (thread_id, *chunk),
+            ).fetchall()
+            blobs.update({h: (t, v) for h, t, v in rows})
+        return [self.serde.loads_typed(blobs[h]) for h in hashes]
+
+
+def get_checkpointer(path=None) -> CompactSqliteSaver:
+    """
+    Returns a `CompactSqliteSaver` on `path`, by default CHECKPOINT_DB or `<cache dir>/checkpoints.sqlite`.
+    """
+    path = path or os.getenv("CHECKPOINT_DB") or os.path.join(get_cache_dir(), "checkpoints.sqlite")
+    return CompactSqliteSaver(path)
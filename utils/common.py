@@ -1,4 +1,5 @@
 
+import os
 import re
 import json
 
@@ -26,4 +27,12 @@ def extract_json_fallback(text):
     return {}
 
 
-
+def get_cache_dir(*parts):
+    """
+    Returns (and creates if needed) a directory under the local cache root.
+    The root defaults to `.cache` and can be moved with ASSET_AGENT_CACHE_DIR.
+    """
+    base = os.getenv("ASSET_AGENT_CACHE_DIR", ".cache")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,198 @@
+import math
+import re
+from functools import lru_cache
+
+import numpy as np
+
+from utils.evidence import AMENITY_KEYWORDS, parse_number
+from utils.geodesy import haversine_matrix
+
+# Relative weight of each feature in the similarity score
+DEFAULT_WEIGHTS = {
+    "number_of_rooms": 0.30,
+    "total_surface_area_sqm": 0.10,
+    "amenities": 0.20,
+    "distance": 0.20,
+    "stars": 0.10,
+    "context": 0.10,
+}
+FEATURES = tuple(DEFAULT_WEIGHTS)
+
+# Distance at which the distance similarity falls to 1/e
+DISTANCE_SCALE_KM = 25.0
+# Similarity assumed for a feature whose value is unknown: half a match, so a sparse record
+# can't outrank a candidate that is known to be similar
+UNKNOWN_SIMILARITY = 0.5
+# The subject is assessed for a redevelopment as an ultra-luxury hotel
+TARGET_STARS = 5.0
+
+CONTEXT_KEYWORDS = {
+    "urban": r"\burban\b|city cent(?:er|re)|downtown|centro",
+    "semi-urban": r"semi-urban|suburb|outskirts",
+    "isolated": r"isolated|remote|secluded|rural|countryside",
+    "coastal": r"coast|seaside|sea view|beach|waterfront|riviera|bay\b",
+    "lake": r"\blake\b|lakeside|lago",
+    "mountain": r"mountain|alpine|\bski\b|hill",
+    "island": r"\bisland\b|isola",
+}
+AMENITIES = tuple(AMENITY_KEYWORDS)
+CONTEXTS = tuple(CONTEXT_KEYWORDS)
+
+
+@lru_cache(maxsize=4096)
+def _flags(text: str, kind: str) -> tuple:
+    keywords = AMENITY_KEYWORDS if kind == "amenities" else CONTEXT_KEYWORDS
+    return tuple(bool(re.search(pattern, text, re.IGNORECASE)) for pattern in keywords.values())
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return "; ".join(_text(item) for item in value)
+    if isinstance(value, dict):
+        return str(value.get("amenity") or value.get("value") or "")
+    return str(value)
+
+
+def _number(value) -> float:
+    if isinstance(value, dict):
+        value = value.get("value")
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = re.search(r"\d{1,3}(?:[.,\s]\d{3})+|\d+(?:[.,]\d+)?", str(value))
+    return parse_number(match.group(0)) if match else math.nan
+
+
+def _dump(model) -> dict:
+    if model is None:
+        return {}
+    return model.model_dump() if hasattr(model, "model_dump") else dict(model)
+
+
+def subject_from_state(position_analysis=None, asset_dimensions=None) -> dict:
+    """
+    Subject asset features from the structured results of the initial assessment.
+
+    Args:
+        position_analysis (PositionAnalysis or dict, optional): Hotel coordinates and context.
+        asset_dimensions (AssetDimensions or dict, optional): Rooms, surface and amenities.
+
+    Returns:
+        dict: latitude, longitude, number_of_rooms, total_surface_area_sqm, amenities, context.
+    """
+    position, dimensions = _dump(position_analysis), _dump(asset_dimensions)
+    coordinates = position.get("hotel_coordinates") or {}
+    return {
+        "latitude": coordinates.get("latitude", coordinates.get("lat")),
+        "longitude": coordinates.get("longitude", coordinates.get("lng")),
+        "number_of_rooms": dimensions.get("number_of_rooms"),
+        "total_surface_area_sqm": dimensions.get("total_surface_area_sqm"),
+        "amenities": dimensions.get("main_amenities"),
+        "context": " ".join(filter(None, (position.get("context"), position.get("accessibility")))),
+        "stars": TARGET_STARS,
+    }
+
+
+def _log_ratio_similarity(values: np.ndarray, target: float) -> np.ndarray:
+    # 1 for the same size, 0.5 for half or double the size
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarity = np.exp2(-np.abs(np.log2(values / target)))
+    similarity[~(values > 0)] = np.nan
+    return similarity if target > 0 else np.full(len(values), np.nan)
+
+
+def _jaccard(flags: np.ndarray, target: np.ndarray, known: np.ndarray) -> np.ndarray:
+    union = (flags | target).sum(axis=1)
+    intersection = (flags & target).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarity = intersection / union
+    similarity[~known | (union == 0)] = np.nan
+    return similarity if target.any() else np.full(len(flags), np.nan)
+
+
+def feature_matrix(subject: dict, candidates: list) -> np.ndarray:
+    """
+    Per-feature similarity of each candidate to the subject, in [0, 1] (NaN when unknown).
+
+    Returns:
+        np.ndarray: Matrix of shape (len(candidates), len(FEATURES)).
+    """
+    n = len(candidates)
+    matrix = np.full((n, len(FEATURES)), np.nan)
+    column = {feature: i for i, feature in enumerate(FEATURES)}
+
+    for feature in ("number_of_rooms", "total_surface_area_sqm"):
+        values = np.array([_number(candidate.get(feature)) for candidate in candidates], dtype=float)
+        matrix[:, column[feature]] = _log_ratio_similarity(values, _number(subject.get(feature)))
+
+    for feature, kind in (("amenities", "amenities"), ("context", "context")):
+        texts = [_text(candidate.get(feature)) for candidate in candidates]
+        flags = np.array([_flags(text, kind) for text in texts], dtype=bool).reshape(n, -1)
+        known = np.array([bool(text) for text in texts], dtype=bool)
+        target = np.array(_flags(_text(subject.get(feature)), kind), dtype=bool)
+        matrix[:, column[feature]] = _jaccard(flags, target, known)
+
+    distances = np.array([_number(candidate.get("distance_km")) for candidate in candidates], dtype=float)
+    missing = np.isnan(distances)
+    if missing.any() and subject.get("latitude") is not None and subject.get("longitude") is not None:
+        points = np.array([[_number(candidates[i].get("latitude")), _number(candidates[i].get("longitude"))]
+                           for i in np.flatnonzero(missing)], dtype=float)
+        distances[missing] = haversine_matrix([[subject["latitude"], subject["longitude"]]], points)[0]
+    matrix[:, column["distance"]] = np.exp(-distances / DISTANCE_SCALE_KM)
+
+    stars = np.array([_number(candidate.get("stars")) for candidate in candidates], dtype=float)
+    target_stars = _number(subject.get("stars"))
+    matrix[:, column["stars"]] = np.clip(1 - np.abs(stars - target_stars) / 4, 0, 1)
+    return matrix
+
+
+def score_candidates(subject: dict, candidates: list, weights: dict = None, top_k: int = 10) -> list:
+    """
+    Ranks competitive set candidates by weighted similarity to the subject asset, in one vectorized pass.
+
+    Unknown features (e.g. a candidate without a room count) count as UNKNOWN_SIMILARITY, so a
+    candidate with little data gets a middling score instead of the score of its few known features.
+
+    Args:
+        subject (dict): Subject features (see `subject_from_state`).
+        candidates (list[dict]): Hotels with any of name, latitude, longitude, distance_km, stars,
+            number_of_rooms, total_surface_area_sqm, amenities and context.
+        weights (dict, optional): Feature -> weight, merged over DEFAULT_WEIGHTS.
+        top_k (int): Number of candidates returned.
+
+    Returns:
+        list[dict]: The best candidates with their score (0-100), the contribution of each known
+            feature to it (points; the rest comes from the unknown ones) and coverage, the share of
+            the weights backed by known data.
+    """
+    if not candidates:
+        return []
+    unknown = set(weights or ()) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Unknown features {sorted(unknown)}, expected some of {', '.join(FEATURES)}")
+    weight = np.array([{**DEFAULT_WEIGHTS, **(weights or {})}[feature] for feature in FEATURES], dtype=float)
+
+    matrix = feature_matrix(subject, candidates)
+    known = ~np.isnan(matrix)
+    used = (known * weight).sum(axis=1)
+    total = weight.sum()
+    if total <= 0:
+        raise ValueError("The weights must add up to more than 0")
+    contributions = np.where(known, matrix, UNKNOWN_SIMILARITY) * weight / total * 100
+    scores = contributions.sum(axis=1)
+
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    ranked = []
+    for i in order:
+        ranked.append({
+            **candidates[i],
+            "score": round(float(scores[i]), 1),
+            "contributions": {
+                feature: round(float(contributions[i, j]), 1) for j, feature in enumerate(FEATURES) if known[i, j]
+            },
+            "coverage": round(float(used[i] / total), 2),
+        })
+    return ranked
@@ -0,0 +1,196 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.route_cache import get_route_cache
+
+# Google Distance Matrix limits for a single (non-premium) request.
+MAX_LOCATIONS_PER_SIDE = 25
+MAX_ELEMENTS_PER_REQUEST = 100
+
+
+def to_latlng(point) -> tuple:
+    """
+    Converts a point to a (latitude, longitude) tuple.
+
+    Args:
+        point: A dict with "latitude"/"longitude" (or "lat"/"lng") keys, or a (lat, lng) pair.
+
+    Returns:
+        tuple: (latitude, longitude) as floats.
+    """
+    if isinstance(point, dict):
+        if "latitude" in point and "longitude" in point:
+            return float(point["latitude"]), float(point["longitude"])
+        if "lat" in point and "lng" in point:
+            return float(point["lat"]), float(point["lng"])
+        raise ValueError(f"Point has no latitude/longitude keys: {point}")
+    lat, lng = point
+    return float(lat), float(lng)
+
+
+def plan_chunks(n_origins: int, n_destinations: int) -> list:
+    """
+    Splits an N x M matrix into blocks that respect the per-request limits.
+
+    Returns:
+        list: (origin_start, origin_end, destination_start, destination_end) tuples.
+    """
+    if n_origins == 0 or n_destinations == 0:
+        return []
+    destination_block = min(n_destinations, MAX_LOCATIONS_PER_SIDE)
+    origin_block = min(n_origins, MAX_LOCATIONS_PER_SIDE, max(1, MAX_ELEMENTS_PER_REQUEST // destination_block))
+    return [
+        (o, min(o + origin_block, n_origins), d, min(d + destination_block, n_destinations))
+        for o in range(0, n_origins, origin_block)
+        for d in range(0, n_destinations, destination_block)
+    ]
+
+
+def parse_element(element: dict) -> dict:
+    """Flattens a Distance Matrix element, keeping its status even when it failed."""
+    status = element.get("status", "UNKNOWN")
+    result = {"status": status, "distance_meters": None, "distance_km": None, "duration_seconds": None}
+    if status == "OK":
+        result["distance_meters"] = element["distance"]["value"]
+        result["distance_km"] = element["distance"]["value"] / 1000
+        result["duration_seconds"] = element["duration"]["value"]
+    return result
+
+
+def batched_distance_matrix(client, origins: list, destinations: list, mode: str = "driving", max_workers: int = 4,
+                            use_cache: bool = True) -> list:
+    """
+    Computes an origins x destinations distance matrix with as few Distance Matrix requests as possible.
+
+    Cells already in the route cache (see utils.route_cache) are not requested again. The rest
+    is chunked to the API limits and the chunks are sent concurrently.
+    Every cell is returned, failed ones included, so results stay aligned with the inputs.
+
+    Args:
+        client (googlemaps.Client): The Google Maps client.
+        origins (list): Origin points (see `to_latlng`).
+        destinations (list): Destination points (see `to_latlng`).
+        mode (str): Travel mode (default: "driving").
+        max_workers (int): Maximum number of concurrent requests.
+        use_cache (bool): Read and write the route cache.
+
+    Returns:
+        list[list[dict]]: One row per origin and one element per destination, each with
+            status, distance_meters, distance_km and duration_seconds.
+    """
+    origins = [to_latlng(p) for p in origins]
+    destinations = [to_latlng(p) for p in destinations]
+    grid, rows, columns = _from_cache(origins, destinations, mode, use_cache)
+    missing_origins = [origins[i] for i in rows]
+    missing_destinations = [destinations[j] for j in columns]
+    fetched = [[None] * len(columns) for _ in rows]
+
+    def fetch(chunk):
+        o_start, o_end, d_start, d_end = chunk
+        try:
+            response = client.distance_matrix(
+                origins=missing_origins[o_start:o_end], destinations=missing_destinations[d_start:d_end], mode=mode
+            )
+        except Exception as e:
+            _fill_chunk(fetched, chunk, None, f"{type(e).__name__}: {e}")
+        else:
+            _fill_chunk(fetched, chunk, response)
+
+    chunks = plan_chunks(len(rows), len(columns))
+    if len(chunks) <= 1 or max_workers <= 1:
+        for chunk in chunks:
+            fetch(chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            list(executor.map(fetch, chunks))
+    _merge_fetched(grid, fetched, rows, columns, origins, destinations, mode, use_cache)
+    return grid
+
+
+async def abatched_distance_matrix(client, origins: list, destinations: list, mode: str = "driving",
+                                   use_cache: bool = True) -> list:
+    """
+    Async version of `batched_distance_matrix`: all the chunks are awaited concurrently.
+
+    Args:
+        client (AsyncMapsClient): The async Google Maps client.
+
+    Returns:
+        list[list[dict]]: Same layout as `batched_distance_matrix`.
+    """
+    origins = [to_latlng(p) for p in origins]
+    destinations = [to_latlng(p) for p in destinations]
+    # The SQLite route cache is read and written in a worker thread, not on the event loop
+    grid, rows, columns = await asyncio.to_thread(_from_cache, origins, destinations, mode, use_cache)
+    missing_origins = [origins[i] for i in rows]
+    missing_destinations = [destinations[j] for j in columns]
+    fetched = [[None] * len(columns) for _ in rows]
+
+    async def fetch(chunk):
+        o_start, o_end, d_start, d_end = chunk
+        try:
+            response = await client.distance_matrix(
+                origins=missing_origins[o_start:o_end], destinations=missing_destinations[d_start:d_end], mode=mode
+            )
+        except Exception as e:
+            _fill_chunk(fetched, chunk, None, f"{type(e).__name__}: {e}")
+        else:
+            _fill_chunk(fetched, chunk, response)
+
+    await asyncio.gather(*(fetch(chunk) for chunk in plan_chunks(len(rows), len(columns))))
+    await asyncio.to_thread(_merge_fetched, grid, fetched, rows, columns, origins, destinations, mode, use_cache)
+    return grid
+
+
+def _from_cache(origins, destinations, mode, use_cache):
+    """
+    Fills the grid from the route cache.
+
+    Returns:
+        tuple: (grid, rows, columns), where rows x columns is the smallest sub-matrix covering
+            every cell that still has to be requested.
+    """
+    grid = [[None] * len(destinations) for _ in origins]
+    if not use_cache:
+        return grid, list(range(len(origins))), list(range(len(destinations)))
+    # One query for the whole matrix instead of one per cell
+    found = get_route_cache().lookup_many(
+        [(origin, destination) for origin in origins for destination in destinations], mode
+    )
+    rows, columns = set(), set()
+    for i, origin in enumerate(origins):
+        for j, destination in enumerate(destinations):
+            element = found.get((origin, destination))
+            if element is not None:
+                grid[i][j] = element
+            else:
+                rows.add(i)
+                columns.add(j)
+    return grid, sorted(rows), sorted(columns)
+
+
+def _merge_fetched(grid, fetched, rows, columns, origins, destinations, mode, use_cache):
+    """Copies the requested cells into the grid (cached cells stay as they are) and caches them."""
+    routes = []
+    for a, i in enumerate(rows):
+        for b, j in enumerate(columns):
+            if grid[i][j] is None:
+                grid[i][j] = fetched[a][b]
+                routes.append((origins[i], destinations[j], fetched[a][b]))
+    if use_cache:
+        get_route_cache().set_many(routes, mode)
+
+
+def _fill_chunk(grid, chunk, response, error=None):
+    """Writes one chunk of a Distance Matrix response into the result grid."""
+    o_start, o_end, d_start, d_end = chunk
+    rows = response.get("rows", []) if response else []
+    if error is None:
+        error = f"Unexpected response status: {response.get('status')}"
+    for i in range(o_end - o_start):
+        elements = rows[i].get("elements", []) if i < len(rows) else []
+        for j in range(d_end - d_start):
+            if j < len(elements):
+                grid[o_start + i][d_start + j] = parse_element(elements[j])
+            else:
+                grid[o_start + i][d_start + j] = {**parse_element({"status": "REQUEST_FAILED"}), "error": error}
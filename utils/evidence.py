@@ -0,0 +1,207 @@
+import math
+import re
+from collections import Counter
+
+# Terms describing each AssetDimensions field, used as BM25 queries (English, Italian, French, Spanish, German)
+FIELD_QUERIES = {
+    "number_of_rooms": "rooms room suites keys guest rooms bedrooms camere suite chambres habitaciones zimmer",
+    "total_surface_area_sqm": "square meters metres sqm m2 m² surface area size estate hectares sq ft metri quadri superficie",
+    "main_amenities": "spa pool restaurant bar gym fitness beach garden terrace conference meeting wellness piscina ristorante",
+}
+
+AMENITY_KEYWORDS = {
+    "spa": r"\bspa\b|wellness",
+    "pool": r"\bpools?\b|piscin[ae]|swimming",
+    "restaurant": r"restaurants?\b|ristorant[ei]|michelin",
+    "bar": r"\bbars?\b|lounge",
+    "fitness center": r"\bgym\b|fitness",
+    "private beach": r"private beach|beach club|spiaggia privata",
+    "conference center": r"conference|meeting rooms?|congress|ballroom|sale riunioni",
+    "garden": r"\bgardens?\b|\bpark\b|giardin[oi]",
+    "terrace": r"terraces?\b|terrazz[ae]",
+    "kids club": r"kids'? club",
+    "golf": r"\bgolf\b",
+    "tennis": r"\btennis\b",
+    "marina": r"\bmarina\b|private jetty|pontile",
+    "helipad": r"helipad|eliporto",
+}
+
+_NUMBER = r"\d{1,3}(?:[.,\s]\d{3})+|\d+(?:[.,]\d+)?"
+ROOMS_RE = re.compile(
+    rf"(?<![\d.,])({_NUMBER})[-\s]*((?:[^\W\d]+[-\s]){{0,2}}?)(rooms|room|suites|keys|bedrooms|camere|chambres|habitaciones|zimmer)\b",
+    re.IGNORECASE,
+)
+SURFACE_RE = re.compile(
+    rf"(?<![\d.,])({_NUMBER})\s*(m²|m2|sqm|sq\.?\s?m\b|square\s+met(?:er|re)s|mq|metri\s+quadr[ia]ti?|sq\.?\s?ft|square\s+feet|hectares?|ha\b|ettari)",
+    re.IGNORECASE,
+)
+
+# Plausible ranges, to drop phone numbers and the like caught by the regexes
+ROOMS_RANGE = (1, 5000)
+SURFACE_RANGE_SQM = (20, 5_000_000)
+
+# Prices: a currency next to the value ("€ 250 rooms", "250 euro per room")
+CURRENCY_BEFORE_RE = re.compile(r"(?:[€$£]|\b(?:eur|euros?|usd|chf|gbp))\s*$", re.IGNORECASE)
+CURRENCY_WORDS = {"eur", "euro", "euros", "usd", "dollar", "dollars", "chf", "gbp", "pound", "pounds"}
+# Rates: the value is followed by per/a/each ("350 per room", "200 a room")
+RATE_WORDS = {"per", "a", "each"}
+# Years: "in 2019 rooms were renovated", "since 1890", "dal 1995", "en 2020"
+YEAR_RANGE = (1800, 2100)
+YEAR_BEFORE_RE = re.compile(r"\b(?:in|since|dal|en)\s*$", re.IGNORECASE)
+
+# Amenities are not alternatives to each other, so more of them are kept
+MAX_AMENITIES = 10
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list:
+    return re.findall(r"\w+", text.casefold())
+
+
+def bm25_scores(query: str, documents: list) -> list:
+    """
+    BM25 score of each document for the query, with the statistics of the given documents only.
+
+    Args:
+        query (str): Free-text query.
+        documents (list[str]): The texts to score.
+
+    Returns:
+        list[float]: One score per document, in the input order.
+    """
+    docs = [Counter(tokenize(doc)) for doc in documents]
+    if not docs:
+        return []
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_length = sum(lengths) / len(docs) or 1
+    terms = set(tokenize(query))
+    document_frequency = {term: sum(1 for doc in docs if term in doc) for term in terms}
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term in terms:
+            tf = doc.get(term, 0)
+            if not tf:
+                continue
+            idf = math.log(1 + (len(docs) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            score += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+        scores.append(score)
+    return scores
+
+
+def parse_number(text: str) -> float:
+    """
+    Parses "1,200", "1.200", "1 200" (thousands) and "12,5" / "12.5" (decimals).
+
+    Example:
+        >>> parse_number("12.000")
+        12000.0
+    """
+    text = text.strip()
+    if re.fullmatch(r"\d{1,3}(?:[.,\s]\d{3})+", text):
+        return float(re.sub(r"[.,\s]", "", text))
+    return float(text.replace(",", "."))
+
+
+def _to_sqm(value: float, unit: str) -> float:
+    unit = unit.lower()
+    if "ft" in unit or "feet" in unit:
+        return value * 0.092903
+    if unit.startswith(("hectare", "ha", "ettar")):
+        return value * 10000
+    return value
+
+
+def _context(text: str, match, width: int = 60) -> str:
+    start, end = max(match.start() - width, 0), min(match.end() + width, len(text))
+    return ("..." if start else "") + text[start:end].strip() + ("..." if end < len(text) else "")
+
+
+def _is_price_or_year(text: str, match, value: float, between: str = "") -> bool:
+    """Whether a match is a price, a rate or a year rather than a count or a surface."""
+    before = text[max(match.start() - 12, 0):match.start()]
+    words = set(tokenize(between))
+    if CURRENCY_BEFORE_RE.search(before) or words & CURRENCY_WORDS or words & RATE_WORDS:
+        return True
+    return YEAR_RANGE[0] <= value <= YEAR_RANGE[1] and bool(YEAR_BEFORE_RE.search(before))
+
+
+def extract_candidates(field: str, text: str) -> list:
+    """
+    Numeric (or amenity) candidates for a field found in a snippet.
+    Prices ("250 euro per room"), rates ("350 per room") and years ("in 2019 rooms were renovated")
+    are dropped.
+
+    Returns:
+        list[dict]: value, unit and the surrounding text of each match.
+    """
+    candidates = []
+    if field == "number_of_rooms":
+        for match in ROOMS_RE.finditer(text):
+            value = parse_number(match.group(1))
+            if not (ROOMS_RANGE[0] <= value <= ROOMS_RANGE[1] and value.is_integer()):
+                continue
+            if _is_price_or_year(text, match, value, match.group(2)):
+                continue
+            candidates.append({"value": int(value), "unit": match.group(3).lower(), "text": _context(text, match)})
+    elif field == "total_surface_area_sqm":
+        for match in SURFACE_RE.finditer(text):
+            value = _to_sqm(parse_number(match.group(1)), match.group(2))
+            if _is_price_or_year(text, match, parse_number(match.group(1))):
+                continue
+            if SURFACE_RANGE_SQM[0] <= value <= SURFACE_RANGE_SQM[1]:
+                candidates.append({"value": round(value), "unit": "sqm", "text": _context(text, match)})
+    elif field == "main_amenities":
+        for amenity, pattern in AMENITY_KEYWORDS.items():
+            match = re.search(pattern, text, re.IGNORECASE)
+            if match:
+                candidates.append({"value": amenity, "unit": None, "text": _context(text, match)})
+    return candidates
+
+
+def extract_evidence(results: list, fields=None, top_k: int = 3) -> dict:
+    """
+    Ranks search results against each AssetDimensions field and keeps only the best evidence.
+
+    Snippets are ranked with BM25 against the terms of the field. Each candidate value found
+    in the ranked snippets is reported once, with the number of sources agreeing on it,
+    the best snippet excerpt and its source URL.
+
+    Args:
+        results (list[dict]): Search results with 'snippet' and 'link'.
+        fields (list[str], optional): Fields to extract, all of FIELD_QUERIES by default.
+        top_k (int): Number of candidates kept per numeric field (up to MAX_AMENITIES for the amenities).
+
+    Returns:
+        dict: Field -> list of {"value", "unit", "sources" (count), "source_url", "text", "score"},
+            best first (most sources, then best BM25 score).
+    """
+    fields = fields or list(FIELD_QUERIES)
+    snippets = [result.get("snippet") or "" for result in results]
+    evidence = {}
+    for field in fields:
+        scores = bm25_scores(FIELD_QUERIES[field], snippets)
+        values = {}
+        for index in sorted(range(len(results)), key=lambda i: scores[i], reverse=True):
+            if scores[index] <= 0:
+                break
+            for candidate in extract_candidates(field, snippets[index]):
+                entry = values.get(candidate["value"])
+                if entry is None:
+                    values[candidate["value"]] = entry = {
+                        **candidate,
+                        "sources": 0,
+                        "source_url": results[index].get("link"),
+                        "score": round(scores[index], 3),
+                        "_links": set(),
+                    }
+                link = results[index].get("link") or index
+                if link not in entry["_links"]:
+                    entry["_links"].add(link)
+                    entry["sources"] += 1
+        limit = MAX_AMENITIES if field == "main_amenities" else top_k
+        ranked = sorted(values.values(), key=lambda e: (e["sources"], e["score"]), reverse=True)[:limit]
+        evidence[field] = [{k: v for k, v in entry.items() if k != "_links"} for entry in ranked]
+    return evidence
@@ -0,0 +1,227 @@
+"""
+Offline gazetteer of cities, airports and ports for the location assessment.
+
+A compact list is bundled in data/gazetteer.csv (name, kind, country, latitude, longitude,
+population, iata). A larger one can be built from a GeoNames dump (e.g. cities15000.txt, or
+allCountries.txt for airports and ports too) and selected with GAZETTEER_PATH:
+
+    python -m utils.gazetteer cities15000.txt --output .cache/gazetteer.csv
+"""
+import argparse
+import csv
+import os
+import threading
+
+import numpy as np
+
+from utils.geodesy import haversine_matrix
+from utils.spatial_index import GridIndex
+
+BUNDLED_GAZETTEER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "gazetteer.csv")
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH")
+
+KINDS = ("city", "airport", "port")
+# A city "has" an airport or a port when one is this close to its center
+AIRPORT_FLAG_KM = 50.0
+PORT_FLAG_KM = 15.0
+# The bundled list is detailed for Europe only: farther than this, closer places are probably missing
+RELIABLE_DISTANCE_KM = {"city": 100.0, "airport": 250.0, "port": 150.0}
+# The places are sparse, so the grid cells are larger than for the hotel registry
+GAZETTEER_CELL_DEG = 1.0
+
+# GeoNames feature codes of the places that are kept
+GEONAMES_AIRPORT_CODES = {"AIRP"}
+GEONAMES_PORT_CODES = {"PRT", "MAR"}
+
+
+def _coordinates(latitude, longitude) -> dict:
+    return {"latitude": round(float(latitude), 6), "longitude": round(float(longitude), 6)}
+
+
+def _near_any(latitude, longitude, targets_latitude, targets_longitude, radius_km, chunk=2000) -> np.ndarray:
+    """For each point, whether any target is within `radius_km` (in chunks, to bound the memory)."""
+    near = np.zeros(len(latitude), dtype=bool)
+    if not len(targets_latitude):
+        return near
+    targets = np.column_stack((targets_latitude, targets_longitude))
+    for start in range(0, len(latitude), chunk):
+        points = np.column_stack((latitude[start:start + chunk], longitude[start:start + chunk]))
+        near[start:start + chunk] = (haversine_matrix(points, targets) <= radius_km).any(axis=1)
+    return near
+
+
+class Gazetteer:
+    """
+    Places held in NumPy columns, with one `GridIndex` per kind (city, airport, port).
+    """
+
+    def __init__(self, columns: dict):
+        self.name = np.asarray(columns["name"], dtype=str)
+        self.kind = np.asarray(columns["kind"], dtype=str)
+        self.country = np.asarray(columns["country"], dtype=str)
+        self.iata = np.asarray(columns["iata"], dtype=str)
+        self.latitude = np.asarray(columns["latitude"], dtype=float)
+        self.longitude = np.asarray(columns["longitude"], dtype=float)
+        self.population = np.nan_to_num(np.asarray(columns["population"], dtype=float))
+
+        # Rows of each kind and their spatial index
+        self.rows = {kind: np.flatnonzero(self.kind == kind) for kind in KINDS}
+        self.indexes = {
+            kind: GridIndex(self.latitude[rows], self.longitude[rows], GAZETTEER_CELL_DEG)
+            for kind, rows in self.rows.items()
+        }
+
+        cities = self.rows["city"]
+        self.has_airport = np.zeros(len(self.name), dtype=bool)
+        self.has_port = np.zeros(len(self.name), dtype=bool)
+        for flags, kind, radius in ((self.has_airport, "airport", AIRPORT_FLAG_KM), (self.has_port, "port", PORT_FLAG_KM)):
+            flags[cities] = _near_any(
+                self.latitude[cities], self.longitude[cities],
+                self.latitude[self.rows[kind]], self.longitude[self.rows[kind]], radius,
+            )
+
+    def __len__(self):
+        return len(self.name)
+
+    @classmethod
+    def from_csv(cls, path: str) -> "Gazetteer":
+        columns = {field: [] for field in ("name", "kind", "country", "latitude", "longitude", "population", "iata")}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row.get("kind") not in KINDS:
+                    continue
+                columns["name"].append(row["name"])
+                columns["kind"].append(row["kind"])
+                columns["country"].append(row.get("country") or "")
+                columns["iata"].append(row.get("iata") or "")
+                columns["latitude"].append(float(row["latitude"]))
+                columns["longitude"].append(float(row["longitude"]))
+                columns["population"].append(float(row.get("population") or 0))
+        return cls(columns)
+
+    def nearest(self, latitude: float, longitude: float, kind: str = "city", n: int = 5,
+                min_population: int = 0, max_distance_km: float = None) -> list:
+        """
+        The `n` nearest places of a kind, nearest first.
+
+        Args:
+            latitude (float): Latitude of the location.
+            longitude (float): Longitude of the location.
+            kind (str): "city", "airport" or "port".
+            n (int): Number of places.
+            min_population (int): For cities, the minimum population.
+            max_distance_km (float, optional): Maximum great-circle distance.
+
+        Returns:
+            list[dict]: name, country, coordinates, distance_km and reliable (False beyond
+                RELIABLE_DISTANCE_KM, where the gazetteer may miss closer places); cities also have
+                population, has_airport and has_port, airports their iata code.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"Unknown kind {kind!r}, expected one of {', '.join(KINDS)}")
+        if n <= 0:
+            return []
+        index, rows = self.indexes[kind], self.rows[kind]
+        mask = None
+        if kind == "city" and min_population:
+            mask = lambda positions: self.population[rows[index.order[positions]]] >= min_population
+        positions, distances = index.query(latitude, longitude, radius_km=max_distance_km, top_k=n, mask=mask)
+        return [self._record(rows[index.order[p]], d) for p, d in zip(positions, distances)]
+
+    def coverage_warning(self, latitude: float, longitude: float, min_population: int = 0):
+        """
+        Returns a warning when the location is outside the detailed coverage of the gazetteer
+        (no city within RELIABLE_DISTANCE_KM), or None.
+        """
+        cities = self.nearest(latitude, longitude, "city", 1, min_population)
+        if cities and cities[0]["reliable"]:
+            return None
+        nearest = f"the nearest city listed is {cities[0]['name']} at {cities[0]['distance_km']} km" if cities else "no city is listed"
+        return (
+            f"The offline gazetteer is detailed for Europe only and {nearest}: nearby places are missing here. "
+            "Find the nearby cities and airports with get_coordinates and calculate_great_circle_distances instead."
+        )
+
+    def _record(self, row, distance) -> dict:
+        record = {
+            "name": str(self.name[row]),
+            "country": str(self.country[row]),
+            "coordinates": _coordinates(self.latitude[row], self.longitude[row]),
+            "distance_km": round(float(distance), 1),
+            "reliable": bool(distance <= RELIABLE_DISTANCE_KM[str(self.kind[row])]),
+        }
+        if self.kind[row] == "city":
+            record.update(
+                population=int(self.population[row]),
+                has_airport=bool(self.has_airport[row]),
+                has_port=bool(self.has_port[row]),
+            )
+        elif self.kind[row] == "airport" and self.iata[row]:
+            record["iata"] = str(self.iata[row])
+        return record
+
+
+def import_geonames(path: str, output: str, min_population: int = 1000) -> int:
+    """
+    Converts a GeoNames dump (tab-separated, geoname table columns) into a gazetteer CSV.
+
+    Populated places (feature class P) with at least `min_population` inhabitants become cities,
+    AIRP features airports (with the IATA code from the alternate names, if any) and PRT/MAR ports.
+
+    Returns:
+        int: Number of places written.
+    """
+    count = 0
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(path, encoding="utf-8") as source, open(output, "w", newline="", encoding="utf-8") as target:
+        writer = csv.writer(target)
+        writer.writerow(["name", "kind", "country", "latitude", "longitude", "population", "iata"])
+        for line in source:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 15:
+                continue
+            name, alternate_names = fields[1], fields[3]
+            feature_class, feature_code, country = fields[6], fields[7], fields[8]
+            population = int(fields[14] or 0)
+            iata = ""
+            if feature_code in GEONAMES_AIRPORT_CODES:
+                kind = "airport"
+                # IATA codes are the 3-letter uppercase alternate names
+                iata = next((alias for alias in alternate_names.split(",") if len(alias) == 3 and alias.isupper()), "")
+            elif feature_code in GEONAMES_PORT_CODES:
+                kind = "port"
+            elif feature_class == "P" and population >= min_population:
+                kind = "city"
+            else:
+                continue
+            writer.writerow([name, kind, country, fields[4], fields[5], population if kind == "city" else "", iata])
+            count += 1
+    return count
+
+
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Gazetteer:
+    """Returns the process-wide `Gazetteer` (GAZETTEER_PATH, or the bundled data/gazetteer.csv)."""
+    global _gazetteer
+    with _gazetteer_lock:
+        if _gazetteer is None:
+            _gazetteer = Gazetteer.from_csv(GAZETTEER_PATH or BUNDLED_GAZETTEER)
+    return _gazetteer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a gazetteer CSV from a GeoNames dump.")
+    parser.add_argument("path", help="GeoNames file, e.g. cities15000.txt")
+    parser.add_argument("--output", default=os.path.join(".cache", "gazetteer.csv"), help="Gazetteer CSV to write")
+    parser.add_argument("--min-population", type=int, default=1000, help="Minimum population of the cities")
+    args = parser.parse_args(argv)
+
+    count = import_geonames(args.path, args.output, args.min_population)
+    print(f"Wrote {count} places to {args.output}; set GAZETTEER_PATH={args.output} to use it")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import re
+import threading
+import unicodedata
+
+from utils.cache import PersistentCache
+from utils.common import get_cache_dir
+
+# Most geocoded places (hotels, towns) never move, so results can live for a long time.
+GEOCODE_CACHE_TTL_DAYS = float(os.getenv("GEOCODE_CACHE_TTL_DAYS", "90"))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "50000"))
+
+_QUOTES = str.maketrans({"’": "'", "‘": "'", "`": "'", "´": "'", "“": '"', "”": '"'})
+
+_geocode_cache = None
+_geocode_cache_lock = threading.Lock()
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a geocoding query so that trivially different spellings share a cache entry.
+
+    Example:
+        >>> normalize_query("  Les Terrasses d’Eze ,")
+        "les terrasses d'eze"
+    """
+    text = unicodedata.normalize("NFKC", query).translate(_QUOTES)
+    text = re.sub(r"\s+", " ", text.casefold())
+    return text.strip(" ,;.")
+
+
+def get_geocode_cache() -> PersistentCache:
+    """Returns the process-wide geocode cache, creating it on first use."""
+    global _geocode_cache
+    with _geocode_cache_lock:
+        if _geocode_cache is None:
+            _geocode_cache = PersistentCache(
+                os.path.join(get_cache_dir(), "geocode.sqlite"),
+                ttl_seconds=GEOCODE_CACHE_TTL_DAYS * 86400,
+                max_entries=GEOCODE_CACHE_MAX_ENTRIES,
+            )
+    return _geocode_cache
+
+
+def cached_geocode(client, query: str) -> list:
+    """
+    Geocodes a query through the shared on-disk cache.
+
+    Args:
+        client (googlemaps.Client): Client used on a cache miss.
+        query (str): Free-text place name.
+
+    Returns:
+        list: The raw Google Maps geocode result (possibly empty, empty results are not cached).
+    """
+    cache = get_geocode_cache()
+    key = normalize_query(query)
+    hit, result = cache.lookup(key)
+    if hit:
+        return result
+    result = client.geocode(query)
+    # No result may be a transient failure or a typo fixed upstream: it is not cached
+    if result:
+        cache.set(key, result)
+    return result
+
+
+async def acached_geocode(client, query: str) -> list:
+    """
+    Async version of `cached_geocode`.
+    The SQLite cache is read and written in a worker thread, so the event loop is not blocked.
+
+    Args:
+        client (AsyncMapsClient): Async client used on a cache miss.
+        query (str): Free-text place name.
+    """
+    cache = get_geocode_cache()
+    key = normalize_query(query)
+    hit, result = await asyncio.to_thread(cache.lookup, key)
+    if hit:
+        return result
+    result = await client.geocode(query)
+    if result:
+        await asyncio.to_thread(cache.set, key, result)
+    return result
@@ -0,0 +1,144 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088  # mean Earth radius
+
+# WGS-84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = (1 - WGS84_F) * WGS84_A
+
+
+def points_to_array(points) -> np.ndarray:
+    """
+    Converts points to a (n, 2) array of [latitude, longitude] in degrees.
+
+    Args:
+        points: A list of dicts with "latitude"/"longitude" (or "lat"/"lng") keys,
+            a list of (lat, lng) pairs or an array of shape (n, 2).
+    """
+    if isinstance(points, np.ndarray):
+        return np.asarray(points, dtype=float).reshape(-1, 2)
+    rows = []
+    for p in points:
+        if isinstance(p, dict):
+            lat = p["latitude"] if "latitude" in p else p["lat"]
+            lng = p["longitude"] if "longitude" in p else p["lng"]
+            rows.append((lat, lng))
+        else:
+            rows.append(tuple(p))
+    return np.asarray(rows, dtype=float).reshape(-1, 2)
+
+
+def haversine_matrix(origins, destinations) -> np.ndarray:
+    """
+    Great-circle distances on a spherical Earth for every origin/destination pair.
+
+    Args:
+        origins: Origin points (see `points_to_array`).
+        destinations: Destination points (see `points_to_array`).
+
+    Returns:
+        np.ndarray: Matrix of shape (len(origins), len(destinations)) in kilometers.
+    """
+    o = np.radians(points_to_array(origins))
+    d = np.radians(points_to_array(destinations))
+    lat1, lon1 = o[:, 0:1], o[:, 1:2]
+    lat2, lon2 = d[:, 0], d[:, 1]
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def vincenty_matrix(origins, destinations, max_iter: int = 100, tol: float = 1e-12) -> np.ndarray:
+    """
+    Geodesic distances on the WGS-84 ellipsoid (Vincenty inverse formula) for every pair.
+
+    The iteration runs on the whole matrix at once. Nearly antipodal pairs, for which
+    Vincenty does not converge, fall back to the haversine distance.
+
+    Args:
+        origins: Origin points (see `points_to_array`).
+        destinations: Destination points (see `points_to_array`).
+        max_iter (int): Maximum number of iterations.
+        tol (float): Convergence tolerance on lambda, in radians.
+
+    Returns:
+        np.ndarray: Matrix of shape (len(origins), len(destinations)) in kilometers.
+    """
+    o = np.radians(points_to_array(origins))
+    d = np.radians(points_to_array(destinations))
+    f, a, b = WGS84_F, WGS84_A, WGS84_B
+
+    shape = (len(o), len(d))
+    U1 = np.broadcast_to(np.arctan((1 - f) * np.tan(o[:, 0:1])), shape).ravel()
+    U2 = np.broadcast_to(np.arctan((1 - f) * np.tan(d[:, 0])), shape).ravel()
+    L = (d[:, 1] - o[:, 1:2]).ravel()
+    sinU1, cosU1 = np.sin(U1), np.cos(U1)
+    sinU2, cosU2 = np.sin(U2), np.cos(U2)
+
+    lam = L.copy()
+    converged = np.zeros(L.shape, dtype=bool)
+    active = np.arange(L.size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Only pairs that have not converged yet are iterated again
+        for _ in range(max_iter):
+            if active.size == 0:
+                break
+            lam_a = lam[active]
+            terms = _vincenty_terms(lam_a, sinU1[active], cosU1[active], sinU2[active], cosU2[active])
+            sin_alpha, cos2_alpha, sin_sigma, cos_sigma, sigma, cos_2sigma_m = terms
+            C = f / 16 * cos2_alpha * (4 + f * (4 - 3 * cos2_alpha))
+            lam_new = L[active] + (1 - C) * f * sin_alpha * (
+                sigma + C * sin_sigma * (cos_2sigma_m + C * cos_sigma * (-1 + 2 * cos_2sigma_m ** 2))
+            )
+            lam[active] = lam_new
+            done = np.abs(lam_new - lam_a) < tol
+            converged[active[done]] = True
+            active = active[~done]
+
+        sin_alpha, cos2_alpha, sin_sigma, cos_sigma, sigma, cos_2sigma_m = _vincenty_terms(lam, sinU1, cosU1, sinU2, cosU2)
+        u2 = cos2_alpha * (a ** 2 - b ** 2) / b ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        delta_sigma = B * sin_sigma * (
+            cos_2sigma_m + B / 4 * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m ** 2)
+                - B / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)
+            )
+        )
+        distance_km = (b * A * (sigma - delta_sigma) / 1000).reshape(shape)
+
+    converged = converged.reshape(shape)
+    fallback = ~converged | ~np.isfinite(distance_km)
+    if fallback.any():
+        distance_km = np.where(fallback, haversine_matrix(origins, destinations), distance_km)
+    return distance_km
+
+
+def _vincenty_terms(lam, sinU1, cosU1, sinU2, cosU2):
+    sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+    sin_sigma = np.sqrt((cosU2 * sin_lam) ** 2 + (cosU1 * sinU2 - sinU1 * cosU2 * cos_lam) ** 2)
+    cos_sigma = sinU1 * sinU2 + cosU1 * cosU2 * cos_lam
+    sigma = np.arctan2(sin_sigma, cos_sigma)
+    sin_alpha = np.where(sin_sigma == 0, 0.0, cosU1 * cosU2 * sin_lam / sin_sigma)
+    cos2_alpha = 1 - sin_alpha ** 2
+    # Equatorial lines have cos2_alpha == 0
+    cos_2sigma_m = np.where(cos2_alpha == 0, 0.0, cos_sigma - 2 * sinU1 * sinU2 / cos2_alpha)
+    return sin_alpha, cos2_alpha, sin_sigma, cos_sigma, sigma, cos_2sigma_m
+
+
+def great_circle_matrix(origins, destinations, method: str = "haversine") -> np.ndarray:
+    """
+    Dispatches to `haversine_matrix` or `vincenty_matrix`.
+
+    Args:
+        method (str): "haversine" (fast, ~0.5% error) or "vincenty" (ellipsoidal, sub-meter).
+    """
+    if method == "haversine":
+        return haversine_matrix(origins, destinations)
+    if method == "vincenty":
+        return vincenty_matrix(origins, destinations)
+    raise ValueError(f"Unknown method '{method}', expected 'haversine' or 'vincenty'")
@@ -0,0 +1,185 @@
+import json
+import logging
+import os
+from functools import lru_cache
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+logger = logging.getLogger(__name__)
+
+# Token budget of the history sent to an agent (system prompt excluded), HISTORY_TOKEN_BUDGET_<AGENT> overrides it
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "16000"))
+# Tool outputs of the current round are capped at this size, older (already consumed) ones at the smaller one
+TOOL_OUTPUT_MAX_CHARS = int(os.getenv("TOOL_OUTPUT_MAX_CHARS", "8000"))
+CONSUMED_TOOL_OUTPUT_MAX_CHARS = int(os.getenv("CONSUMED_TOOL_OUTPUT_MAX_CHARS", "600"))
+
+# Fixed cost of a message in the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Structured results handed from the initial assessment to the downstream agents
+STRUCTURED_RESULT_KEYS = ("position_analysis", "asset_dimensions")
+STRUCTURED_RESULTS_AGENT = "initial_asset_assessment"
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken downloads its vocabularies on first use, offline we fall back to an estimate
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens of a text, estimated as 4 characters per token when tiktoken is not available."""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message) -> int:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    tokens = MESSAGE_OVERHEAD_TOKENS + count_tokens(content)
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        tokens += count_tokens(tool_call["name"]) + count_tokens(json.dumps(tool_call["args"], default=str))
+    return tokens
+
+
+def history_budget(agent: str) -> int:
+    return int(os.getenv(f"HISTORY_TOKEN_BUDGET_{agent.upper()}", HISTORY_TOKEN_BUDGET))
+
+
+def _truncate(message: ToolMessage, max_chars: int) -> ToolMessage:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, default=str)
+    if len(content) <= max_chars:
+        return message
+    return message.model_copy(update={"content": f"{content[:max_chars]}... [truncated {len(content) - max_chars} chars]"})
+
+
+def compact_history(messages: list, budget: int) -> list:
+    """
+    Returns a copy of `messages` that fits in `budget` tokens, as far as possible.
+
+    Tool outputs are "consumed" once the model has answered after them, i.e. everything before
+    the pending round of tool calls (if the last AI message asked for tools). The first step is
+    always applied, the others only while the history is over budget:
+    1. outputs of the current round are capped at TOOL_OUTPUT_MAX_CHARS and consumed ones
+       at CONSUMED_TOOL_OUTPUT_MAX_CHARS;
+    2. consumed outputs are replaced by a one-line stub, oldest first;
+    3. whole consumed rounds (the AI message with the tool calls and its tool messages) are
+       dropped, oldest first.
+    Human messages, final AI answers and the current round are always kept, and every tool call
+    keeps its tool message, as the chat API requires.
+    """
+    last_ai = max((i for i, m in enumerate(messages) if isinstance(m, AIMessage)), default=None)
+    last_round = last_ai if last_ai is not None and messages[last_ai].tool_calls else len(messages)
+    compacted = [
+        _truncate(m, CONSUMED_TOOL_OUTPUT_MAX_CHARS if i < last_round else TOOL_OUTPUT_MAX_CHARS)
+        if isinstance(m, ToolMessage) else m
+        for i, m in enumerate(messages)
+    ]
+    tokens = [message_tokens(m) for m in compacted]
+    total = sum(tokens)
+    original = sum(message_tokens(m) for m in messages)
+
+    for i in range(last_round):
+        if total <= budget:
+            break
+        if isinstance(compacted[i], ToolMessage):
+            compacted[i] = compacted[i].model_copy(update={"content": f"[output of {compacted[i].name or 'tool'} omitted: already used]"})
+            total += message_tokens(compacted[i]) - tokens[i]
+            tokens[i] = message_tokens(compacted[i])
+
+    dropped = set()
+    for i in range(last_round):
+        if total <= budget:
+            break
+        message = compacted[i]
+        if isinstance(message, AIMessage) and message.tool_calls:
+            ids = {tool_call["id"] for tool_call in message.tool_calls}
+            group = [i] + [j for j in range(i + 1, last_round) if isinstance(compacted[j], ToolMessage) and compacted[j].tool_call_id in ids]
+            dropped.update(group)
+            total -= sum(tokens[j] for j in group)
+
+    result = [m for i, m in enumerate(compacted) if i not in dropped]
+    if total != original:
+        logger.debug("History compacted from %d to %d tokens (%d messages dropped)", original, total, len(dropped))
+    return result
+
+
+def section_messages(messages: list, agent: str) -> tuple:
+    """
+    Splits the history for `agent` into (shared, own) messages.
+
+    Agents tag their AI messages with their name, so the agent's own section is everything after
+    the last AI message of another agent (its own tool calls and tool results). Before that,
+    only the user requests and the final answers of the other agents are kept: their tool calls
+    and tool results have already been consumed.
+    """
+    start = 0
+    for i, message in enumerate(messages):
+        if isinstance(message, AIMessage) and message.name and message.name != agent:
+            start = i + 1
+    shared = [
+        m for m in messages[:start]
+        if isinstance(m, HumanMessage) or (isinstance(m, AIMessage) and m.name and not m.tool_calls)
+    ]
+    return shared, messages[start:]
+
+
+def branch_messages(state: dict, messages_key: str) -> tuple:
+    """
+    Splits the history of a graph branch that keeps its tool rounds in `state[messages_key]`
+    into (shared, own) messages.
+
+    Shared are the user requests and the final answers of the agents in `messages`; own are
+    the branch's rounds of the current run, i.e. after its last final answer.
+    """
+    own = state.get(messages_key) or []
+    start = max((i + 1 for i, m in enumerate(own) if isinstance(m, AIMessage) and not m.tool_calls), default=0)
+    shared = [
+        m for m in state.get("messages") or []
+        if isinstance(m, HumanMessage) or (isinstance(m, AIMessage) and m.name and not m.tool_calls)
+    ]
+    return shared, own[start:]
+
+
+def structured_context(state: dict):
+    """
+    Returns a message with the structured results already in the state (PositionAnalysis,
+    AssetDimensions), or None when there are none yet.
+    """
+    results = {}
+    for key in STRUCTURED_RESULT_KEYS:
+        value = state.get(key)
+        if value is not None:
+            results[key] = value.model_dump() if hasattr(value, "model_dump") else value
+    if not results:
+        return None
+    return HumanMessage(
+        content="Results of the previous analysis sections:\n" + json.dumps(results, ensure_ascii=False),
+        name="structured_results",
+    )
+
+
+def build_agent_messages(system_message, state: dict, agent: str, messages_key: str = "messages") -> list:
+    """
+    Builds the prompt of an agent step: system prompt, user requests, results of the previous
+    sections and the agent's own tool rounds, compacted to the agent's token budget.
+
+    When the structured results are in the state they replace the final answer of the
+    initial assessment, so downstream agents only get PositionAnalysis and AssetDimensions.
+    Agents running as a branch of the graph pass the channel of their tool rounds as `messages_key`.
+    """
+    if messages_key == "messages":
+        shared, own = section_messages(state["messages"], agent)
+    else:
+        shared, own = branch_messages(state, messages_key)
+    context = structured_context(state)
+    if context is not None:
+        shared = [m for m in shared if not (isinstance(m, AIMessage) and m.name == STRUCTURED_RESULTS_AGENT)]
+        shared.append(context)
+    return [system_message] + compact_history(shared + own, history_budget(agent))
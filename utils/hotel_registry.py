@@ -0,0 +1,241 @@
+"""
+Local registry of hotels with a grid spatial index, for instant competitive set candidates.
+
+Import a CSV or Parquet file once (columns: name, latitude, longitude and optionally stars,
+category, number_of_rooms, total_surface_area_sqm, amenities, brand, city, country, website):
+
+    python -m utils.hotel_registry hotels.csv
+    python -m utils.hotel_registry hotels.parquet --output data/hotel_registry.npz
+
+The registry is saved as a compressed NumPy archive (HOTEL_REGISTRY_PATH, default
+.cache/hotel_registry.npz) and loaded once per process by `get_hotel_registry()`.
+"""
+import argparse
+import csv
+import math
+import os
+import threading
+
+import numpy as np
+
+from utils.common import get_cache_dir
+from utils.geocode_cache import normalize_query
+from utils.spatial_index import GridIndex
+
+HOTEL_REGISTRY_PATH = os.getenv("HOTEL_REGISTRY_PATH")
+# Size of the grid cells in degrees (0.25° is about 28 km of latitude)
+HOTEL_REGISTRY_CELL_DEG = float(os.getenv("HOTEL_REGISTRY_CELL_DEG", "0.25"))
+
+# Registry field -> accepted column names in the imported files
+COLUMNS = {
+    "name": ("name", "hotel_name", "asset_name"),
+    "latitude": ("latitude", "lat"),
+    "longitude": ("longitude", "lng", "lon"),
+    "stars": ("stars", "star_rating", "rating"),
+    "category": ("category", "segment", "class"),
+    "number_of_rooms": ("number_of_rooms", "rooms", "keys"),
+    "total_surface_area_sqm": ("total_surface_area_sqm", "surface_sqm", "surface"),
+    "amenities": ("amenities", "main_amenities"),
+    "brand": ("brand", "chain"),
+    "city": ("city", "locality"),
+    "country": ("country",),
+    "website": ("website", "url"),
+}
+NUMERIC_FIELDS = ("stars", "number_of_rooms", "total_surface_area_sqm")
+TEXT_FIELDS = ("name", "category", "amenities", "brand", "city", "country", "website")
+
+
+def _to_float(value) -> float:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return math.nan
+    try:
+        return float(str(value).replace(",", "."))
+    except ValueError:
+        return math.nan
+
+
+def _amenities(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple, np.ndarray)):
+        items = value
+    else:
+        items = str(value).replace("|", ";").replace(",", ";").split(";")
+    return "; ".join(str(item).strip() for item in items if str(item).strip())
+
+
+class HotelRegistry:
+    """
+    Hotels held in NumPy columns, sorted by the cells of a `GridIndex` on their coordinates.
+    """
+
+    def __init__(self, columns: dict, cell_deg: float = HOTEL_REGISTRY_CELL_DEG):
+        self.index = GridIndex(columns["latitude"], columns["longitude"], cell_deg)
+        order = self.index.order
+        self.latitude = self.index.latitude
+        self.longitude = self.index.longitude
+        self.numeric = {field: np.asarray(columns[field], dtype=float)[order] for field in NUMERIC_FIELDS}
+        self.text = {field: np.asarray(columns[field], dtype=str)[order] for field in TEXT_FIELDS}
+        self._category = np.char.lower(self.text["category"])
+        self._normalized_names = None
+
+    def __len__(self):
+        return len(self.latitude)
+
+    # ---- import / persistence ----
+
+    @classmethod
+    def from_records(cls, records, **kwargs) -> "HotelRegistry":
+        """
+        Builds a registry from dicts (rows of a CSV/Parquet file), using the column aliases of COLUMNS.
+        Rows without a name or valid coordinates are skipped, duplicates (same name and place) are dropped.
+        """
+        columns = {field: [] for field in COLUMNS}
+        seen = set()
+        for record in records:
+            row = {}
+            for field, aliases in COLUMNS.items():
+                row[field] = next((record[alias] for alias in aliases if record.get(alias) not in (None, "")), None)
+            lat, lng = _to_float(row["latitude"]), _to_float(row["longitude"])
+            if not row["name"] or not (-90 <= lat <= 90) or not (-180 <= lng <= 360):
+                continue
+            key = (normalize_query(str(row["name"])), round(lat, 3), round(lng, 3))
+            if key in seen:
+                continue
+            seen.add(key)
+            columns["latitude"].append(lat)
+            columns["longitude"].append(lng)
+            for field in NUMERIC_FIELDS:
+                columns[field].append(_to_float(row[field]))
+            for field in TEXT_FIELDS:
+                value = _amenities(row[field]) if field == "amenities" else row[field]
+                columns[field].append("" if value is None else str(value).strip())
+        return cls(columns, **kwargs)
+
+    @classmethod
+    def from_csv(cls, path: str, **kwargs) -> "HotelRegistry":
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return cls.from_records(csv.DictReader(f), **kwargs)
+
+    @classmethod
+    def from_parquet(cls, path: str, **kwargs) -> "HotelRegistry":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Importing Parquet files requires pyarrow (pip install pyarrow)") from e
+        return cls.from_records(pq.read_table(path).to_pylist(), **kwargs)
+
+    @classmethod
+    def import_file(cls, path: str, **kwargs) -> "HotelRegistry":
+        """Builds a registry from a .csv or .parquet file."""
+        if path.lower().endswith((".parquet", ".pq")):
+            return cls.from_parquet(path, **kwargs)
+        return cls.from_csv(path, **kwargs)
+
+    def save(self, path: str):
+        """Saves the registry as a compressed NumPy archive (the index is rebuilt on load)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                latitude=self.latitude,
+                longitude=self.longitude,
+                **self.numeric,
+                **self.text,
+            )
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "HotelRegistry":
+        with np.load(path) as data:
+            return cls({field: data[field] for field in COLUMNS}, **kwargs)
+
+    # ---- queries ----
+
+    def _mask(self, indices, segment=None, min_stars=None, min_rooms=None, max_rooms=None, exclude_name=None):
+        mask = np.ones(len(indices), dtype=bool)
+        if segment:
+            mask &= np.char.find(self._category[indices], segment.lower()) >= 0
+        if min_stars is not None:
+            mask &= self.numeric["stars"][indices] >= min_stars
+        if min_rooms is not None:
+            mask &= self.numeric["number_of_rooms"][indices] >= min_rooms
+        if max_rooms is not None:
+            mask &= self.numeric["number_of_rooms"][indices] <= max_rooms
+        if exclude_name:
+            if self._normalized_names is None:
+                self._normalized_names = np.array([normalize_query(name) for name in self.text["name"]], dtype=str)
+            mask &= self._normalized_names[indices] != normalize_query(exclude_name)
+        return mask
+
+    def query(self, latitude: float, longitude: float, radius_km: float = None, top_k: int = None, **filters) -> list:
+        """
+        Hotels around a point, nearest first.
+
+        Args:
+            latitude (float): Latitude of the subject asset.
+            longitude (float): Longitude of the subject asset.
+            radius_km (float, optional): Maximum great-circle distance.
+            top_k (int, optional): Maximum number of hotels. With no radius, the k nearest hotels anywhere.
+            **filters: segment (substring of the category, e.g. "luxury"), min_stars, min_rooms,
+                max_rooms, exclude_name (the subject asset itself).
+
+        Returns:
+            list[dict]: The matching hotels with their distance_km.
+        """
+        indices, distances = self.index.query(
+            latitude, longitude, radius_km, top_k, mask=lambda indices: self._mask(indices, **filters)
+        )
+        return [self._record(index, distance) for index, distance in zip(indices, distances)]
+
+    def _record(self, index, distance) -> dict:
+        record = {
+            "name": str(self.text["name"][index]),
+            "latitude": round(float(self.latitude[index]), 6),
+            "longitude": round(float(self.longitude[index]), 6),
+            "distance_km": round(float(distance), 2),
+        }
+        for field in NUMERIC_FIELDS:
+            value = self.numeric[field][index]
+            if not np.isnan(value):
+                record[field] = int(value) if field == "number_of_rooms" else float(value)
+        for field in TEXT_FIELDS[1:]:
+            value = str(self.text[field][index])
+            if value:
+                record[field] = value.split("; ") if field == "amenities" else value
+        return record
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def registry_path() -> str:
+    return HOTEL_REGISTRY_PATH or os.path.join(get_cache_dir(), "hotel_registry.npz")
+
+
+def get_hotel_registry():
+    """Returns the process-wide `HotelRegistry`, or None if no registry has been imported yet."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            path = registry_path()
+            if not os.path.exists(path):
+                return None
+            _registry = HotelRegistry.load(path)
+    return _registry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import hotels from a CSV or Parquet file into the local registry.")
+    parser.add_argument("path", help="CSV or Parquet file")
+    parser.add_argument("--output", help=f"Registry file (default {registry_path()})")
+    args = parser.parse_args(argv)
+
+    registry = HotelRegistry.import_file(args.path)
+    output = args.output or registry_path()
+    registry.save(output)
+    print(f"Imported {len(registry)} hotels into {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import base64
+import os
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from utils.artifact_store import get_artifact_store, is_artifact_handle
+from utils.http_pool import get_session, HTTP_TIMEOUT
+
+
+def load_image_array(image_ref: str) -> np.ndarray:
+    """
+    Loads an image reference as an RGB uint8 array.
+
+    Args:
+        image_ref (str): An artifact handle (e.g. returned by `download_satellite_image`), a local file path,
+            an http(s) URL, or a base64-encoded PNG/JPEG (optionally as a "data:image/...;base64," URI).
+
+    Returns:
+        np.ndarray: HxWx3 uint8 RGB image.
+    """
+    if is_artifact_handle(image_ref):
+        array = np.asarray(get_artifact_store().get(image_ref))
+        if array.ndim == 3 and array.shape[2] == 3 and array.dtype == np.uint8:
+            return array
+        image = Image.fromarray(array)
+    elif os.path.exists(image_ref):
+        image = Image.open(image_ref)
+    elif image_ref.startswith(("http://", "https://")):
+        response = get_session().get(image_ref, timeout=HTTP_TIMEOUT)
+        response.raise_for_status()
+        image = Image.open(BytesIO(response.content))
+    else:
+        if image_ref.startswith("data:"):
+            image_ref = image_ref.split(",", 1)[1]
+        image = Image.open(BytesIO(base64.b64decode(image_ref)))
+    return np.array(image.convert("RGB"))
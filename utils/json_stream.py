@@ -0,0 +1,258 @@
+import json
+
+from pydantic import ValidationError
+
+WHITESPACE = " \t\r\n"
+CLOSING = {"{": "}", "[": "]"}
+
+
+class MalformedOutputError(ValueError):
+    """
+    Raised as soon as the model output can no longer become the expected JSON object.
+
+    Attributes:
+        key (str): Top-level key being parsed when the error was found, if any.
+        partial (str): Text received up to the error.
+    """
+
+    def __init__(self, message: str, key: str = None, partial: str = ""):
+        super().__init__(message)
+        self.key = key
+        self.partial = partial
+
+
+class StreamingJSONParser:
+    """
+    Incremental parser of the first JSON object in a text received in chunks (e.g. streamed tokens).
+
+    Text before the object (prose, code fences) is skipped and text after it is ignored. Each
+    top-level value is decoded as soon as it is complete and validated against the pydantic model
+    of its key, so a wrong structure, invalid JSON or a value that breaks the schema raises
+    `MalformedOutputError` while the model is still writing the rest of the answer.
+
+    Usage Example:
+        parser = StreamingJSONParser({"position_analysis": PositionAnalysis})
+        for chunk in chunks:
+            parser.feed(chunk)      # returns the keys completed by this chunk
+        parser.close()              # raises if the object is truncated or a key is missing
+        parser.validated["position_analysis"]
+    """
+
+    def __init__(self, schemas: dict = None, required=None):
+        """
+        Args:
+            schemas (dict, optional): Top-level key -> pydantic model used to validate its value.
+            required (list[str], optional): Keys that must be present, all the keys of `schemas` by default.
+        """
+        self.schemas = schemas or {}
+        self.required = list(self.schemas) if required is None else list(required)
+        self.text = ""
+        self.values = {}      # key -> decoded JSON value
+        self.validated = {}   # key -> pydantic model instance, for the keys with a schema
+        self.done = False
+        self._pos = 0
+        self._state = "before"
+        self._stack = []
+        self._in_string = False
+        self._escape = False
+        self._start = None
+        self._key = None
+
+    def feed(self, chunk: str) -> list:
+        """
+        Parses a new chunk of text.
+
+        Returns:
+            list[str]: The top-level keys whose value was completed (and validated) by this chunk.
+
+        Raises:
+            MalformedOutputError: If the text received so far cannot be the start of a valid object.
+        """
+        self.text += chunk or ""
+        completed = []
+        text = self.text
+        while self._pos < len(text) and not self.done:
+            char = text[self._pos]
+            state = self._state
+            if state == "before":
+                if char == "{":
+                    self._state = "first_key"
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if state == "key_string":
+                        self._key = self._decode(text[self._start:self._pos + 1], "key")
+                        self._state = "colon"
+                    elif state == "value" and not self._stack:
+                        completed.append(self._complete(text[self._start:self._pos + 1]))
+            elif state in ("first_key", "key"):
+                if char == '"':
+                    self._start, self._in_string, self._state = self._pos, True, "key_string"
+                elif char == "}" and state == "first_key":
+                    self.done = True
+                elif char not in WHITESPACE:
+                    if state == "first_key":
+                        # A brace in the prose before the object, e.g. "{name}": look for the next one
+                        self._state = "before"
+                    else:
+                        self._fail(f"expected a key string, got {char!r}")
+            elif state == "colon":
+                if char == ":":
+                    self._state = "value_start"
+                elif char not in WHITESPACE:
+                    self._fail(f"expected ':' after key {self._key!r}, got {char!r}")
+            elif state == "value_start":
+                if char not in WHITESPACE:
+                    if char in ",}]:":
+                        self._fail(f"missing value for key {self._key!r}")
+                    self._start, self._state = self._pos, "value"
+                    if char in CLOSING:
+                        self._stack.append(char)
+                    elif char == '"':
+                        self._in_string = True
+            elif state == "value":
+                if self._stack:
+                    if char == '"':
+                        self._in_string = True
+                    elif char in CLOSING:
+                        self._stack.append(char)
+                    elif char in "}]":
+                        if CLOSING[self._stack.pop()] != char:
+                            self._fail(f"unexpected {char!r} in the value of {self._key!r}")
+                        if not self._stack:
+                            completed.append(self._complete(text[self._start:self._pos + 1]))
+                elif char in WHITESPACE + ",}":
+                    # End of a number, true, false or null
+                    completed.append(self._complete(text[self._start:self._pos]))
+                    continue
+            elif state == "after_value":
+                if char == ",":
+                    self._state = "key"
+                elif char == "}":
+                    self.done = True
+                elif char not in WHITESPACE:
+                    self._fail(f"expected ',' or '}}' after the value of {self._key!r}, got {char!r}")
+            self._pos += 1
+        return completed
+
+    def close(self) -> dict:
+        """
+        Checks that a whole object was received and that every required key is present.
+
+        Returns:
+            dict: The decoded top-level values.
+
+        Raises:
+            MalformedOutputError: If no object was found, the object is truncated or a required key is missing.
+        """
+        if self._state == "before" or (self._state == "first_key" and not self.done):
+            raise MalformedOutputError("no JSON object in the output", partial=self.text)
+        if not self.done:
+            self._fail("the JSON object is truncated")
+        missing = [key for key in self.required if key not in self.values]
+        if missing:
+            raise MalformedOutputError(f"missing keys: {', '.join(missing)}", partial=self.text)
+        return self.values
+
+    def _complete(self, raw: str) -> str:
+        key = self._key
+        value = self._decode(raw, key)
+        schema = self.schemas.get(key)
+        if schema is not None:
+            try:
+                self.validated[key] = schema.model_validate(value)
+            except ValidationError as e:
+                raise MalformedOutputError(f"invalid {key}: {e}", key=key, partial=self.text[:self._pos + 1]) from e
+        self.values[key] = value
+        self._state = "after_value"
+        return key
+
+    def _decode(self, raw: str, key):
+        try:
+            return json.loads(raw)
+        except ValueError as e:
+            raise MalformedOutputError(f"invalid JSON for {key!r}: {e}", key=key, partial=self.text[:self._pos + 1]) from e
+
+    def _fail(self, message: str):
+        raise MalformedOutputError(message, key=self._key, partial=self.text[:self._pos + 1])
+
+
+def extract_json(text: str, schemas: dict = None) -> dict:
+    """
+    Extracts the first JSON object from a model output, e.g. a final answer wrapped in a code fence.
+
+    Args:
+        text (str): The model output.
+        schemas (dict, optional): Top-level key -> pydantic model; these keys are required and validated.
+
+    Returns:
+        dict: The decoded object.
+
+    Raises:
+        MalformedOutputError: If there is no valid object in the text.
+    """
+    parser = StreamingJSONParser(schemas)
+    parser.feed(text)
+    return parser.close()
+
+
+def _uses_response_cache(model) -> bool:
+    # Bound models (bind_tools) wrap the chat model
+    return bool(getattr(getattr(model, "bound", model), "cache", None))
+
+
+def stream_json_answer(model, messages, parser: StreamingJSONParser, fail_fast: bool = True, config=None):
+    """
+    Streams a model answer, feeding its text to `parser` while it arrives.
+
+    If the answer turns into tool calls the parser is left alone and the message is returned as is.
+    Models with a response cache (utils.llm_cache) are invoked instead, since streaming bypasses the cache.
+
+    Args:
+        model: Chat model, possibly with bound tools.
+        messages (list): Input messages.
+        parser (StreamingJSONParser): Parser of the final answer.
+        fail_fast (bool): Stop the stream at the first error. With False the whole answer is received first.
+        config (dict, optional): Runnable config passed to the model.
+
+    Returns:
+        AIMessage: The complete answer.
+
+    Raises:
+        MalformedOutputError: If the final answer is not a valid object; `error.message` holds the
+            message received so far.
+    """
+    from langchain_core.messages.utils import message_chunk_to_message
+
+    chunks = [model.invoke(messages, config=config)] if _uses_response_cache(model) else model.stream(messages, config=config)
+    message = None
+    error = None
+    tool_calls = False
+    for chunk in chunks:
+        message = chunk if message is None else message + chunk
+        tool_calls = tool_calls or bool(getattr(chunk, "tool_call_chunks", None) or getattr(chunk, "tool_calls", None))
+        if tool_calls or error is not None:
+            continue
+        try:
+            parser.feed(chunk.content if isinstance(chunk.content, str) else "")
+        except MalformedOutputError as e:
+            error = e
+            if fail_fast:
+                break
+    if hasattr(chunks, "close"):
+        # Stops the HTTP response when the loop ended early
+        chunks.close()
+    message = message_chunk_to_message(message)
+    if not tool_calls:
+        try:
+            if error is not None:
+                raise error
+            parser.close()
+        except MalformedOutputError as e:
+            e.message = message
+            raise
+    return message
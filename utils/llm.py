@@ -0,0 +1,286 @@
+import asyncio
+import os
+import re
+import threading
+import weakref
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Pool and limits shared by every chat model of the process
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "32"))
+# Maximum number of in-flight requests to Azure OpenAI, across all deployments and per deployment
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_MAX_CONCURRENCY_PER_DEPLOYMENT = int(os.getenv("LLM_MAX_CONCURRENCY_PER_DEPLOYMENT", "8"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+
+_DEPLOYMENT_RE = re.compile(r"/deployments/([^/]+)/")
+
+
+def _deployment_of(request: httpx.Request) -> str:
+    match = _DEPLOYMENT_RE.search(request.url.path)
+    return match.group(1) if match else request.url.host
+
+
+class ConcurrencyLimiter:
+    """
+    Global and per-deployment limits on the in-flight LLM requests.
+
+    A slot is taken when the request is sent and released when the response body has been
+    read or closed, so streamed completions hold their slot until the last token.
+    Sync callers share threading semaphores; async callers get asyncio semaphores per event loop.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_deployment: int):
+        self.max_concurrency = max_concurrency
+        self.max_per_deployment = max_per_deployment
+        self._lock = threading.Lock()
+        self._sync_global = threading.BoundedSemaphore(max_concurrency)
+        self._sync_deployments = {}
+        self._async = weakref.WeakKeyDictionary()
+
+    def sync_semaphores(self, deployment: str) -> tuple:
+        with self._lock:
+            if deployment not in self._sync_deployments:
+                self._sync_deployments[deployment] = threading.BoundedSemaphore(self.max_per_deployment)
+            return self._sync_global, self._sync_deployments[deployment]
+
+    def async_semaphores(self, deployment: str) -> tuple:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            global_sem, deployments = self._async.setdefault(loop, (asyncio.Semaphore(self.max_concurrency), {}))
+            if deployment not in deployments:
+                deployments[deployment] = asyncio.Semaphore(self.max_per_deployment)
+            return global_sem, deployments[deployment]
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
+
+
+def _release_once(*semaphores):
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            for semaphore in semaphores:
+                semaphore.release()
+
+    return release
+
+
+class LimitedTransport(httpx.HTTPTransport):
+    """`httpx.HTTPTransport` that waits for a free slot of the `ConcurrencyLimiter` before sending."""
+
+    def __init__(self, limiter: ConcurrencyLimiter, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        global_sem, deployment_sem = self.limiter.sync_semaphores(_deployment_of(request))
+        # Per-deployment first, so a throttled deployment does not hold global slots while waiting
+        deployment_sem.acquire()
+        global_sem.acquire()
+        release = _release_once(global_sem, deployment_sem)
+        try:
+            response = super().handle_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+
+class AsyncLimitedTransport(httpx.AsyncHTTPTransport):
+    """Async counterpart of `LimitedTransport`."""
+
+    def __init__(self, limiter: ConcurrencyLimiter, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        global_sem, deployment_sem = self.limiter.async_semaphores(_deployment_of(request))
+        await deployment_sem.acquire()
+        try:
+            await global_sem.acquire()
+        except BaseException:
+            deployment_sem.release()
+            raise
+        release = _release_once(global_sem, deployment_sem)
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+        response.stream = _AsyncReleasingStream(response.stream, release)
+        return response
+
+
+_limiter = ConcurrencyLimiter(LLM_MAX_CONCURRENCY, LLM_MAX_CONCURRENCY_PER_DEPLOYMENT)
+_clients = None
+_clients_lock = threading.Lock()
+_models = {}
+_models_lock = threading.Lock()
+
+
+def get_concurrency_limiter() -> ConcurrencyLimiter:
+    """Returns the limiter shared by every chat model of the process."""
+    return _limiter
+
+
+def get_llm_http_clients() -> tuple:
+    """
+    Returns the process-wide (`httpx.Client`, `httpx.AsyncClient`) pair used by the chat models,
+    with keep-alive connection pools and the concurrency limits applied by their transports.
+    Like every httpx.AsyncClient, the async one must be used from a single event loop.
+    """
+    global _clients
+    with _clients_lock:
+        if _clients is None:
+            limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_KEEPALIVE)
+            _clients = (
+                httpx.Client(timeout=LLM_TIMEOUT, transport=LimitedTransport(_limiter, limits=limits)),
+                httpx.AsyncClient(timeout=LLM_TIMEOUT, transport=AsyncLimitedTransport(_limiter, limits=limits)),
+            )
+    return _clients
+
+
+def agent_settings(agent: str = None) -> dict:
+    """
+    Returns the model settings of an agent.
+
+    The defaults come from the usual AZURE_OPENAI_* variables; an agent can override the
+    deployment and the temperature with LLM_<AGENT>_DEPLOYMENT and LLM_<AGENT>_TEMPERATURE,
+    e.g. LLM_COMPETITIVE_SET_DEPLOYMENT=gpt-4o-mini.
+    """
+    settings = {
+        "azure_deployment": os.getenv("AZURE_OPENAI_MODEL"),
+        "api_version": os.getenv("OPENAI_API_VERSION"),
+        "api_key": os.getenv("AZURE_OPENAI_API_KEY"),
+        "azure_endpoint": os.getenv("AZURE_OPENAI_ENDPOINT"),
+    }
+    temperature = os.getenv("LLM_TEMPERATURE")
+    if agent:
+        prefix = f"LLM_{agent.upper()}_"
+        settings["azure_deployment"] = os.getenv(prefix + "DEPLOYMENT", settings["azure_deployment"])
+        temperature = os.getenv(prefix + "TEMPERATURE", temperature)
+    if temperature is not None:
+        settings["temperature"] = float(temperature)
+    return settings
+
+
+def get_chat_model(agent: str = None, **overrides):
+    """
+    Returns the `AzureChatOpenAI` of an agent, built once and sharing the pooled, rate-limited HTTP clients.
+
+    Args:
+        agent (str): Name of the agent (e.g. "competitive_set"), used to look up its overrides.
+        **overrides: Extra `AzureChatOpenAI` arguments (e.g. azure_deployment, temperature, cache) that
+            take precedence over the environment.
+
+    The response cache configured with LLM_CACHE (see utils.llm_cache) is attached to every model.
+
+    Usage Example:
+        model = get_chat_model("detailed_development_analysis", temperature=0)
+    """
+    key = (agent, tuple(sorted(overrides.items())))
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            from langchain_openai import AzureChatOpenAI
+
+            from utils.llm_cache import get_llm_cache
+
+            # stream_usage keeps the token usage in streamed answers (see TokenUsageHandler)
+            settings = {
+                **agent_settings(agent),
+                "max_retries": LLM_MAX_RETRIES,
+                "cache": get_llm_cache(),
+                "stream_usage": True,
+                **overrides,
+            }
+            if getattr(settings["cache"], "strict", False):
+                # Replay runs never reach the provider, so they do not need real credentials
+                settings["api_key"] = settings.get("api_key") or "replay"
+                settings["azure_endpoint"] = settings.get("azure_endpoint") or "https://replay.invalid"
+            http_client, http_async_client = get_llm_http_clients()
+            model = AzureChatOpenAI(
+                **settings,
+                http_client=http_client,
+                http_async_client=http_async_client,
+            )
+            _models[key] = model
+    return model
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """
+    Callback that sums the token usage of the chat model calls of a run, per graph node.
+
+    Usage Example:
+        usage = TokenUsageHandler()
+        graph.invoke(inputs, config={"callbacks": [usage]})
+        usage.totals  # {"input_tokens": ..., "cached_input_tokens": ..., "output_tokens": ..., "calls": ...}
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = {}
+        self.by_node = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        with self._lock:
+            self._nodes[run_id] = (metadata or {}).get("langgraph_node", "unknown")
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        usage = {}
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or usage
+        with self._lock:
+            node = self._nodes.pop(run_id, "unknown")
+            counters = self.by_node.setdefault(node, {"input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0, "calls": 0})
+            counters["input_tokens"] += usage.get("input_tokens", 0)
+            counters["cached_input_tokens"] += (usage.get("input_token_details") or {}).get("cache_read", 0)
+            counters["output_tokens"] += usage.get("output_tokens", 0)
+            counters["calls"] += 1
+
+    @property
+    def totals(self) -> dict:
+        with self._lock:
+            totals = {"input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0, "calls": 0}
+            for counters in self.by_node.values():
+                for key in totals:
+                    totals[key] += counters[key]
+        return totals
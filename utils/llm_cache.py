@@ -0,0 +1,198 @@
+import ast
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from langchain_core.caches import BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration
+
+from utils.common import get_cache_dir
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH")
+LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "512"))
+
+# off: no cache, on: read and write, replay: read only and every miss is an error
+CACHE_MODES = ("off", "on", "replay")
+
+# Model settings that change the answer; endpoint, retries and secrets are left out of the key
+KEY_MODEL_FIELDS = ("deployment_name", "model_name", "temperature", "top_p", "max_tokens", "seed", "n", "model_kwargs")
+# Message fields that differ between two runs with the same conversation
+VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+class LLMCacheMiss(RuntimeError):
+    """Raised in replay mode when a model call is not in the cache."""
+
+
+def _normalize_messages(messages):
+    normalized = []
+    for message in messages:
+        if isinstance(message, dict) and isinstance(message.get("kwargs"), dict):
+            message = {**message, "kwargs": {k: v for k, v in message["kwargs"].items() if k not in VOLATILE_MESSAGE_FIELDS}}
+        normalized.append(message)
+    return normalized
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Hash of (deployment and generation settings, system prompt and messages, bound tool schemas).
+
+    `prompt` is the LangChain serialization of the messages and `llm_string` the serialized model
+    followed by the call parameters (tools, tool_choice, stop...). Message ids and response
+    metadata are dropped, so replaying the same conversation gives the same key.
+    """
+    config, _, params = llm_string.partition("---")
+    try:
+        kwargs = json.loads(config).get("kwargs", {})
+        model = {field: kwargs.get(field) for field in KEY_MODEL_FIELDS if field in kwargs}
+    except (ValueError, AttributeError):
+        model = config
+    try:
+        params = dict(ast.literal_eval(params))
+    except (ValueError, SyntaxError, TypeError):
+        pass
+    try:
+        messages = _normalize_messages(json.loads(prompt))
+    except ValueError:
+        messages = prompt
+    payload = json.dumps({"model": model, "params": params, "messages": messages}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Exact-match cache of chat model answers in a local SQLite file, for LangChain's `cache=` hook.
+
+    Entries are evicted least recently used first when the file holds more than `max_bytes`
+    of answers. With `strict=True` (replay mode) a miss raises `LLMCacheMiss` instead of
+    letting the call go to the provider, and nothing is written.
+    """
+
+    def __init__(self, path: str, max_bytes: int = None, strict: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.strict = strict
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                   key TEXT PRIMARY KEY,
+                   value TEXT NOT NULL,
+                   size INTEGER NOT NULL,
+                   created_at REAL NOT NULL,
+                   last_access REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_access ON llm_cache(last_access)")
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = cache_key(prompt, llm_string)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+            else:
+                self._conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+                self.hits += 1
+        if row is None:
+            if self.strict:
+                raise LLMCacheMiss(f"LLM cache miss in replay mode (key {key[:12]}, cache {self.path})")
+            return None
+        return [
+            ChatGeneration(message=messages_from_dict([generation["message"]])[0], generation_info=generation["generation_info"])
+            for generation in json.loads(row[0])
+        ]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        if self.strict:
+            return
+        key = cache_key(prompt, llm_string)
+        payload = json.dumps(
+            [{"message": message_to_dict(g.message), "generation_info": g.generation_info} for g in return_val],
+            default=str,
+        )
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            if self.max_bytes is not None:
+                # Keep the most recently used entries whose cumulative size fits in max_bytes
+                self._conn.execute(
+                    """DELETE FROM llm_cache WHERE key IN (
+                           SELECT key FROM (
+                               SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS cumulative
+                               FROM llm_cache
+                           ) WHERE cumulative > ?
+                       )""",
+                    (self.max_bytes,),
+                )
+            self._conn.commit()
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns cache statistics.
+
+        Returns:
+            dict: hits, misses, hit_rate, the number of stored answers and their size in bytes.
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache(mode: str = None):
+    """
+    Returns the process-wide LLM cache for `mode` (default: the LLM_CACHE variable), or None when it is off.
+
+    Modes:
+        off: every call goes to the provider.
+        on: answers are read from and written to the cache (LLM_CACHE_PATH, default .cache/llm.sqlite).
+        replay: answers are only read from the cache and a miss raises `LLMCacheMiss`,
+            for deterministic regression runs without network.
+    """
+    global _llm_cache
+    mode = (mode or os.getenv("LLM_CACHE", "off")).lower()
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown LLM cache mode {mode!r}, expected one of {', '.join(CACHE_MODES)}")
+    if mode == "off":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None or _llm_cache.strict != (mode == "replay"):
+            _llm_cache = SQLiteLLMCache(
+                LLM_CACHE_PATH or os.path.join(get_cache_dir(), "llm.sqlite"),
+                max_bytes=int(LLM_CACHE_MAX_MB * 1024 * 1024),
+                strict=mode == "replay",
+            )
+    return _llm_cache
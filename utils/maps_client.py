@@ -0,0 +1,67 @@
+import os
+
+from utils.http_pool import get_async_client
+
+GEOCODE_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+DISTANCE_MATRIX_URL = "https://maps.googleapis.com/maps/api/distancematrix/json"
+
+
+class AsyncMapsClient:
+    """
+    Minimal async counterpart of `googlemaps.Client` for the endpoints used by the tools.
+
+    Responses have the same shape as the googlemaps ones, so `geocode` returns the list
+    of results and `distance_matrix` returns the whole response body.
+    Requests go through the shared httpx connection pool.
+    """
+
+    def __init__(self, key=None):
+        self.key = key or os.getenv("GOOGLE_API_KEY")
+
+    async def geocode(self, address: str) -> list:
+        body = await self._get(GEOCODE_URL, {"address": address})
+        return body.get("results", [])
+
+    async def distance_matrix(self, origins: list, destinations: list, mode: str = "driving") -> dict:
+        params = {
+            "origins": "|".join(f"{lat},{lng}" for lat, lng in origins),
+            "destinations": "|".join(f"{lat},{lng}" for lat, lng in destinations),
+            "mode": mode,
+        }
+        return await self._get(DISTANCE_MATRIX_URL, params)
+
+    async def _get(self, url: str, params: dict) -> dict:
+        response = await get_async_client().get(url, params={**params, "key": self.key})
+        response.raise_for_status()
+        body = response.json()
+        if body.get("status") not in ("OK", "ZERO_RESULTS"):
+            raise RuntimeError(f"Google Maps API error: {body.get('status')} - {body.get('error_message', '')}")
+        return body
+
+
+_async_maps_client = None
+
+
+def get_async_maps_client() -> AsyncMapsClient:
+    """Returns the process-wide `AsyncMapsClient`."""
+    global _async_maps_client
+    if _async_maps_client is None:
+        _async_maps_client = AsyncMapsClient()
+    return _async_maps_client
+
+
+_maps_client = None
+
+
+def get_maps_client():
+    """
+    Returns the process-wide `googlemaps.Client`, created on first use and sharing
+    the pooled `requests.Session`.
+    """
+    global _maps_client
+    if _maps_client is None:
+        import googlemaps
+        from utils.http_pool import get_session
+
+        _maps_client = googlemaps.Client(key=os.getenv("GOOGLE_API_KEY"), requests_session=get_session())
+    return _maps_client
@@ -0,0 +1,104 @@
+import numpy as np
+
+
+def encode_rle(mask: np.ndarray) -> dict:
+    """
+    Encodes a binary mask as a COCO-style compressed run-length encoding.
+
+    Runs are taken in column-major order and always start with a run of zeros,
+    so the encoding is compatible with `pycocotools.mask`.
+
+    Args:
+        mask (np.ndarray): HxW binary mask.
+
+    Returns:
+        dict: {"size": [h, w], "counts": str}. Its size grows with the mask boundary, not the pixel count.
+    """
+    mask = np.asarray(mask).astype(bool)
+    h, w = mask.shape
+    flat = mask.ravel(order="F")
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    runs = np.diff(np.concatenate(([0], changes, [flat.size])))
+    if flat.size and flat[0]:
+        runs = np.concatenate(([0], runs))
+    return {"size": [int(h), int(w)], "counts": _counts_to_string(runs.tolist())}
+
+
+def decode_rle(rle: dict) -> np.ndarray:
+    """Decodes an RLE produced by `encode_rle` back to an HxW boolean mask."""
+    h, w = rle["size"]
+    counts = np.asarray(rle_counts(rle), dtype=np.int64)
+    values = np.zeros(len(counts), dtype=bool)
+    values[1::2] = True
+    flat = np.repeat(values, counts)
+    return flat.reshape((w, h)).T
+
+
+def rle_counts(rle: dict) -> list:
+    """Returns the run lengths of an RLE, whether its counts are compressed or a plain list."""
+    counts = rle["counts"]
+    return _string_to_counts(counts) if isinstance(counts, str) else list(counts)
+
+
+def rle_area(rle: dict) -> int:
+    """Number of foreground pixels, computed from the runs without decoding the mask."""
+    return int(sum(rle_counts(rle)[1::2]))
+
+
+def rle_bbox(rle: dict):
+    """
+    Bounding box of the foreground, computed from the runs without decoding the mask.
+
+    Returns:
+        list | None: [x0, y0, x1, y1] in pixels (inclusive), or None for an empty mask.
+    """
+    h, _ = rle["size"]
+    counts = np.asarray(rle_counts(rle), dtype=np.int64)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    fg = (np.arange(len(counts)) % 2 == 1) & (counts > 0)
+    if not fg.any():
+        return None
+    first, last = starts[fg], ends[fg] - 1
+    col_first, col_last = first // h, last // h
+    spans_columns = col_first != col_last
+    # A run that wraps to the next column touches both the bottom and the top row
+    row_min = np.where(spans_columns, 0, first % h).min()
+    row_max = np.where(spans_columns, h - 1, last % h).max()
+    return [int(col_first.min()), int(row_min), int(col_last.max()), int(row_max)]
+
+
+def _counts_to_string(counts: list) -> str:
+    # Same LEB128-like scheme as pycocotools' rleToString
+    chars = []
+    for i, x in enumerate(counts):
+        if i > 2:
+            x -= counts[i - 2]
+        more = True
+        while more:
+            c = x & 0x1F
+            x >>= 5
+            more = (x != -1) if (c & 0x10) else (x != 0)
+            if more:
+                c |= 0x20
+            chars.append(chr(c + 48))
+    return "".join(chars)
+
+
+def _string_to_counts(s: str) -> list:
+    counts = []
+    p = 0
+    while p < len(s):
+        x, k, more = 0, 0, True
+        while more:
+            c = ord(s[p]) - 48
+            x |= (c & 0x1F) << (5 * k)
+            more = bool(c & 0x20)
+            p += 1
+            k += 1
+            if not more and (c & 0x10):
+                x |= -1 << (5 * k)
+        if len(counts) > 2:
+            x += counts[-2]
+        counts.append(x)
+    return counts
@@ -0,0 +1,121 @@
+import os
+import threading
+
+import yaml
+from langchain_core.messages import SystemMessage
+
+from utils.history import count_tokens
+
+PROMPTS_DIR = os.getenv("PROMPTS_DIR", "prompts")
+COMMON_PROMPT_FILE = "common_prompt.yaml"
+
+
+class AgentPrompt:
+    """
+    The prompt of one agent, split in parts that are tokenized once when the file is loaded:
+    the static prefix shared by all the agents, the agent instructions, one block per section
+    and the final output format.
+    """
+
+    def __init__(self, agent: str, static_prefix: str, instructions: str, sections: dict, final_output: str):
+        self.agent = agent
+        self.static_prefix = static_prefix.strip()
+        self.instructions = instructions.strip()
+        self.sections = {name: text.strip() for name, text in sections.items()}
+        self.final_output = final_output.strip()
+        self.tokens = {
+            "static_prefix": count_tokens(self.static_prefix),
+            "instructions": count_tokens(self.instructions),
+            "final_output": count_tokens(self.final_output),
+            **{f"section:{name}": count_tokens(text) for name, text in self.sections.items()},
+        }
+
+    def render(self, sections=None) -> str:
+        """
+        Assembles the system prompt with only the given sections (all of them by default).
+        Static parts come first and sections keep the order of the file, so the same request
+        always produces the same bytes.
+        """
+        names = list(self.sections) if sections is None else [name for name in self.sections if name in set(sections)]
+        unknown = set(sections or ()) - set(self.sections)
+        if unknown:
+            raise KeyError(f"Unknown sections for {self.agent}: {sorted(unknown)}")
+        parts = [self.static_prefix, self.instructions] + [self.sections[name] for name in names] + [self.final_output]
+        return "\n\n".join(part for part in parts if part) + "\n"
+
+    def token_count(self, sections=None) -> int:
+        """Tokens of `render(sections)`, from the counts computed at load time (separators excluded)."""
+        names = list(self.sections) if sections is None else sections
+        return (
+            self.tokens["static_prefix"] + self.tokens["instructions"] + self.tokens["final_output"]
+            + sum(self.tokens[f"section:{name}"] for name in names)
+        )
+
+
+class PromptRegistry:
+    """
+    Loads `prompts/<agent>_prompt.yaml` once per agent and hands out the system messages.
+
+    The same SystemMessage object is returned for the same (agent, sections), so every step of
+    a ReAct loop reuses it instead of assembling the prompt again.
+    """
+
+    def __init__(self, directory: str = PROMPTS_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._prompts = {}
+        self._messages = {}
+        self._static_prefix = None
+
+    def _load_yaml(self, filename: str) -> dict:
+        with open(os.path.join(self.directory, filename), "r", encoding="utf-8") as stream:
+            return yaml.safe_load(stream) or {}
+
+    def get(self, agent: str) -> AgentPrompt:
+        with self._lock:
+            prompt = self._prompts.get(agent)
+            if prompt is None:
+                if self._static_prefix is None:
+                    self._static_prefix = self._load_yaml(COMMON_PROMPT_FILE).get("static_prefix", "")
+                config = self._load_yaml(f"{agent}_prompt.yaml")
+                prompt = AgentPrompt(
+                    agent,
+                    self._static_prefix,
+                    config.get("instructions", ""),
+                    config.get("sections") or {},
+                    config.get("final_output", ""),
+                )
+                self._prompts[agent] = prompt
+            return prompt
+
+    def system_message(self, agent: str, sections=None) -> SystemMessage:
+        """
+        Returns the system message of an agent with only the given sections.
+
+        Args:
+            agent (str): Name of the agent, e.g. "competitive_set".
+            sections (list[str], optional): Sections needed by the current step, all of them by default.
+
+        Usage Example:
+            get_prompt_registry().system_message("initial_asset_assessment", ["position_analysis"])
+        """
+        key = (agent, None if sections is None else tuple(sections))
+        message = self._messages.get(key)
+        if message is None:
+            message = SystemMessage(content=self.get(agent).render(sections))
+            with self._lock:
+                message = self._messages.setdefault(key, message)
+        return message
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_prompt_registry() -> PromptRegistry:
+    """Returns the process-wide `PromptRegistry`."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = PromptRegistry()
+    return _registry
@@ -0,0 +1,119 @@
+import os
+import threading
+
+from utils.cache import PersistentCache
+from utils.common import get_cache_dir
+
+# Geohash length used to snap the points: 7 characters is a cell of about 150 x 150 m,
+# so the same hotel geocoded a few metres apart shares its routes
+ROUTE_CACHE_PRECISION = int(os.getenv("ROUTE_CACHE_PRECISION", "7"))
+# Road networks change slowly, traffic-free durations even more
+ROUTE_CACHE_TTL_DAYS = float(os.getenv("ROUTE_CACHE_TTL_DAYS", "30"))
+ROUTE_CACHE_MAX_ENTRIES = int(os.getenv("ROUTE_CACHE_MAX_ENTRIES", "200000"))
+# Reuse the B -> A route for A -> B (one-way streets make them differ slightly, so it is off by default)
+ROUTE_CACHE_SYMMETRIC = os.getenv("ROUTE_CACHE_SYMMETRIC", "0").lower() in ("1", "true", "yes")
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(latitude: float, longitude: float, precision: int = ROUTE_CACHE_PRECISION) -> str:
+    """
+    Encodes a point as a geohash of `precision` characters.
+
+    Example:
+        >>> geohash(43.7283, 7.3617, 7)
+        'spv0z82'
+    """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+class RouteCache:
+    """
+    Distance Matrix elements cached by (travel mode, snapped origin, snapped destination).
+
+    Only successful elements are stored, so failures are retried on the next request.
+    """
+
+    def __init__(self, store: PersistentCache, precision: int = ROUTE_CACHE_PRECISION, symmetric: bool = ROUTE_CACHE_SYMMETRIC):
+        self.store = store
+        self.precision = precision
+        self.symmetric = symmetric
+
+    def key(self, origin: tuple, destination: tuple, mode: str) -> str:
+        return f"{mode}:{geohash(*origin, self.precision)}:{geohash(*destination, self.precision)}"
+
+    def lookup(self, origin: tuple, destination: tuple, mode: str):
+        """
+        Returns:
+            tuple: (hit, element), trying the reverse route too when the cache is symmetric.
+        """
+        hit, element = self.store.lookup(self.key(origin, destination, mode))
+        if not hit and self.symmetric:
+            hit, element = self.store.lookup(self.key(destination, origin, mode))
+        return hit, element
+
+    def lookup_many(self, pairs: list, mode: str) -> dict:
+        """
+        Looks up several (origin, destination) pairs with one query (two when the cache is symmetric).
+
+        Returns:
+            dict: (origin, destination) -> element, for the pairs that hit.
+        """
+        keys = {pair: self.key(*pair, mode) for pair in pairs}
+        found = self.store.lookup_many(keys.values())
+        result = {pair: found[key] for pair, key in keys.items() if key in found}
+        if self.symmetric:
+            reverse = {pair: self.key(pair[1], pair[0], mode) for pair in pairs if pair not in result}
+            found = self.store.lookup_many(reverse.values())
+            result.update({pair: found[key] for pair, key in reverse.items() if key in found})
+        return result
+
+    def set(self, origin: tuple, destination: tuple, mode: str, element: dict):
+        if element and element.get("status") == "OK":
+            self.store.set(self.key(origin, destination, mode), element)
+
+    def set_many(self, routes: list, mode: str):
+        """Stores several (origin, destination, element) routes in one transaction (only successful elements)."""
+        self.store.set_many([
+            (self.key(origin, destination, mode), element)
+            for origin, destination, element in routes
+            if element and element.get("status") == "OK"
+        ])
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+
+_route_cache = None
+_route_cache_lock = threading.Lock()
+
+
+def get_route_cache() -> RouteCache:
+    """Returns the process-wide route cache, creating it on first use."""
+    global _route_cache
+    with _route_cache_lock:
+        if _route_cache is None:
+            _route_cache = RouteCache(
+                PersistentCache(
+                    os.path.join(get_cache_dir(), "routes.sqlite"),
+                    ttl_seconds=ROUTE_CACHE_TTL_DAYS * 86400,
+                    max_entries=ROUTE_CACHE_MAX_ENTRIES,
+                )
+            )
+    return _route_cache
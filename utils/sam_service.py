@@ -0,0 +1,126 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+SAM_CHECKPOINT = os.getenv("SAM_CHECKPOINT", "models/sam_vit_b_01ec64.pth")
+SAM_MODEL_TYPE = os.getenv("SAM_MODEL_TYPE", "vit_b")
+SAM_DEVICE = os.getenv("SAM_DEVICE")
+SAM_NUM_THREADS = int(os.getenv("SAM_NUM_THREADS", "0"))
+SAM_EMBEDDING_CACHE_SIZE = int(os.getenv("SAM_EMBEDDING_CACHE_SIZE", "16"))
+
+
+class SamService:
+    """
+    Process-wide wrapper around a `SamPredictor`.
+
+    The checkpoint is loaded on first use. Image embeddings (the output of the ViT encoder,
+    by far the most expensive step) are kept in an LRU cache keyed by the image content hash,
+    so new prompts on an already seen image skip `predictor.set_image`.
+    The predictor is stateful, so calls are serialized with a lock.
+    """
+
+    def __init__(self, checkpoint=SAM_CHECKPOINT, model_type=SAM_MODEL_TYPE, device=SAM_DEVICE,
+                 num_threads=SAM_NUM_THREADS, cache_size=SAM_EMBEDDING_CACHE_SIZE):
+        self.checkpoint = checkpoint
+        self.model_type = model_type
+        self.device = device
+        self.num_threads = num_threads
+        self.cache_size = cache_size
+        self.embedding_hits = 0
+        self.embedding_misses = 0
+        self._predictor = None
+        self._current_key = None
+        self._embeddings = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def predictor(self):
+        """The underlying `SamPredictor`, loaded on first access."""
+        if self._predictor is None:
+            import torch
+            from segment_anything import sam_model_registry, SamPredictor
+
+            if self.num_threads > 0:
+                torch.set_num_threads(self.num_threads)
+            device = self.device or ("cuda" if torch.cuda.is_available() else "cpu")
+            sam = sam_model_registry[self.model_type](checkpoint=self.checkpoint)
+            sam.to(device=device)
+            sam.eval()
+            self._predictor = SamPredictor(sam)
+        return self._predictor
+
+    def predict(self, image: np.ndarray, point_coords=None, point_labels=None, box=None, multimask_output=True):
+        """
+        Runs SAM on an RGB image, reusing a cached embedding when the image was already seen.
+
+        Args:
+            image (np.ndarray): HxWx3 uint8 RGB image.
+            point_coords (np.ndarray, optional): Nx2 array of (x, y) pixel prompts.
+            point_labels (np.ndarray, optional): N labels (1 = foreground, 0 = background).
+            box (np.ndarray, optional): Box prompt as [x0, y0, x1, y1].
+            multimask_output (bool): Whether SAM returns three candidate masks.
+
+        Returns:
+            tuple: (masks, scores) as returned by `SamPredictor.predict`.
+        """
+        with self._lock:
+            self._set_image(image)
+            masks, scores, _ = self.predictor.predict(
+                point_coords=point_coords,
+                point_labels=point_labels,
+                box=box,
+                multimask_output=multimask_output,
+            )
+        return masks, scores
+
+    def stats(self) -> dict:
+        """Returns embedding cache statistics."""
+        return {
+            "embedding_hits": self.embedding_hits,
+            "embedding_misses": self.embedding_misses,
+            "cached_embeddings": len(self._embeddings),
+        }
+
+    def _set_image(self, image: np.ndarray):
+        key = image_hash(image)
+        if key == self._current_key:
+            self.embedding_hits += 1
+            return
+
+        predictor = self.predictor
+        cached = self._embeddings.get(key)
+        if cached is not None:
+            self._embeddings.move_to_end(key)
+            predictor.features, predictor.original_size, predictor.input_size = cached
+            predictor.is_image_set = True
+            self.embedding_hits += 1
+        else:
+            predictor.set_image(image)
+            self._embeddings[key] = (predictor.features, predictor.original_size, predictor.input_size)
+            while len(self._embeddings) > self.cache_size:
+                self._embeddings.popitem(last=False)
+            self.embedding_misses += 1
+        self._current_key = key
+
+
+def image_hash(image: np.ndarray) -> str:
+    """Content hash of an image array (shape and dtype included)."""
+    digest = hashlib.sha256(f"{image.shape}{image.dtype}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+_sam_service = None
+_sam_service_lock = threading.Lock()
+
+
+def get_sam_service() -> SamService:
+    """Returns the process-wide `SamService`."""
+    global _sam_service
+    with _sam_service_lock:
+        if _sam_service is None:
+            _sam_service = SamService()
+    return _sam_service
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import threading
+
+from utils.cache import PersistentCache
+from utils.common import get_cache_dir
+from utils.geocode_cache import normalize_query
+
+# Search results change slowly for hotels, a week keeps them fresh enough
+SEARCH_CACHE_TTL_DAYS = float(os.getenv("SEARCH_CACHE_TTL_DAYS", "7"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "20000"))
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def normalize_search_query(query: str) -> str:
+    """
+    Normalizes a search query so that trivially different spellings share a cache entry.
+
+    Example:
+        >>> normalize_search_query('  "Les Terrasses d’Eze"   Number of rooms? ')
+        "les terrasses d'eze number of rooms"
+    """
+    return normalize_query(query.replace('"', " ")).strip(" ?!")
+
+
+def get_search_cache() -> PersistentCache:
+    """Returns the process-wide web search cache, creating it on first use."""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = PersistentCache(
+                os.path.join(get_cache_dir(), "search.sqlite"),
+                ttl_seconds=SEARCH_CACHE_TTL_DAYS * 86400,
+                max_entries=SEARCH_CACHE_MAX_ENTRIES,
+            )
+    return _search_cache
+
+
+def cached_search(query: str, fetch, namespace: str = "") -> list:
+    """
+    Runs a web search through the shared on-disk cache.
+
+    Args:
+        query (str): The search query.
+        fetch (callable): Function `fetch(query) -> list` called on a cache miss.
+        namespace (str): Search settings that change the results (engine, language...), part of the key.
+
+    Returns:
+        list: The results of `fetch`, possibly from the cache (empty results are not cached).
+    """
+    cache = get_search_cache()
+    key = f"{namespace}|{normalize_search_query(query)}"
+    hit, result = cache.lookup(key)
+    if hit:
+        return result
+    result = fetch(query)
+    # An empty page may be a transient failure: it is not cached
+    if result:
+        cache.set(key, result)
+    return result
+
+
+async def acached_search(query: str, fetch, namespace: str = "") -> list:
+    """
+    Async version of `cached_search`, `fetch` being a coroutine function.
+    The SQLite cache is read and written in a worker thread, so the event loop is not blocked.
+    """
+    cache = get_search_cache()
+    key = f"{namespace}|{normalize_search_query(query)}"
+    hit, result = await asyncio.to_thread(cache.lookup, key)
+    if hit:
+        return result
+    result = await fetch(query)
+    if result:
+        await asyncio.to_thread(cache.set, key, result)
+    return result
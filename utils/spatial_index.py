@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+
+from utils.geodesy import EARTH_RADIUS_KM, haversine_matrix
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+MAX_DISTANCE_KM = math.pi * EARTH_RADIUS_KM
+
+
+class GridIndex:
+    """
+    Spatial index of points on a regular latitude/longitude grid, held in NumPy arrays.
+
+    The points are sorted by grid cell (`order` maps the sorted positions to the input rows), so
+    the points of a cell are a contiguous slice found with `np.searchsorted`. A radius query reads
+    the cells of the bounding box of the circle and computes the exact great-circle distances of
+    those points only; a nearest-k query doubles the radius until enough points match.
+    """
+
+    def __init__(self, latitude, longitude, cell_deg: float = 0.25):
+        self.cell_deg = cell_deg
+        self.n_lat = int(math.ceil(180 / cell_deg)) + 1
+        self.n_lon = int(math.ceil(360 / cell_deg))
+
+        latitude = np.asarray(latitude, dtype=float)
+        longitude = (np.asarray(longitude, dtype=float) + 180) % 360 - 180
+        cells = self._cell_keys(latitude, longitude)
+        self.order = np.argsort(cells, kind="stable")
+        self.cells = cells[self.order]
+        self.latitude = latitude[self.order]
+        self.longitude = longitude[self.order]
+
+    def __len__(self):
+        return len(self.latitude)
+
+    def _cell_keys(self, latitude, longitude):
+        lat_index = np.clip(((latitude + 90) // self.cell_deg).astype(np.int64), 0, self.n_lat - 1)
+        lon_index = np.clip(((longitude + 180) // self.cell_deg).astype(np.int64), 0, self.n_lon - 1)
+        return lat_index * self.n_lon + lon_index
+
+    def candidates(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        """Sorted positions of the points in the grid cells covering the circle."""
+        dlat = radius_km / KM_PER_DEGREE
+        lat_min, lat_max = max(latitude - dlat, -90.0), min(latitude + dlat, 90.0)
+        cos_lat = min(max(math.cos(math.radians(lat_min)), 0.0), max(math.cos(math.radians(lat_max)), 0.0))
+        row_start = int((lat_min + 90) // self.cell_deg)
+        row_end = min(int((lat_max + 90) // self.cell_deg), self.n_lat - 1)
+        if cos_lat < 1e-6 or radius_km / (KM_PER_DEGREE * cos_lat) >= 180:
+            # Near the poles or for very large radii the whole band of rows is read
+            spans = [(0, self.n_lon - 1)]
+        else:
+            dlon = radius_km / (KM_PER_DEGREE * cos_lat)
+            first = int(((longitude - dlon + 180) % 360) // self.cell_deg)
+            last = int(((longitude + dlon + 180) % 360) // self.cell_deg)
+            # The box may cross the antimeridian
+            spans = [(first, last)] if first <= last else [(first, self.n_lon - 1), (0, last)]
+        slices = []
+        for row in range(row_start, row_end + 1):
+            for first, last in spans:
+                start = np.searchsorted(self.cells, row * self.n_lon + first, side="left")
+                end = np.searchsorted(self.cells, row * self.n_lon + last, side="right")
+                if end > start:
+                    slices.append(np.arange(start, end))
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def within(self, latitude: float, longitude: float, radius_km: float, mask=None):
+        """
+        Points within `radius_km` of a location.
+
+        Args:
+            mask (callable, optional): Filter called with the sorted positions of the candidates,
+                returning a boolean array.
+
+        Returns:
+            tuple: (sorted positions, distances in km), in no particular order.
+        """
+        longitude = (longitude + 180) % 360 - 180
+        positions = self.candidates(latitude, longitude, radius_km)
+        if mask is not None:
+            positions = positions[mask(positions)]
+        distances = haversine_matrix(
+            np.array([[latitude, longitude]]),
+            np.column_stack((self.latitude[positions], self.longitude[positions])),
+        )[0]
+        keep = distances <= radius_km
+        return positions[keep], distances[keep]
+
+    def query(self, latitude: float, longitude: float, radius_km: float = None, top_k: int = None, mask=None):
+        """
+        Points around a location, nearest first.
+
+        Args:
+            latitude (float): Latitude of the location.
+            longitude (float): Longitude of the location.
+            radius_km (float, optional): Maximum great-circle distance.
+            top_k (int, optional): Maximum number of points. With no radius, the k nearest points anywhere.
+            mask (callable, optional): Filter of the candidates (see `within`).
+
+        Returns:
+            tuple: (sorted positions, distances in km), nearest first.
+        """
+        if radius_km is None and top_k is None:
+            raise ValueError("Give a radius_km, a top_k or both")
+        if top_k is None:
+            positions, distances = self.within(latitude, longitude, radius_km, mask)
+        else:
+            limit = MAX_DISTANCE_KM if radius_km is None else radius_km
+            radius = min(self.cell_deg * KM_PER_DEGREE, limit)
+            while True:
+                positions, distances = self.within(latitude, longitude, radius, mask)
+                # Every point closer than `radius` has been read, so the k nearest are exact
+                if len(positions) >= top_k or radius >= limit:
+                    break
+                radius = min(radius * 2, limit)
+        order = np.argsort(distances, kind="stable")
+        if top_k is not None:
+            order = order[:top_k]
+        return positions[order], distances[order]
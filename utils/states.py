@@ -30,7 +30,17 @@ class AssetDimensions(BaseModel):
 
 
 class AgentState(TypedDict):
-    """The state of the agent."""
+    """
+    The state of the agent.
+
+    `messages` holds the user requests and the final answers of the agents. Each branch of the
+    graph keeps its own tool rounds in its own channel, so branches running in the same step
+    don't interleave their messages: the add_messages reducer merges their updates.
+    """
     messages: Annotated[list[AnyMessage], add_messages]
+    location_messages: Annotated[list[AnyMessage], add_messages]
+    dimensions_messages: Annotated[list[AnyMessage], add_messages]
+    competitive_set_messages: Annotated[list[AnyMessage], add_messages]
+    detailed_development_analysis_messages: Annotated[list[AnyMessage], add_messages]
     position_analysis: PositionAnalysis
     asset_dimensions: AssetDimensions 
\ No newline at end of file
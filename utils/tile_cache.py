@@ -0,0 +1,176 @@
+import asyncio
+import hashlib
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from utils.common import get_cache_dir
+from utils.http_pool import get_session, get_async_client, HTTP_TIMEOUT
+
+MAPBOX_SATELLITE_STYLE = "mapbox/satellite-v9"
+TILE_CACHE_MAX_BYTES = int(os.getenv("TILE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+# 6 decimals is ~10 cm, more than enough to consider two requests the same tile
+TILE_COORD_DECIMALS = int(os.getenv("TILE_COORD_DECIMALS", "6"))
+
+
+class TileCache:
+    """
+    Content-addressed on-disk cache of decoded satellite tiles.
+
+    Tiles are stored as raw `.npy` arrays, so a hit is a memory-mapped read with no PNG decode.
+    When the total size exceeds `max_bytes`, the least recently used tiles are deleted
+    (the file modification time is refreshed on every hit).
+    """
+
+    def __init__(self, directory, max_bytes=TILE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._total_bytes = None
+
+    @staticmethod
+    def key(longitude: float, latitude: float, zoom: int, image_size: int, style: str = MAPBOX_SATELLITE_STYLE) -> str:
+        """Returns the content address of a tile request."""
+        d = TILE_COORD_DECIMALS
+        raw = f"{style}|{round(longitude, d):.{d}f}|{round(latitude, d):.{d}f}|{int(zoom)}|{int(image_size)}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str):
+        """
+        Returns the cached tile as a read-only memory-mapped array, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            tile = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return tile
+
+    def put(self, key: str, tile: np.ndarray) -> np.ndarray:
+        """
+        Stores a tile atomically and evicts old tiles if the cache is over budget.
+
+        Returns:
+            np.ndarray: The stored tile, memory-mapped from its file (so other stores can refer to the file).
+        """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(tile))
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, _, size in self._entries())
+            else:
+                self._total_bytes += os.path.getsize(path)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        try:
+            return np.load(path, mmap_mode="r")
+        except (FileNotFoundError, ValueError):
+            # Evicted right away by a tiny budget
+            return tile
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size of the cache."""
+        entries = list(self._entries())
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "tiles": len(entries),
+            "bytes": sum(size for _, _, size in entries),
+        }
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        self._total_bytes = total
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".npy"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_mtime, stat.st_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.npy")
+
+
+_tile_cache = None
+_tile_cache_lock = threading.Lock()
+
+
+def get_tile_cache() -> TileCache:
+    """Returns the process-wide satellite tile cache."""
+    global _tile_cache
+    with _tile_cache_lock:
+        if _tile_cache is None:
+            _tile_cache = TileCache(get_cache_dir("tiles"))
+    return _tile_cache
+
+
+def satellite_tile_url(latitude: float, longitude: float, zoom: int, image_size: int) -> str:
+    return f"https://api.mapbox.com/styles/v1/{MAPBOX_SATELLITE_STYLE}/static/{longitude},{latitude},{zoom}/{image_size}x{image_size}?access_token={os.getenv('MAPBOX_TOKEN')}"
+
+
+def get_satellite_tile(latitude: float, longitude: float, zoom: int = 18, image_size: int = 512) -> np.ndarray:
+    """
+    Returns a Mapbox satellite tile as an RGB array, downloading it only on a cache miss.
+
+    Returns:
+        np.ndarray: HxWx3 uint8 array (memory-mapped when served from the cache).
+    """
+    cache = get_tile_cache()
+    key = cache.key(longitude, latitude, zoom, image_size)
+    tile = cache.get(key)
+    if tile is None:
+        response = get_session().get(satellite_tile_url(latitude, longitude, zoom, image_size), timeout=HTTP_TIMEOUT)
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to download image: {response.status_code} - {response.text}")
+        tile = _decode_tile(response.content)
+        tile = cache.put(key, tile)
+    return tile
+
+
+async def aget_satellite_tile(latitude: float, longitude: float, zoom: int = 18, image_size: int = 512) -> np.ndarray:
+    """
+    Async version of `get_satellite_tile`.
+    The cache reads and writes (and the eviction scan) and the PNG decode run in a worker thread,
+    so the event loop is not blocked.
+    """
+    cache = get_tile_cache()
+    key = cache.key(longitude, latitude, zoom, image_size)
+    tile = await asyncio.to_thread(cache.get, key)
+    if tile is None:
+        response = await get_async_client().get(satellite_tile_url(latitude, longitude, zoom, image_size))
+        if response.status_code != 200:
+            raise RuntimeError(f"Failed to download image: {response.status_code} - {response.text}")
+        tile = await asyncio.to_thread(_decode_tile, response.content)
+        tile = await asyncio.to_thread(cache.put, key, tile)
+    return tile
+
+
+def _decode_tile(content: bytes) -> np.ndarray:
+    return np.array(Image.open(BytesIO(content)).convert("RGB"))